@@ -0,0 +1,117 @@
+"""
+結構化行動紀錄
+每個事件以 (座位, 事件代碼, 金額, 街) 存在 array 中，只有在顯示時才轉成文字
+ActionLog 可當作唯讀的文字序列使用（len、索引、切片、迭代），取代原本的字串列表 action_history
+"""
+
+from array import array
+from typing import Iterator, List, Sequence, Tuple, Union
+
+from card_codec import CARD_STR
+
+# 事件代碼
+POST_SB = 0
+POST_BB = 1
+FOLD = 2
+CHECK = 3
+CALL = 4
+BET = 5
+RAISE = 6
+DEAL = 7           # 發公共牌，座位為 -1，金額欄位存放打包後的牌（每張 6 位元）
+WIN = 8
+WIN_SHOWDOWN = 9
+
+EVENT_NAMES = ["post_sb", "post_bb", "fold", "check", "call", "bet", "raise", "deal", "win", "win_showdown"]
+
+# 街代碼（與 Street 列舉的順序相同）
+STREET_NAMES = ["preflop", "flop", "turn", "river", "showdown"]
+FLOP, TURN, RIVER, SHOWDOWN = 1, 2, 3, 4
+
+_CARD_BITS = 6
+
+
+def pack_cards(cards: Sequence[int]) -> int:
+    """把最多 5 張牌打包成一個整數"""
+    packed = 0
+    for i, card in enumerate(cards):
+        packed |= card << (_CARD_BITS * i)
+    return packed
+
+
+def unpack_cards(packed: int, count: int) -> List[int]:
+    return [(packed >> (_CARD_BITS * i)) & 63 for i in range(count)]
+
+
+class ActionLog:
+    """一手牌的行動紀錄"""
+    __slots__ = ('names', 'seats', 'codes', 'amounts', 'streets')
+
+    def __init__(self, names: Sequence[str] = ()):
+        self.names = tuple(names)     # 座位 -> 玩家名稱（顯示用）
+        self.seats = array('b')
+        self.codes = array('B')
+        self.amounts = array('q')
+        self.streets = array('B')
+
+    def append(self, seat: int, code: int, amount: int, street: int):
+        self.seats.append(seat)
+        self.codes.append(code)
+        self.amounts.append(amount)
+        self.streets.append(street)
+
+    def deal(self, cards: Sequence[int], street: int):
+        """記錄發公共牌（攤牌時 cards 為空）"""
+        self.append(-1, DEAL, pack_cards(cards), street)
+
+    def truncate(self, length: int):
+        """只保留前 length 個事件（快照還原用）"""
+        del self.seats[length:]
+        del self.codes[length:]
+        del self.amounts[length:]
+        del self.streets[length:]
+
+    def events(self, start: int = 0) -> Iterator[Tuple[int, int, int, int]]:
+        """逐一返回 (座位, 事件代碼, 金額, 街)，供匯出與分析直接使用"""
+        return zip(self.seats[start:], self.codes[start:], self.amounts[start:], self.streets[start:])
+
+    def render(self, index: int) -> str:
+        """把單一事件轉為文字（格式與舊版 action_history 相同）"""
+        seat, code, amount, street = (self.seats[index], self.codes[index],
+                                      self.amounts[index], self.streets[index])
+        if code == DEAL:
+            if street == SHOWDOWN:
+                return "\n=== SHOWDOWN ==="
+            cards = unpack_cards(amount, 3 if street == FLOP else 1)
+            return f"\n=== {STREET_NAMES[street].upper()}: {' '.join(CARD_STR[c] for c in cards)} ==="
+
+        name = self.names[seat]
+        if code == POST_SB:
+            return f"{name} posts SB ${amount}"
+        if code == POST_BB:
+            return f"{name} posts BB ${amount}"
+        if code == FOLD:
+            return f"{name} folds"
+        if code == CHECK:
+            return f"{name} checks"
+        if code == CALL:
+            return f"{name} calls ${amount}"
+        if code == BET:
+            return f"{name} bets ${amount}"
+        if code == RAISE:
+            return f"{name} raises to ${amount}"
+        return f"\n{name} wins ${amount}{' at showdown' if code == WIN_SHOWDOWN else ''}"
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self.render(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("行動紀錄索引超出範圍")
+        return self.render(index)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.render(i) for i in range(len(self)))
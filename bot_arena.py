@@ -0,0 +1,252 @@
+"""
+複式發牌對戰場
+讓候選策略在無介面引擎中對戰，以兩種方式降低變異數，用較少的手數回答「新的範圍檔是否比較好」：
+- 複式發牌：同一副牌打 P 次（P 為策略數），每次把策略往下一個座位輪換，運氣好的牌每個策略都拿過
+- 全下期望值：最後一個行動之後若還有公共牌未發，以剩餘公共牌的期望分配取代實際結果
+結果以每 100 手贏得的大盲數（bb/100）與 95% 信賴區間呈現，信賴區間以副牌為獨立樣本計算
+
+策略寫法：名稱（engine、analyzer、postflop），或 engine:策略檔
+（.npz 為轉換好的混合策略；.json 為範圍檔或混合策略 JSON，後者套用在預設範圍之上）
+
+執行: python bot_arena.py engine engine:new_ranges.json --deals 2000 [--seed 0] [--workers 4] [--no-allin-ev]
+"""
+
+import argparse
+import time
+from itertools import combinations
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import action_log
+import mixed_strategy
+from hand_evaluator import HandEvaluator
+from headless_runner import POLICIES, EngineGTOPolicy, Policy, play_hand
+from range_index import RANGES_PATH
+from settlement import settle_batch
+from texas_holdem_complete import TexasHoldemGame
+
+ALLIN_SAMPLES = 1000  # 翻牌前全下時抽樣的公共牌數（翻牌後剩兩張以內，直接列舉）
+Z_95 = 1.96
+
+
+def make_policy(spec: str) -> Policy:
+    """由策略寫法建立策略物件"""
+    name, _, path = spec.partition(":")
+    if name not in POLICIES:
+        raise ValueError(f"未知的策略: {name}（可用: {', '.join(POLICIES)}）")
+    if not path:
+        return POLICIES[name]()
+    if name != EngineGTOPolicy.name:
+        raise ValueError(f"只有 {EngineGTOPolicy.name} 策略可以指定策略檔")
+    if path.endswith(".npz"):
+        return EngineGTOPolicy(mixed_strategy.MixedStrategy.load(path))
+    # 混合策略 JSON 只包含部分情境，其餘沿用預設範圍（範圍檔本身會覆蓋全部情境）
+    return EngineGTOPolicy(mixed_strategy.merge([RANGES_PATH, path]))
+
+
+def _board_at_last_action(log) -> int:
+    """最後一個玩家行動發生時已發出的公共牌數"""
+    shown = known = 0
+    for seat, code, amount, street in log.events():
+        if code == action_log.DEAL:
+            if street != action_log.SHOWDOWN:
+                shown = 2 + street
+        elif code <= action_log.RAISE:
+            known = shown
+    return known
+
+
+def allin_ev(game: TexasHoldemGame, rng: np.random.Generator,
+             samples: int = ALLIN_SAMPLES) -> Optional[np.ndarray]:
+    """
+    全下期望值：手牌結算後呼叫
+    最後一個行動之後沒有人能再做決定、且當時還有公共牌未發時，返回各座位的期望分配（浮點數）
+    否則返回 None
+    """
+    players = game.players
+    active = [i for i, p in enumerate(players) if not p.is_folded]
+    if len(active) < 2 or sum(1 for i in active if not players[i].is_all_in) > 1:
+        return None
+    known = _board_at_last_action(game.action_history)
+    if known >= 5:
+        return None
+
+    board = [c.id for c in game.community_cards[:known]]
+    dead = set(board)
+    for p in players:
+        dead.update(c.id for c in p.hole_cards)
+    deck = np.array([c for c in range(52) if c not in dead], dtype=np.int64)
+    missing = 5 - known
+    if missing <= 2:
+        runouts = np.array(list(combinations(deck, missing)), dtype=np.int64)
+    else:
+        # 每列取亂數排序後的前幾張，等同不放回抽樣
+        runouts = deck[np.argsort(rng.random((samples, len(deck))), axis=1)[:, :missing]]
+    count = len(runouts)
+    boards = np.hstack([np.tile(np.array(board, dtype=np.int64), (count, 1)), runouts])
+
+    num_seats = len(players)
+    strengths = np.zeros((count, num_seats), dtype=np.int64)
+    for seat in active:
+        hole = np.array([c.id for c in players[seat].hole_cards], dtype=np.int64)
+        strengths[:, seat] = HandEvaluator.evaluate_batch(np.hstack([np.tile(hole, (count, 1)), boards]))
+    contributions = np.tile(np.array([p.total_contributed for p in players], dtype=np.int64), (count, 1))
+    folded = np.tile(np.array([p.is_folded for p in players]), (count, 1))
+    payouts = settle_batch(contributions, folded, strengths, game.odd_chip_order())
+    return payouts.mean(axis=0)
+
+
+class ArenaResult:
+    """
+    對戰結果
+    samples[副牌, 策略]：該副牌所有輪換中，策略平均每個座位手贏得的大盲數（已套用全下期望值）
+    raw 為未調整的實際結果，用來比較變異數降低的效果
+    """
+    __slots__ = ('labels', 'samples', 'raw', 'hands', 'adjusted', 'seconds')
+
+    def __init__(self, labels: Sequence[str], samples: np.ndarray, raw: np.ndarray,
+                 hands: int = 0, adjusted: int = 0, seconds: float = 0.0):
+        self.labels = list(labels)
+        self.samples = samples
+        self.raw = raw
+        self.hands = hands
+        self.adjusted = adjusted  # 以全下期望值結算的手數
+        self.seconds = seconds
+
+    @property
+    def deals(self) -> int:
+        return len(self.samples)
+
+    @staticmethod
+    def _interval(values: np.ndarray) -> Tuple[float, float]:
+        """平均值與 95% 信賴區間半寬，換算為 bb/100"""
+        if len(values) < 2:
+            return float(values.mean()) * 100 if len(values) else 0.0, float("inf")
+        return (float(values.mean()) * 100,
+                Z_95 * float(values.std(ddof=1)) / np.sqrt(len(values)) * 100)
+
+    def bb_per_100(self, index: int, raw: bool = False) -> Tuple[float, float]:
+        """策略的 bb/100 與 95% 信賴區間半寬"""
+        return self._interval((self.raw if raw else self.samples)[:, index])
+
+    def difference(self, index: int, baseline: int = 0) -> Tuple[float, float]:
+        """兩個策略的 bb/100 差距（同一副牌成對相減，誤差比分別計算再相減小）"""
+        return self._interval(self.samples[:, index] - self.samples[:, baseline])
+
+    def merge(self, other: "ArenaResult") -> "ArenaResult":
+        self.samples = np.vstack([self.samples, other.samples])
+        self.raw = np.vstack([self.raw, other.raw])
+        self.hands += other.hands
+        self.adjusted += other.adjusted
+        self.seconds = max(self.seconds, other.seconds)
+        return self
+
+    def summary(self) -> str:
+        lines = [f"{self.deals} 副牌, {self.hands} 手（{self.adjusted} 手以全下期望值結算）, {self.seconds:.2f} 秒"]
+        for i, label in enumerate(self.labels):
+            mean, half = self.bb_per_100(i)
+            raw_mean, raw_half = self.bb_per_100(i, raw=True)
+            lines.append(f"  {label}: {mean:+.2f} ± {half:.2f} bb/100（未調整 {raw_mean:+.2f} ± {raw_half:.2f}）")
+        for i, label in enumerate(self.labels[1:], start=1):
+            mean, half = self.difference(i)
+            verdict = "較好" if mean - half > 0 else "較差" if mean + half < 0 else "無顯著差異"
+            lines.append(f"  {label} 對 {self.labels[0]}: {mean:+.2f} ± {half:.2f} bb/100，{verdict}")
+        return "\n".join(lines)
+
+
+class DuplicateArena:
+    """
+    複式發牌對戰
+    第 k 副牌以種子 (seed, k) 發牌，第 r 次輪換時座位 s 使用策略 (s + r) % P，
+    P 次輪換後每個策略在每個座位都拿過同一手牌；每手牌重設籌碼
+    """
+
+    def __init__(self, specs: Sequence[str], num_players: int = 6, starting_stack: int = 5000,
+                 small_blind: int = 50, big_blind: int = 100, seed: int = 0, use_allin_ev: bool = True):
+        if len(specs) < 2:
+            raise ValueError("至少需要兩個策略")
+        self.specs = list(specs)
+        self.policies = [make_policy(spec) for spec in self.specs]
+        self.game = TexasHoldemGame(num_players, starting_stack, small_blind, big_blind,
+                                    enable_logging=False, seed=seed)
+        self.game.initialize_players(human_seat=-1)
+        self.seed = seed
+        self.use_allin_ev = use_allin_ev
+
+    def _seats(self, rotation: int) -> List[int]:
+        return [(seat + rotation) % len(self.policies) for seat in range(self.game.num_players)]
+
+    def play(self, deal: int, rotation: int) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """打一副牌的一次輪換，返回 (各座位期望盈虧, 各座位實際盈虧, 是否以全下期望值結算)"""
+        game = self.game
+        for player in game.players:
+            player.stack = game.starting_stack
+        game.start_new_hand((self.seed << 32) | deal)
+        play_hand(game, [self.policies[i] for i in self._seats(rotation)])
+
+        contributed = np.array([p.total_contributed for p in game.players], dtype=np.float64)
+        actual = np.array([p.stack - game.starting_stack for p in game.players], dtype=np.float64)
+        expected = None
+        if self.use_allin_ev:
+            expected = allin_ev(game, np.random.default_rng([self.seed, deal, rotation]))
+        if expected is None:
+            return actual, actual, False
+        return expected - contributed, actual, True
+
+    def run(self, num_deals: int, first_deal: int = 0) -> ArenaResult:
+        num_policies = len(self.policies)
+        scale = self.game.num_players * self.game.big_blind  # 每副牌每個策略坐 num_players 個座位手
+        samples = np.zeros((num_deals, num_policies))
+        raw = np.zeros((num_deals, num_policies))
+        adjusted = 0
+        start = time.perf_counter()
+        for row, deal in enumerate(range(first_deal, first_deal + num_deals)):
+            for rotation in range(num_policies):
+                expected, actual, was_adjusted = self.play(deal, rotation)
+                adjusted += was_adjusted
+                seats = self._seats(rotation)
+                np.add.at(samples[row], seats, expected)
+                np.add.at(raw[row], seats, actual)
+        return ArenaResult(self.specs, samples / scale, raw / scale, hands=num_deals * num_policies,
+                           adjusted=adjusted, seconds=time.perf_counter() - start)
+
+
+def _run_chunk(specs: List[str], first_deal: int, num_deals: int, seed: int, use_allin_ev: bool) -> ArenaResult:
+    """工作行程中的一段副牌（副牌編號決定牌，結果與分段方式無關）"""
+    return DuplicateArena(specs, seed=seed, use_allin_ev=use_allin_ev).run(num_deals, first_deal)
+
+
+def run_parallel(specs: Sequence[str], num_deals: int, executor, seed: int = 0, use_allin_ev: bool = True,
+                 chunk_deals: int = 250) -> ArenaResult:
+    """以 ParallelExecutor 分段平行對戰，返回合併後的結果（秒數為實際經過時間）"""
+    start = time.perf_counter()
+    jobs = [(list(specs), first, min(chunk_deals, num_deals - first), seed, use_allin_ev)
+            for first in range(0, num_deals, chunk_deals)]
+    result = executor.reduce(_run_chunk, jobs, ArenaResult.merge, seeded=False)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="複式發牌策略對戰（第一個策略為比較基準）")
+    parser.add_argument("policies", nargs="+",
+                        help=f"策略名稱（可用: {', '.join(POLICIES)}），或 engine:策略檔（.npz / .json）")
+    parser.add_argument("--deals", type=int, default=1000, help="副牌數（每副牌依策略數輪換重打）")
+    parser.add_argument("--seed", type=int, default=0, help="亂數種子")
+    parser.add_argument("--workers", type=int, default=1, help="工作行程數（1 表示在本行程執行）")
+    parser.add_argument("--no-allin-ev", action="store_true", help="不以全下期望值結算")
+    args = parser.parse_args()
+
+    use_allin_ev = not args.no_allin_ev
+    if args.workers > 1:
+        from parallel_executor import ParallelExecutor
+        with ParallelExecutor(max_workers=args.workers, seed=args.seed) as executor:
+            result = run_parallel(args.policies, args.deals, executor, args.seed, use_allin_ev)
+    else:
+        result = DuplicateArena(args.policies, seed=args.seed, use_allin_ev=use_allin_ev).run(args.deals)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
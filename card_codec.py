@@ -0,0 +1,156 @@
+"""
+撲克牌整數編碼
+牌以 0-51 的整數表示：點數索引 * 4 + 花色索引
+一組牌（手牌、公共牌、死牌）以 52 位元遮罩表示
+字串與花色符號只在顯示時使用
+"""
+
+from typing import Iterable, List, Tuple
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+SUITS = ['♠', '♥', '♦', '♣']
+
+NUM_CARDS = 52
+FULL_DECK_MASK = (1 << NUM_CARDS) - 1
+
+# 接受字母與符號兩種花色表示
+SUIT_INDEX = {
+    '♠': 0, '♥': 1, '♦': 2, '♣': 3,
+    's': 0, 'h': 1, 'd': 2, 'c': 3,
+    'S': 0, 'H': 1, 'D': 2, 'C': 3
+}
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+RANK_INDEX['t'] = RANK_INDEX['T']
+RANK_INDEX['j'] = RANK_INDEX['J']
+RANK_INDEX['q'] = RANK_INDEX['Q']
+RANK_INDEX['k'] = RANK_INDEX['K']
+RANK_INDEX['a'] = RANK_INDEX['A']
+
+# 以牌的整數編碼為索引的預先計算表
+CARD_RANK = tuple(2 + (c >> 2) for c in range(NUM_CARDS))      # 點數值 2-14
+CARD_SUIT = tuple(c & 3 for c in range(NUM_CARDS))             # 花色索引 0-3
+CARD_BIT = tuple(1 << c for c in range(NUM_CARDS))             # 遮罩位元
+CARD_STR = tuple(RANKS[c >> 2] + SUITS[c & 3] for c in range(NUM_CARDS))
+
+
+def card_id(rank: str, suit: str) -> int:
+    """由牌面與花色取得整數編碼"""
+    try:
+        return RANK_INDEX[rank] * 4 + SUIT_INDEX[suit]
+    except KeyError:
+        raise ValueError(f"無法辨識的牌: {rank}{suit}")
+
+
+def parse_card(text: str) -> int:
+    """解析單張牌，如 "As"、"A♠"、"Td" """
+    text = text.strip()
+    if len(text) != 2:
+        raise ValueError(f"無法辨識的牌: {text}")
+    return card_id(text[0], text[1])
+
+
+def parse_cards(text: str) -> List[int]:
+    """解析多張牌，可用空白分隔或連寫，如 "AsKd" 或 "A♠ K♦" """
+    text = "".join(text.split())
+    return [parse_card(text[i:i + 2]) for i in range(0, len(text), 2)]
+
+
+def card_str(card: int) -> str:
+    """整數編碼轉為顯示字串"""
+    return CARD_STR[card]
+
+
+def to_card_id(card) -> int:
+    """將整數、Card 物件或字典格式的牌統一轉為整數編碼"""
+    if isinstance(card, int):
+        return card
+    cid = getattr(card, 'id', None)
+    if cid is not None:
+        return cid
+    if hasattr(card, 'rank'):
+        return card_id(card.rank, card.suit)
+    return card_id(card.get('rank', ''), card.get('suit', ''))
+
+
+def to_card_ids(cards: Iterable) -> List[int]:
+    """批次轉換為整數編碼"""
+    return [to_card_id(card) for card in cards]
+
+
+def cards_to_mask(cards: Iterable) -> int:
+    """一組牌轉為 52 位元遮罩"""
+    mask = 0
+    for card in cards:
+        mask |= CARD_BIT[to_card_id(card)]
+    return mask
+
+
+def mask_to_cards(mask: int) -> List[int]:
+    """52 位元遮罩轉為整數編碼列表（由小到大）"""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def hand_class_combos(hand: str) -> List[Tuple[int, int]]:
+    """
+    展開手牌類別為所有具體組合
+    "AA" -> 6 組、"AKs" -> 4 組、"AKo" -> 12 組、"AK" -> 16 組
+    也接受具體手牌如 "AsKd"
+    """
+    hand = hand.strip()
+    if len(hand) == 4:
+        first, second = parse_cards(hand)
+        return [(first, second)]
+
+    high, low = RANK_INDEX[hand[0]], RANK_INDEX[hand[1]]
+    kind = hand[2].lower() if len(hand) > 2 else ''
+    combos = []
+    for suit1 in range(4):
+        for suit2 in range(4):
+            if high == low and suit2 <= suit1:
+                continue
+            if kind == 's' and suit1 != suit2:
+                continue
+            if kind == 'o' and suit1 == suit2:
+                continue
+            combos.append((high * 4 + suit1, low * 4 + suit2))
+    return combos
+
+
+# 起手牌類別：13x13 格，對角線為對子，右上為同花，左下為不同花（A 在最前）
+def _hand_class_name(row: int, col: int) -> str:
+    high, low = RANKS[12 - min(row, col)], RANKS[12 - max(row, col)]
+    if row == col:
+        return high + low
+    return high + low + ('s' if row < col else 'o')
+
+
+HAND_CLASSES = tuple(_hand_class_name(row, col) for row in range(13) for col in range(13))
+HAND_CLASS_INDEX = {name: i for i, name in enumerate(HAND_CLASSES)}
+NUM_HAND_CLASSES = len(HAND_CLASSES)
+
+# 1326 組具體手牌，依 (小, 大) 的字典序排列
+COMBO_CARDS = tuple((low, high) for low in range(NUM_CARDS) for high in range(low + 1, NUM_CARDS))
+COMBO_INDEX = {cards: i for i, cards in enumerate(COMBO_CARDS)}
+NUM_COMBOS = len(COMBO_CARDS)
+
+
+def combo_index(first: int, second: int) -> int:
+    """兩張牌（整數編碼）對應的組合索引 0-1325"""
+    return COMBO_INDEX[(first, second) if first < second else (second, first)]
+
+
+def hand_class_of(first: int, second: int) -> str:
+    """兩張牌（整數編碼）所屬的起手牌類別，如 "AKs" """
+    high_rank, low_rank = max(first >> 2, second >> 2), min(first >> 2, second >> 2)
+    row, col = 12 - high_rank, 12 - low_rank
+    if high_rank != low_rank and (first & 3) != (second & 3):
+        row, col = col, row
+    return HAND_CLASSES[row * 13 + col]
+
+
+COMBO_CLASS = tuple(HAND_CLASS_INDEX[hand_class_of(*cards)] for cards in COMBO_CARDS)
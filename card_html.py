@@ -0,0 +1,72 @@
+"""
+牌桌 HTML 範本
+52 張牌的兩種尺寸與每個座位的玩家卡片標頭在匯入時預先產生，畫面只以整數編碼查表後串接
+樣式全部使用 CSS class（定義在 UI 的樣式區塊），不輸出行內樣式
+"""
+
+import html
+from typing import Dict, Iterable, Sequence, Tuple
+
+from card_codec import CARD_STR, NUM_CARDS
+from positions import SEAT_POSITIONS
+
+# 紅色花色：♥ ♦
+_RED_SUITS = (1, 2)
+
+
+def _card(cid: int, css_class: str) -> str:
+    color = "red" if (cid & 3) in _RED_SUITS else "black"
+    return f'<div class="{css_class} {color}">{CARD_STR[cid]}</div>'
+
+
+# 以牌的整數編碼為索引：手牌（玩家卡片、攤牌）與公共牌兩種尺寸
+HOLE_CARD_HTML = tuple(_card(cid, "hole-card") for cid in range(NUM_CARDS))
+BOARD_CARD_HTML = tuple(_card(cid, "community-card") for cid in range(NUM_CARDS))
+
+WAITING_FOR_FLOP = '<div class="board-message">等待翻牌...</div>'
+NO_BOARD = '<div class="board-message">沒有公共牌</div>'
+
+# 玩家卡片標頭：(名稱, 位置, 是否為真人) -> HTML
+# 預先產生標準 6 人桌每個座位的兩種版面，其他名稱第一次使用時產生
+_SEAT_HEADERS: Dict[Tuple[str, str, bool], str] = {}
+
+
+def _header(name: str, position: str, is_human: bool) -> str:
+    css_class = "player-card human" if is_human else "player-card"
+    return f'<div class="{css_class}"><h4>{html.escape(name)} ({position})</h4>'
+
+
+def seat_header(name: str, position: str, is_human: bool) -> str:
+    key = (name, position, is_human)
+    header = _SEAT_HEADERS.get(key)
+    if header is None:
+        header = _SEAT_HEADERS[key] = _header(name, position, is_human)
+    return header
+
+
+for _seat, _position in enumerate(SEAT_POSITIONS):
+    # 與 initialize_players 的命名方式相同
+    seat_header("You", _position, True)
+    seat_header(f"Player {_seat + 1}", _position, False)
+
+
+def hole_cards_html(cards: Iterable[int]) -> str:
+    """置中的一組手牌"""
+    return '<div class="hole-cards">' + "".join(HOLE_CARD_HTML[cid] for cid in cards) + '</div>'
+
+
+def player_card_html(name: str, position: str, stack: int, is_human: bool, hole: Sequence[int] = ()) -> str:
+    """玩家資訊卡片（hole 為要顯示的手牌，電腦玩家傳入空序列）"""
+    cards = hole_cards_html(hole) if hole else ""
+    return (seat_header(name, position, is_human)
+            + f'<p>籌碼: <span class="chip-display">${stack}</span></p>' + cards + '</div>')
+
+
+def table_html(pot: int, board: Iterable[int], waiting: bool) -> str:
+    """撲克桌中央：底池與公共牌（尚未發牌時，waiting 表示等待翻牌）"""
+    cards = "".join(BOARD_CARD_HTML[cid] for cid in board)
+    if cards:
+        center = '<div class="board">' + cards + '</div>'
+    else:
+        center = WAITING_FOR_FLOP if waiting else NO_BOARD
+    return f'<div class="poker-table"><h2 class="pot">底池: <span class="chip-display">${pot}</span></h2>{center}</div>'
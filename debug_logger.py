@@ -6,12 +6,16 @@ import datetime
 import os
 
 class DebugLogger:
-    def __init__(self, log_file="poker_debug.txt"):
+    def __init__(self, log_file="poker_debug.txt", enabled=True):
         self.log_file = log_file
-        self.clear_log()
+        self.enabled = enabled  # 關閉時不寫檔也不輸出（無介面模擬使用）
+        self._started = False   # 第一次寫入時才清空日誌，匯入模組不會動到檔案
     
     def clear_log(self):
         """清空日誌文件"""
+        if not self.enabled:
+            return
+        self._started = True
         with open(self.log_file, 'w', encoding='utf-8') as f:
             f.write(f"=== 德州撲克 GTO 訓練器 Debug Log ===\n")
             f.write(f"開始時間: {datetime.datetime.now()}\n")
@@ -19,6 +23,10 @@ class DebugLogger:
     
     def log(self, message, category="INFO"):
         """記錄日誌"""
+        if not self.enabled:
+            return
+        if not self._started:
+            self.clear_log()
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {category}: {message}\n"
         
@@ -73,5 +81,5 @@ class DebugLogger:
         self.log(f"GTO分析 - 正確: {is_correct}", "GTO")
         self.log(f"建議: {suggestion}", "GTO")
 
-# 全局logger實例
+# 全局logger實例（行程內共用，第一次寫入時才建立日誌檔）
 debug_logger = DebugLogger()
\ No newline at end of file
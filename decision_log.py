@@ -0,0 +1,77 @@
+"""
+真人決策紀錄
+每個決策只保存判斷所需的欄位與當時的建議（精簡紀錄），詳細分析文字在報告顯示時才產生
+統計數字在加入紀錄時累加，報告不需要每次重繪都掃描整個工作階段
+"""
+
+from typing import List, Tuple
+
+REPORT_PAGE_SIZE = 10
+
+
+class DecisionRecord:
+    """一次決策：best 為判斷時的建議 (動作, 金額, 說明)，產生詳細分析時直接沿用，不重新計算"""
+    __slots__ = ('hand_no', 'street', 'hand', 'position', 'action', 'amount',
+                 'current_bet', 'big_blind', 'is_correct', 'suggestion', 'best')
+
+    def __init__(self, street: str, hand: str, position: str, action: str, amount: int,
+                 current_bet: int, big_blind: int, is_correct: bool, suggestion: str, best: Tuple):
+        self.hand_no = 0  # 加入 DecisionLog 時填入
+        self.street = street
+        self.hand = hand
+        self.position = position
+        self.action = action
+        self.amount = amount
+        self.current_bet = current_bet
+        self.big_blind = big_blind
+        self.is_correct = is_correct
+        self.suggestion = suggestion
+        self.best = best
+
+
+class DecisionLog:
+    """整個工作階段的決策紀錄，分別累計全部與目前這手牌的決策數與正確數"""
+    __slots__ = ('records', 'correct', 'hand_no', 'hand_start', 'hand_correct')
+
+    def __init__(self):
+        self.records: List[DecisionRecord] = []
+        self.correct = 0
+        self.hand_no = 0
+        self.hand_start = 0  # 目前這手牌第一個決策的索引
+        self.hand_correct = 0
+
+    def new_hand(self):
+        self.hand_no += 1
+        self.hand_start = len(self.records)
+        self.hand_correct = 0
+
+    def add(self, record: DecisionRecord):
+        record.hand_no = self.hand_no
+        self.records.append(record)
+        self.correct += record.is_correct
+        self.hand_correct += record.is_correct
+
+    @property
+    def total(self) -> int:
+        return len(self.records)
+
+    @property
+    def hand_total(self) -> int:
+        return len(self.records) - self.hand_start
+
+    @staticmethod
+    def accuracy(correct: int, total: int) -> float:
+        """正確率（百分比）"""
+        return correct / total * 100 if total > 0 else 0.0
+
+    def hand_records(self) -> List[DecisionRecord]:
+        return self.records[self.hand_start:]
+
+    def num_pages(self, page_size: int = REPORT_PAGE_SIZE) -> int:
+        return max(1, -(-len(self.records) // page_size))
+
+    def page(self, number: int, page_size: int = REPORT_PAGE_SIZE) -> List[Tuple[int, DecisionRecord]]:
+        """第 number 頁（從 1 開始，最新的決策在第 1 頁），返回 (決策編號, 紀錄)，編號從 1 開始"""
+        end = len(self.records) - (number - 1) * page_size
+        start = max(end - page_size, 0)
+        return [(i + 1, self.records[i]) for i in range(end - 1, start - 1, -1)]
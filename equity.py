@@ -0,0 +1,397 @@
+"""
+勝率計算
+- 蒙地卡羅抽樣：以批次向量化方式發出對手手牌與剩餘公共牌，
+  在次數上限或時間上限到達時停止
+- 精確計算：列舉所有剩餘公共牌，花色同構的牌面只評估一次並加權
+"""
+
+import time
+from functools import lru_cache
+from itertools import chain, combinations, permutations
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from card_codec import NUM_CARDS, hand_class_combos, parse_cards, to_card_ids
+from hand_evaluator import HandEvaluator
+
+# 每批模擬的次數
+DEFAULT_BATCH_SIZE = 1000
+
+# 對手之間的手牌衝突時，整列重新抽樣的最多次數
+MAX_RESAMPLE_ROUNDS = 20
+
+
+class EquityResult:
+    """勝率結果"""
+    __slots__ = ('win', 'tie', 'equity', 'std_error', 'iterations')
+
+    def __init__(self, win: float, tie: float, equity: float, std_error: float, iterations: int):
+        self.win = win                  # 獨贏機率
+        self.tie = tie                  # 平分機率
+        self.equity = equity            # 勝率（平分按人數分攤）
+        self.std_error = std_error      # 勝率的標準誤
+        self.iterations = iterations    # 模擬次數（精確計算時為牌局數）
+
+    def __repr__(self):
+        return (f"EquityResult(equity={self.equity:.4f}, win={self.win:.4f}, tie={self.tie:.4f}, "
+                f"std_error={self.std_error:.4f}, iterations={self.iterations})")
+
+
+def as_card_ids(cards) -> List[int]:
+    """接受字串（如 "AsKd"）、Card 物件或整數編碼"""
+    if cards is None:
+        return []
+    if isinstance(cards, str):
+        return parse_cards(cards)
+    return to_card_ids(cards)
+
+
+def range_to_combos(hand_range, blocked_mask: int = 0) -> np.ndarray:
+    """
+    將範圍轉為具體組合陣列 (K, 2)，移除與已知牌衝突的組合
+    hand_range: 手牌類別或具體手牌的列表，如 ["AA", "AKs", "QsJs"]；None 表示任意手牌
+    """
+    if hand_range is None:
+        combos = [(c1, c2) for c1 in range(NUM_CARDS) for c2 in range(c1 + 1, NUM_CARDS)]
+    else:
+        combos = []
+        seen = set()
+        for hand in hand_range:
+            for combo in (hand_class_combos(hand) if isinstance(hand, str) else [tuple(as_card_ids(hand))]):
+                key = tuple(sorted(combo))
+                if key not in seen:
+                    seen.add(key)
+                    combos.append(key)
+
+    combos = [combo for combo in combos
+              if not (blocked_mask >> combo[0]) & 1 and not (blocked_mask >> combo[1]) & 1]
+    if not combos:
+        raise ValueError("對手範圍中沒有與已知牌不衝突的組合")
+    return np.array(combos, dtype=np.int64)
+
+
+def _settle_showdowns(hero_strength: np.ndarray, opponent_strengths: np.ndarray):
+    """
+    計算每次模擬中英雄的結果
+    返回：(獨贏陣列, 平分陣列, 勝率樣本陣列)
+    """
+    best_opponent = opponent_strengths.max(axis=1)
+    win = hero_strength > best_opponent
+    tie = hero_strength == best_opponent
+    tied_opponents = (opponent_strengths == hero_strength[:, None]).sum(axis=1)
+    share = np.where(win, 1.0, np.where(tie, 1.0 / (tied_opponents + 1), 0.0))
+    return win, tie, share
+
+
+def monte_carlo_equity(hero_cards, board=None, dead_cards=None, num_opponents: int = 1,
+                       opponent_ranges: Optional[Sequence] = None, iterations: int = 20000,
+                       time_limit: Optional[float] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                       rng: Optional[np.random.Generator] = None) -> EquityResult:
+    """
+    蒙地卡羅勝率
+    hero_cards: 英雄手牌
+    board: 已發的公共牌（0-5 張）
+    dead_cards: 已知不在牌堆中的牌
+    num_opponents: 隨機手牌對手數（提供 opponent_ranges 時以其長度為準）
+    opponent_ranges: 每位對手的範圍列表，元素為 None 表示任意手牌
+    iterations: 模擬次數上限
+    time_limit: 時間上限（秒），至少會完成一批
+    """
+    totals = monte_carlo_totals(hero_cards, board, dead_cards, num_opponents, opponent_ranges,
+                                iterations, time_limit, batch_size, rng)
+    if totals[0] == 0:
+        raise ValueError("無法抽出不衝突的對手手牌")
+    return equity_from_totals(totals)
+
+
+def equity_from_totals(totals: Tuple[int, int, int, float, float]) -> EquityResult:
+    """由累計值 (次數, 獨贏數, 平分數, 勝率總和, 勝率平方總和) 計算結果，可先把多份累計值逐項相加"""
+    total, wins, ties, share_sum, share_sq_sum = totals
+    equity = share_sum / total
+    variance = max(share_sq_sum / total - equity * equity, 0.0)
+    return EquityResult(wins / total, ties / total, equity, float(np.sqrt(variance / total)), total)
+
+
+def monte_carlo_totals(hero_cards, board=None, dead_cards=None, num_opponents: int = 1,
+                       opponent_ranges: Optional[Sequence] = None, iterations: int = 20000,
+                       time_limit: Optional[float] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                       rng: Optional[np.random.Generator] = None) -> Tuple[int, int, int, float, float]:
+    """蒙地卡羅抽樣的累計值，參數同 monte_carlo_equity"""
+    hero = as_card_ids(hero_cards)
+    board_ids = as_card_ids(board)
+    dead = as_card_ids(dead_cards)
+    if len(hero) != 2:
+        raise ValueError("英雄手牌必須是2張")
+    if len(board_ids) > 5:
+        raise ValueError("公共牌最多5張")
+
+    known = hero + board_ids + dead
+    if len(set(known)) != len(known):
+        raise ValueError("手牌、公共牌與死牌中有重複的牌")
+    known_mask = 0
+    for card in known:
+        known_mask |= 1 << card
+
+    if opponent_ranges is None:
+        opponent_ranges = [None] * num_opponents
+    if not opponent_ranges:
+        raise ValueError("至少需要一位對手")
+    opponent_combos = [range_to_combos(r, known_mask) for r in opponent_ranges]
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    board_array = np.array(board_ids, dtype=np.int64)
+    hero_array = np.array(hero, dtype=np.int64)
+
+    total = 0
+    wins = 0
+    ties = 0
+    share_sum = 0.0
+    share_sq_sum = 0.0
+
+    while total < iterations:
+        size = min(batch_size, iterations - total)
+        batch = _sample_batch(size, hero_array, board_array, known, opponent_combos, rng)
+        if batch is not None:
+            win, tie, share = batch
+            total += len(share)
+            wins += int(win.sum())
+            ties += int(tie.sum())
+            share_sum += float(share.sum())
+            share_sq_sum += float(np.square(share).sum())
+
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+    return total, wins, ties, share_sum, share_sq_sum
+
+
+def _sample_batch(size: int, hero: np.ndarray, board: np.ndarray, known: List[int],
+                  opponent_combos: List[np.ndarray], rng: np.random.Generator):
+    """抽樣一批對手手牌與剩餘公共牌，返回結算結果（全部衝突時返回 None）"""
+    num_opponents = len(opponent_combos)
+
+    # 所有對手同時抽組合，彼此衝突的列整列重抽（與已知牌的衝突已事先排除）
+    opponent_cards = np.empty((size, num_opponents, 2), dtype=np.int64)
+    pending = np.arange(size)
+    for _ in range(MAX_RESAMPLE_ROUNDS):
+        picks = np.stack([combos[rng.integers(len(combos), size=len(pending))]
+                          for combos in opponent_combos], axis=1)
+        flat = np.sort(picks.reshape(len(pending), 2 * num_opponents), axis=1)
+        conflict = (flat[:, 1:] == flat[:, :-1]).any(axis=1)
+        opponent_cards[pending[~conflict]] = picks[~conflict]
+        pending = pending[conflict]
+        if len(pending) == 0:
+            break
+
+    if len(pending):
+        valid = np.ones(size, dtype=bool)
+        valid[pending] = False
+        opponent_cards = opponent_cards[valid]
+        size = len(opponent_cards)
+        if size == 0:
+            return None
+
+    used = np.zeros((size, NUM_CARDS), dtype=bool)
+    used[:, known] = True
+    used[np.arange(size)[:, None], opponent_cards.reshape(size, 2 * num_opponents)] = True
+
+    # 剩餘公共牌：已使用的牌排到最後，在其餘牌中隨機取
+    missing = 5 - len(board)
+    if missing:
+        keys = rng.random((size, NUM_CARDS))
+        keys[used] = 2.0
+        runouts = np.argpartition(keys, missing - 1, axis=1)[:, :missing]
+        full_board = np.concatenate([np.broadcast_to(board, (size, len(board))), runouts], axis=1)
+    else:
+        full_board = np.broadcast_to(board, (size, 5))
+
+    # 英雄與所有對手一起批次評估
+    hero_hands = np.concatenate([np.broadcast_to(hero, (size, 2)), full_board], axis=1)
+    opponent_hands = np.concatenate([
+        opponent_cards.reshape(size * num_opponents, 2),
+        np.repeat(full_board, num_opponents, axis=0)
+    ], axis=1)
+    strengths = HandEvaluator.evaluate_batch(np.concatenate([hero_hands, opponent_hands]))
+    hero_strength = strengths[:size]
+    opponent_strengths = strengths[size:].reshape(size, num_opponents)
+
+    return _settle_showdowns(hero_strength, opponent_strengths)
+
+
+def _enumerate_runouts(remaining: List[int], missing: int) -> np.ndarray:
+    """列舉剩餘公共牌的所有組合（字典序），形狀 (M, missing)"""
+    if missing == 0:
+        return np.zeros((1, 0), dtype=np.int64)
+
+    # 每次在每列之後接上所有比最後一張大的索引
+    n = len(remaining)
+    combos = np.arange(n - missing + 1, dtype=np.int64)[:, None]
+    for step in range(1, missing):
+        last = combos[:, -1]
+        counts = n - missing + step - last
+        starts = np.repeat(last + 1, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        combos = np.column_stack([np.repeat(combos, counts, axis=0), starts + offsets])
+    return np.array(remaining, dtype=np.int64)[combos]
+
+
+def _suit_permuted(cards, perm) -> Tuple[int, ...]:
+    """套用花色置換後排序"""
+    return tuple(sorted((card & ~3) | perm[card & 3] for card in cards))
+
+
+def _suit_symmetries(groups: List[List[int]]) -> List[Tuple[int, ...]]:
+    """找出讓每組已知牌（各玩家手牌、公共牌、死牌）保持不變的花色置換"""
+    symmetries = []
+    for perm in permutations(range(4)):
+        if all(_suit_permuted(group, perm) == tuple(sorted(group)) for group in groups):
+            symmetries.append(perm)
+    return symmetries
+
+
+def _collapse_isomorphic_runouts(runouts: np.ndarray, symmetries: List[Tuple[int, ...]]):
+    """
+    將花色同構的牌面合併
+    每個同構類只保留遮罩最小的牌面，權重為類別大小（置換數 / 穩定子大小）
+    返回：(代表牌面, 權重)
+    """
+    if len(symmetries) <= 1 or runouts.shape[1] == 0:
+        return runouts, np.ones(len(runouts), dtype=np.int64)
+
+    # 牌面遮罩；花色置換只需把各花色的位元平移到新花色的位置
+    identity = np.left_shift(1, runouts).sum(axis=1)
+    suit_masks = [sum(1 << (rank * 4 + suit) for rank in range(13)) for suit in range(4)]
+    canonical = identity.copy()
+    stabilizer = np.zeros(len(runouts), dtype=np.int64)
+    for perm in symmetries:
+        masks = np.zeros(len(runouts), dtype=np.int64)
+        for suit in range(4):
+            part = identity & suit_masks[suit]
+            shift = perm[suit] - suit
+            masks |= np.left_shift(part, shift) if shift >= 0 else np.right_shift(part, -shift)
+        np.minimum(canonical, masks, out=canonical)
+        stabilizer += masks == identity
+
+    representative = identity == canonical
+    return runouts[representative], len(symmetries) // stabilizer[representative]
+
+
+@lru_cache(maxsize=4096)
+def _exact_equity_cached(hero: Tuple[int, ...], opponents: Tuple[Tuple[int, ...], ...],
+                         board: Tuple[int, ...], dead: Tuple[int, ...]) -> EquityResult:
+    """精確計算（輸入已排序，結果永久快取）"""
+    known = set(hero).union(board, dead, *opponents)
+    remaining = [card for card in range(NUM_CARDS) if card not in known]
+    runouts = _enumerate_runouts(remaining, 5 - len(board))
+
+    symmetries = _suit_symmetries([list(hero), list(board), list(dead)] + [list(o) for o in opponents])
+    runouts, weights = _collapse_isomorphic_runouts(runouts, symmetries)
+
+    size = len(runouts)
+    full_board = np.concatenate([np.broadcast_to(np.array(board, dtype=np.int64), (size, len(board))),
+                                 runouts], axis=1)
+    hands = [np.concatenate([np.broadcast_to(np.array(cards, dtype=np.int64), (size, 2)), full_board], axis=1)
+             for cards in (hero,) + opponents]
+    strengths = HandEvaluator.evaluate_batch(np.concatenate(hands)).reshape(len(hands), size)
+
+    win, tie, share = _settle_showdowns(strengths[0], strengths[1:].T)
+    total = int(weights.sum())
+    return EquityResult(float((win * weights).sum()) / total, float((tie * weights).sum()) / total,
+                        float((share * weights).sum()) / total, 0.0, total)
+
+
+def exact_equity(hero_cards, opponent_hands: Sequence, board=None, dead_cards=None) -> EquityResult:
+    """
+    精確勝率：對手手牌已知，列舉所有剩餘公共牌
+    花色同構的牌面合併加權，結果快取後可作為蒙地卡羅的基準
+    """
+    hero = as_card_ids(hero_cards)
+    opponents = [as_card_ids(hand) for hand in opponent_hands]
+    board_ids = as_card_ids(board)
+    dead = as_card_ids(dead_cards)
+    if len(hero) != 2 or any(len(hand) != 2 for hand in opponents):
+        raise ValueError("每位玩家的手牌必須是2張")
+    if not opponents:
+        raise ValueError("至少需要一位對手")
+    if len(board_ids) > 5:
+        raise ValueError("公共牌最多5張")
+
+    known = hero + board_ids + dead + [card for hand in opponents for card in hand]
+    if len(set(known)) != len(known):
+        raise ValueError("手牌、公共牌與死牌中有重複的牌")
+
+    # 以所有花色置換中最小的形式作為快取鍵，讓同構的輸入共用結果
+    key = min(
+        (_suit_permuted(hero, perm), tuple(_suit_permuted(hand, perm) for hand in opponents),
+         _suit_permuted(board_ids, perm), _suit_permuted(dead, perm))
+        for perm in permutations(range(4))
+    )
+    return _exact_equity_cached(*key)
+
+
+def exact_equity_vs_range(hero_cards, hand_range=None, board=None, dead_cards=None) -> EquityResult:
+    """
+    單挑精確勝率：對手為範圍（None 表示任意手牌）
+    列舉所有 (對手組合, 剩餘公共牌)，適用於轉牌與河牌
+    """
+    hero = as_card_ids(hero_cards)
+    board_ids = as_card_ids(board)
+    dead = as_card_ids(dead_cards)
+    known = hero + board_ids + dead
+    if len(set(known)) != len(known):
+        raise ValueError("手牌、公共牌與死牌中有重複的牌")
+    known_mask = 0
+    for card in known:
+        known_mask |= 1 << card
+
+    combos = range_to_combos(hand_range, known_mask)
+    remaining = [card for card in range(NUM_CARDS) if not (known_mask >> card) & 1]
+    runouts = _enumerate_runouts(remaining, 5 - len(board_ids))
+
+    # 所有 (組合, 牌面) 配對，移除組合與牌面重疊者
+    combo_index = np.repeat(np.arange(len(combos)), len(runouts))
+    runout_index = np.tile(np.arange(len(runouts)), len(combos))
+    pair_combos = combos[combo_index]
+    pair_runouts = runouts[runout_index]
+    overlap = (pair_runouts[:, :, None] == pair_combos[:, None, :]).any(axis=(1, 2))
+    pair_combos = pair_combos[~overlap]
+    pair_runouts = pair_runouts[~overlap]
+
+    size = len(pair_combos)
+    full_board = np.concatenate([np.broadcast_to(np.array(board_ids, dtype=np.int64), (size, len(board_ids))),
+                                 pair_runouts], axis=1)
+    hero_hands = np.concatenate([np.broadcast_to(np.array(hero, dtype=np.int64), (size, 2)), full_board], axis=1)
+    opponent_hands = np.concatenate([pair_combos, full_board], axis=1)
+    strengths = HandEvaluator.evaluate_batch(np.concatenate([hero_hands, opponent_hands]))
+
+    win, tie, share = _settle_showdowns(strengths[:size], strengths[size:, None])
+    return EquityResult(float(win.mean()), float(tie.mean()), float(share.mean()), 0.0, size)
+
+
+def calculate_equity(hero_cards, board=None, dead_cards=None, num_opponents: int = 1,
+                     opponent_ranges: Optional[Sequence] = None, opponent_hands: Optional[Sequence] = None,
+                     iterations: int = 20000, time_limit: Optional[float] = None,
+                     rng: Optional[np.random.Generator] = None) -> EquityResult:
+    """
+    自動選擇計算方式
+    - 對手手牌已知：翻牌後或單挑時精確計算
+    - 單一對手範圍且已到轉牌或河牌：精確計算
+    - 其他情況：蒙地卡羅
+    """
+    board_ids = as_card_ids(board)
+    if opponent_hands is not None:
+        if len(board_ids) >= 3 or len(opponent_hands) == 1:
+            return exact_equity(hero_cards, opponent_hands, board_ids, dead_cards)
+        opponent_ranges = [[tuple(as_card_ids(hand))] for hand in opponent_hands]
+
+    if opponent_ranges is None:
+        opponent_ranges = [None] * num_opponents
+    if len(opponent_ranges) == 1 and len(board_ids) >= 4:
+        return exact_equity_vs_range(hero_cards, opponent_ranges[0], board_ids, dead_cards)
+
+    return monte_carlo_equity(hero_cards, board_ids, dead_cards, opponent_ranges=opponent_ranges,
+                              iterations=iterations, time_limit=time_limit, rng=rng)
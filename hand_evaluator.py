@@ -5,6 +5,10 @@
 from enum import Enum
 from typing import List, Tuple
 from collections import Counter
+from itertools import combinations
+
+import hand_rank_table
+from card_codec import CARD_RANK, CARD_SUIT, to_card_ids
 
 class HandRank(Enum):
     HIGH_CARD = 1
@@ -37,12 +41,64 @@ class HandEvaluator:
         if len(cards) < 5:
             return HandRank.HIGH_CARD, []
         
-        # 獲取所有7張牌的最佳5張組合
-        from itertools import combinations
+        return HandEvaluator.decode_strength(HandEvaluator.evaluate_strength(cards))
+    
+    @staticmethod
+    def evaluate_strength(cards: List) -> int:
+        """
+        評估5-7張牌的整數強度（查表）
+        數值越大牌力越強，可直接比較
+        """
+        return HandEvaluator.evaluate_ids(to_card_ids(cards))
+    
+    @staticmethod
+    def evaluate_ids(card_ids: List[int]) -> int:
+        """以整數編碼（0-51）評估牌力，供模擬等熱點直接呼叫"""
+        rank_lookup, flush_table = hand_rank_table.get_lookup()
+        rank_keys = hand_rank_table.CARD_RANK_KEYS
+        rank_bits = hand_rank_table.CARD_RANK_BITS
+        
+        key = 0
+        suit_masks = [0, 0, 0, 0]
+        for card in card_ids:
+            key += rank_keys[card]
+            suit_masks[card & 3] |= rank_bits[card]
+        
+        strength = rank_lookup.get(key)
+        if strength is None:
+            # 超過7張等查表外的情況，退回逐一組合比較
+            rank, values = HandEvaluator._evaluate_combinations(card_ids)
+            return hand_rank_table.encode_strength(rank.value, values)
+        
+        # 同花表中少於5張的遮罩為0，不影響結果
+        for mask in suit_masks:
+            if flush_table[mask] > strength:
+                strength = flush_table[mask]
+        
+        return strength
+    
+    @staticmethod
+    def evaluate_batch(cards):
+        """
+        向量化批次評估
+        cards: 形狀 (N, 5-7) 的 numpy 整數編碼陣列
+        返回：形狀 (N,) 的整數強度陣列，與 evaluate_strength 的結果相同
+        """
+        return hand_rank_table.evaluate_batch(cards)
+    
+    @staticmethod
+    def decode_strength(strength: int) -> Tuple[HandRank, List[int]]:
+        """將整數強度轉換為 (手牌類型, 比較值列表)"""
+        category, values = hand_rank_table.decode_strength(strength)
+        return HandRank(category), values
+    
+    @staticmethod
+    def _evaluate_combinations(cards: List) -> Tuple[HandRank, List[int]]:
+        """逐一比較所有5張組合（參考實作，查表不適用時使用）"""
         best_rank = HandRank.HIGH_CARD
         best_values = []
         
-        for five_cards in combinations(cards, 5):
+        for five_cards in combinations(to_card_ids(cards), 5):
             rank, values = HandEvaluator._evaluate_five_cards(list(five_cards))
             if rank.value > best_rank.value or (rank == best_rank and values > best_values):
                 best_rank = rank
@@ -54,19 +110,9 @@ class HandEvaluator:
     def _evaluate_five_cards(cards: List) -> Tuple[HandRank, List[int]]:
         """評估5張牌的組合"""
         # 提取牌面和花色
-        ranks = []
-        suits = []
-        
-        for card in cards:
-            if hasattr(card, 'rank'):
-                ranks.append(HandEvaluator.get_rank_value(card.rank))
-                suits.append(card.suit)
-            else:
-                # 處理字典格式
-                ranks.append(HandEvaluator.get_rank_value(card.get('rank', '')))
-                suits.append(card.get('suit', ''))
-        
-        ranks.sort(reverse=True)
+        card_ids = to_card_ids(cards)
+        ranks = sorted((CARD_RANK[c] for c in card_ids), reverse=True)
+        suits = [CARD_SUIT[c] for c in card_ids]
         
         # 檢查同花
         is_flush = len(set(suits)) == 1
@@ -206,37 +252,11 @@ class HandEvaluator:
         if len(active_players) == 1:
             return active_players
         
-        player_hands = []
+        player_strengths = []
         for player in active_players:
             all_cards = player.hole_cards + community_cards
-            hand_rank, values = HandEvaluator.evaluate_hand(all_cards)
-            player_hands.append((player, hand_rank, values))
-        
-        # 找出最佳手牌
-        best_rank = max(ph[1].value for ph in player_hands)
-        potential_winners = [(p, r, v) for p, r, v in player_hands if r.value == best_rank]
-        
-        if len(potential_winners) == 1:
-            return [potential_winners[0][0]]
-        
-        # 比較相同牌型的數值
-        winners = []
-        best_values = potential_winners[0][2]
-        
-        for player, rank, values in potential_winners:
-            comparison = 0
-            for v1, v2 in zip(values, best_values):
-                if v1 > v2:
-                    comparison = 1
-                    break
-                elif v1 < v2:
-                    comparison = -1
-                    break
-            
-            if comparison > 0:
-                winners = [player]
-                best_values = values
-            elif comparison == 0:
-                winners.append(player)
+            player_strengths.append((player, HandEvaluator.evaluate_strength(all_cards)))
         
-        return winners
\ No newline at end of file
+        # 整數強度可直接比較，相同強度即為平手
+        best_strength = max(strength for _, strength in player_strengths)
+        return [player for player, strength in player_strengths if strength == best_strength]
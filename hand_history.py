@@ -0,0 +1,328 @@
+"""
+手牌紀錄匯出
+每手牌結束後把牌局擷取成 HandRecord（只保存引用與少量數值，不在遊戲迴圈中格式化），
+交給背景執行緒轉成 PokerStars 風格文字或 NDJSON，寫入 data/hand_history 下的緩衝輸出檔
+- 檔案超過 max_bytes 時換新檔（檔名遞增編號，不刪除舊檔，適合長期封存）
+- UI 與無介面模擬共用同一個寫入器
+
+用法:
+    with HandHistoryWriter(fmt="json") as writer:
+        ...
+        writer.write(game)   # 手牌結算後呼叫
+"""
+
+import atexit
+import datetime
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import action_log
+from card_codec import RANKS
+from hand_rank_table import DATA_DIR
+
+HISTORY_DIR = os.path.join(DATA_DIR, "hand_history")
+
+FORMATS = ("text", "json")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+BUFFER_SIZE = 1 << 20
+BATCH_SIZE = 256       # 每批交給背景執行緒的手牌數，減少執行緒之間的切換
+QUEUE_SIZE = 64        # 佇列中的批次上限，滿時 write 會等待，避免記憶體無限增長
+
+TABLE_NAME = "GTO Trainer"
+
+# PokerStars 使用字母花色
+_CARD_TEXT = tuple(RANKS[c >> 2] + "shdc"[c & 3] for c in range(52))
+
+# 摘要區的座位標示（PokerStars 只標示按鈕與盲注）與棄牌的街
+_SUMMARY_POSITIONS = {"BTN": " (button)", "SB": " (small blind)", "BB": " (big blind)"}
+_FOLDED_ON = {action_log.FLOP: "folded on the Flop", action_log.TURN: "folded on the Turn",
+              action_log.RIVER: "folded on the River"}
+
+_writer: Optional["HandHistoryWriter"] = None
+_writer_serials = itertools.count()
+_writer_lock = threading.Lock()
+
+
+class HandRecord:
+    """
+    一手牌的紀錄
+    行動紀錄、手牌列表在每手牌開始時重新建立，擷取時直接保存引用
+    """
+    __slots__ = ('hand_id', 'timestamp', 'small_blind', 'big_blind', 'names', 'positions',
+                 'stacks', 'contributed', 'holes', 'board', 'log', 'payouts')
+
+    def __init__(self, game, hand_id: int):
+        self.hand_id = hand_id
+        self.timestamp = time.time()
+        self.small_blind = game.small_blind
+        self.big_blind = game.big_blind
+        self.names = [p.name for p in game.players]
+        self.positions = [p.position for p in game.players]
+        payouts = game.payouts or [0] * len(game.players)
+        # 開局籌碼 = 目前籌碼 - 贏得 + 投入
+        self.stacks = [p.stack - won + p.total_contributed for p, won in zip(game.players, payouts)]
+        self.contributed = [p.total_contributed for p in game.players]
+        self.holes = [[c.id for c in p.hole_cards] for p in game.players]
+        self.board = [c.id for c in game.community_cards]
+        self.log = game.action_history
+        self.payouts = list(payouts)
+
+
+def _cards(cards: List[int]) -> str:
+    return "[" + " ".join(_CARD_TEXT[c] for c in cards) + "]"
+
+
+def _uncalled_bet(contributed: List[int]) -> Tuple[int, int]:
+    """沒有人跟到的下注：(投入最多的座位, 超出第二多投入的籌碼)"""
+    order = sorted(range(len(contributed)), key=contributed.__getitem__, reverse=True)
+    second = contributed[order[1]] if len(order) > 1 else 0
+    return order[0], contributed[order[0]] - second
+
+
+def format_text(record: HandRecord) -> str:
+    """
+    PokerStars 格式的文字紀錄
+    沒有人跟到的下注在最後一個行動之後退回，不計入底池與贏得的金額（與 PokerStars 相同）
+    """
+    names = record.names
+    stamp = datetime.datetime.fromtimestamp(record.timestamp).strftime("%Y/%m/%d %H:%M:%S")
+    button = record.positions.index("BTN") + 1 if "BTN" in record.positions else 1
+    lines = [
+        f"PokerStars Hand #{record.hand_id}: Hold'em No Limit (${record.small_blind}/${record.big_blind}) - {stamp}",
+        f"Table '{TABLE_NAME}' {len(names)}-max Seat #{button} is the button",
+    ]
+    for seat, name in enumerate(names):
+        lines.append(f"Seat {seat + 1}: {name} (${record.stacks[seat]} in chips)")
+
+    remaining = list(record.stacks)
+    street_bets = [0] * len(names)
+    current_bet = 0
+    showdown = False
+    folded = {}  # 座位 -> 棄牌的街
+    events = list(record.log.events())
+    last_action = max((i for i, event in enumerate(events) if event[1] <= action_log.RAISE), default=-1)
+    uncalled_seat, uncalled = _uncalled_bet(record.contributed)
+    uncalled_line = f"Uncalled bet (${uncalled}) returned to {names[uncalled_seat]}" if uncalled > 0 else None
+    for index, (seat, code, amount, street) in enumerate(events):
+        if index == last_action + 1 and uncalled_line:
+            lines.append(uncalled_line)
+        if code == action_log.DEAL:
+            street_bets = [0] * len(names)
+            current_bet = 0
+            if street == action_log.SHOWDOWN:
+                showdown = True
+                lines.append("*** SHOW DOWN ***")
+                lines.extend(f"{names[s]}: shows {_cards(hole)}"
+                             for s, hole in enumerate(record.holes) if s not in folded)
+            else:
+                shown = 3 + street - action_log.FLOP
+                board = record.board[:shown]
+                if street == action_log.FLOP:
+                    lines.append(f"*** FLOP *** {_cards(board)}")
+                else:
+                    lines.append(f"*** {action_log.STREET_NAMES[street].upper()} *** "
+                                 f"{_cards(board[:-1])} {_cards(board[-1:])}")
+            continue
+
+        name = names[seat]
+        if code in (action_log.WIN, action_log.WIN_SHOWDOWN):
+            if seat == uncalled_seat:
+                amount -= uncalled
+            if amount > 0:
+                lines.append(f"{name} collected ${amount} from pot")
+            continue
+        if code == action_log.POST_SB:
+            line = f"{name}: posts small blind ${amount}"
+        elif code == action_log.POST_BB:
+            line = f"{name}: posts big blind ${amount}"
+        elif code == action_log.FOLD:
+            folded[seat] = street
+            lines.append(f"{name}: folds")
+            continue
+        elif code == action_log.CHECK:
+            lines.append(f"{name}: checks")
+            continue
+        elif code == action_log.CALL:
+            line = f"{name}: calls ${amount}"
+        elif code == action_log.BET:
+            line = f"{name}: bets ${amount}"
+        else:
+            line = f"{name}: raises ${amount - current_bet} to ${amount}"
+            amount -= street_bets[seat]
+
+        remaining[seat] -= amount
+        street_bets[seat] += amount
+        current_bet = max(current_bet, street_bets[seat])
+        if remaining[seat] == 0:
+            line += " and is all-in"
+        lines.append(line)
+        if code == action_log.POST_BB:
+            lines.append("*** HOLE CARDS ***")
+            lines.extend(f"Dealt to {names[s]} {_cards(hole)}" for s, hole in enumerate(record.holes))
+
+    if last_action == len(events) - 1 and uncalled_line:
+        lines.append(uncalled_line)
+
+    lines.append("*** SUMMARY ***")
+    lines.append(f"Total pot ${sum(record.payouts) - max(uncalled, 0)} | Rake $0")
+    if record.board:
+        lines.append(f"Board {_cards(record.board)}")
+    for seat, name in enumerate(names):
+        won = record.payouts[seat] - (uncalled if seat == uncalled_seat else 0)
+        if won > 0:
+            result = f"showed {_cards(record.holes[seat])} and won (${won})" if showdown else f"collected (${won})"
+        elif seat in folded:
+            street = folded[seat]
+            if street in _FOLDED_ON:
+                result = _FOLDED_ON[street]
+            elif remaining[seat] == record.stacks[seat]:
+                result = "folded before Flop (didn't bet)"
+            else:
+                result = "folded before Flop"
+        elif showdown:
+            result = f"showed {_cards(record.holes[seat])} and lost"
+        else:
+            result = "mucked"
+        lines.append(f"Seat {seat + 1}: {name}{_SUMMARY_POSITIONS.get(record.positions[seat], '')} {result}")
+    return "\n".join(lines) + "\n\n\n"
+
+
+def format_json(record: HandRecord) -> str:
+    """單行 JSON（NDJSON）"""
+    actions = [
+        {"seat": seat, "action": action_log.EVENT_NAMES[code], "amount": amount,
+         "street": action_log.STREET_NAMES[street]}
+        for seat, code, amount, street in record.log.events()
+        if code != action_log.DEAL
+    ]
+    data = {
+        "hand_id": record.hand_id,
+        "time": record.timestamp,
+        "blinds": [record.small_blind, record.big_blind],
+        "players": [
+            {"seat": seat, "name": name, "position": position, "stack": stack,
+             "cards": [_CARD_TEXT[c] for c in hole], "won": won}
+            for seat, (name, position, stack, hole, won)
+            in enumerate(zip(record.names, record.positions, record.stacks, record.holes, record.payouts))
+        ],
+        "board": [_CARD_TEXT[c] for c in record.board],
+        "actions": actions,
+    }
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class HandHistoryWriter:
+    """背景執行緒寫入的手牌紀錄檔"""
+
+    def __init__(self, directory: str = HISTORY_DIR, fmt: str = "text", prefix: str = "hands",
+                 max_bytes: int = DEFAULT_MAX_BYTES, batch_size: int = BATCH_SIZE):
+        if fmt not in FORMATS:
+            raise ValueError(f"不支援的格式: {fmt}（可用: {', '.join(FORMATS)}）")
+        self.directory = directory
+        self.fmt = fmt
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.hands_written = 0
+        self.files: List[str] = []
+        self.error: Optional[BaseException] = None
+
+        # 手牌編號依序為 毫秒時間戳、行程編號（7 位）、行程內的寫入器序號（3 位）、手牌序號（9 位），
+        # 同一毫秒建立的寫入器（例如平行模擬的工作行程）也不會重複
+        serial = next(_writer_serials) % 1000
+        self._session = f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{serial}"
+        self._next_id = ((int(time.time() * 1000) * 10 ** 7 + os.getpid() % 10 ** 7) * 1000 + serial) * 10 ** 9
+        self._queue: "queue.Queue[Optional[List[HandRecord]]]" = queue.Queue(QUEUE_SIZE)
+        self._pending: List[HandRecord] = []
+        self._lock = threading.Lock()  # UI 的多個工作階段可能同時寫入
+        self._file = None
+        self._size = 0
+        self._thread = threading.Thread(target=self._run, name="hand-history-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, game) -> int:
+        """擷取已結算的手牌交給背景執行緒，返回手牌編號"""
+        if self.error is not None:
+            raise self.error
+        with self._lock:
+            self._next_id += 1
+            hand_id = self._next_id
+            self._pending.append(HandRecord(game, hand_id))
+            if len(self._pending) >= self.batch_size:
+                self._submit()
+        return hand_id
+
+    def _submit(self):
+        if self._pending:
+            self._queue.put(self._pending)
+            self._pending = []
+
+    def flush(self):
+        """等待已擷取的手牌全部寫入檔案"""
+        with self._lock:
+            self._submit()
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            with self._lock:
+                self._submit()
+            self._queue.put(None)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _open_next(self):
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        extension = "txt" if self.fmt == "text" else "ndjson"
+        path = os.path.join(self.directory, f"{self.prefix}-{self._session}-{len(self.files) + 1:04d}.{extension}")
+        self._file = open(path, "w", encoding="utf-8", buffering=BUFFER_SIZE)
+        self._size = 0
+        self.files.append(path)
+
+    def _run(self):
+        formatter = format_text if self.fmt == "text" else format_json
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    if self._file is not None:
+                        self._file.close()
+                    return
+                if self.error is not None:
+                    continue
+                for record in batch:
+                    if self._file is None or self._size >= self.max_bytes:
+                        self._open_next()
+                    text = formatter(record)
+                    self._file.write(text)
+                    self._size += len(text.encode("utf-8"))
+                    self.hands_written += 1
+                self._file.flush()
+            except Exception as exc:  # 寫檔失敗時保留錯誤，下一次 write 或 close 時拋出
+                self.error = exc
+            finally:
+                self._queue.task_done()
+
+
+def get_history_writer(fmt: str = "text") -> HandHistoryWriter:
+    """行程內共用的寫入器（UI 使用），行程結束時寫完剩餘的手牌"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = HandHistoryWriter(fmt=fmt, batch_size=1)
+            atexit.register(_writer.close)
+        return _writer
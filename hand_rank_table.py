@@ -0,0 +1,317 @@
+"""
+手牌強度查表
+將任意5、6、7張牌映射為單一可比較的整數強度
+
+- 非同花牌型只取決於點數的組合，以 5 進位點數鍵（每張牌加 5**(點數-2)）查表
+- 同花牌型以該花色的13位元點數遮罩查表
+- 表格第一次使用時建立並寫入 data/ 目錄，之後直接從磁碟載入
+"""
+
+import os
+from array import array
+from collections import Counter
+from itertools import combinations_with_replacement
+from math import comb
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from card_codec import CARD_RANK, NUM_CARDS
+
+# 強度編碼：牌型(HandRank.value) 放在第20位元以上，其後每4位元一個比較值
+CATEGORY_SHIFT = 20
+VALUE_BITS = 4
+
+# 牌型代碼（與 HandRank 的 value 相同）
+HIGH_CARD = 1
+PAIR = 2
+TWO_PAIR = 3
+THREE_OF_KIND = 4
+STRAIGHT = 5
+FLUSH = 6
+FULL_HOUSE = 7
+FOUR_OF_KIND = 8
+STRAIGHT_FLUSH = 9
+ROYAL_FLUSH = 10
+
+# 每種牌型的比較值個數（與 HandEvaluator._evaluate_five_cards 的輸出一致）
+VALUE_COUNTS = {
+    HIGH_CARD: 5,
+    PAIR: 4,
+    TWO_PAIR: 3,
+    THREE_OF_KIND: 3,
+    STRAIGHT: 1,
+    FLUSH: 5,
+    FULL_HOUSE: 2,
+    FOUR_OF_KIND: 2,
+    STRAIGHT_FLUSH: 1,
+    ROYAL_FLUSH: 1
+}
+
+# 點數 2-14 對應的 5 進位鍵，同一點數最多4張，因此總和不會進位
+RANK_KEYS = {rank: 5 ** (rank - 2) for rank in range(2, 15)}
+
+# 以牌的整數編碼為索引：點數鍵與同花遮罩位元
+CARD_RANK_KEYS = tuple(RANK_KEYS[CARD_RANK[c]] for c in range(NUM_CARDS))
+CARD_RANK_BITS = tuple(1 << (CARD_RANK[c] - 2) for c in range(NUM_CARDS))
+
+FLUSH_TABLE_SIZE = 1 << 13
+
+DATA_DIR = os.environ.get(
+    "POKER_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+TABLE_PATH = os.path.join(DATA_DIR, "hand_rank_table.bin")
+TABLE_MAGIC = b"HRT1"
+
+_tables: Optional[Tuple[array, array, array]] = None
+_lookup: Optional[Tuple[Dict[int, int], array]] = None
+_numpy_tables: Optional[Tuple[Dict[int, np.ndarray], np.ndarray]] = None
+
+# 批次評估時每次處理的列數，限制暫存陣列的記憶體用量
+BATCH_CHUNK_SIZE = 1 << 20
+
+
+def encode_strength(category: int, values: List[int]) -> int:
+    """將 (牌型, 比較值列表) 編碼為整數強度"""
+    strength = category
+    for i in range(5):
+        strength = (strength << VALUE_BITS) | (values[i] if i < len(values) else 0)
+    return strength
+
+
+def decode_strength(strength: int) -> Tuple[int, List[int]]:
+    """將整數強度還原為 (牌型代碼, 比較值列表)"""
+    category = strength >> CATEGORY_SHIFT
+    count = VALUE_COUNTS.get(category, 0)
+    values = [(strength >> (CATEGORY_SHIFT - VALUE_BITS * (i + 1))) & 0xF for i in range(count)]
+    return category, values
+
+
+def _straight_high(rank_set) -> int:
+    """獲取順子的最高牌，沒有順子返回0"""
+    for high in range(14, 5, -1):
+        if all((high - i) in rank_set for i in range(5)):
+            return high
+    if {14, 2, 3, 4, 5}.issubset(rank_set):
+        return 5
+    return 0
+
+
+def _rank_strength(ranks: Tuple[int, ...]) -> int:
+    """計算不考慮同花時，一組點數（5-7張）的最佳牌力"""
+    counts = Counter(ranks)
+    distinct = sorted(counts, reverse=True)
+    quads = [r for r in distinct if counts[r] == 4]
+    trips = [r for r in distinct if counts[r] == 3]
+    pairs = [r for r in distinct if counts[r] == 2]
+
+    if quads:
+        kicker = max(r for r in distinct if r != quads[0])
+        return encode_strength(FOUR_OF_KIND, [quads[0], kicker])
+
+    if trips and (len(trips) >= 2 or pairs):
+        pair = max(trips[1:] + pairs)
+        return encode_strength(FULL_HOUSE, [trips[0], pair])
+
+    straight_high = _straight_high(set(distinct))
+    if straight_high:
+        return encode_strength(STRAIGHT, [straight_high])
+
+    if trips:
+        kickers = [r for r in distinct if r != trips[0]][:2]
+        return encode_strength(THREE_OF_KIND, [trips[0]] + kickers)
+
+    if len(pairs) >= 2:
+        kicker = max(r for r in distinct if r not in pairs[:2])
+        return encode_strength(TWO_PAIR, pairs[:2] + [kicker])
+
+    if pairs:
+        kickers = [r for r in distinct if r != pairs[0]][:3]
+        return encode_strength(PAIR, [pairs[0]] + kickers)
+
+    return encode_strength(HIGH_CARD, distinct[:5])
+
+
+def _flush_strength(mask: int) -> int:
+    """計算同花色點數遮罩（至少5張）的最佳牌力"""
+    ranks = [r for r in range(14, 1, -1) if mask & (1 << (r - 2))]
+    straight_high = _straight_high(set(ranks))
+    if straight_high == 14:
+        return encode_strength(ROYAL_FLUSH, [14])
+    if straight_high:
+        return encode_strength(STRAIGHT_FLUSH, [straight_high])
+    return encode_strength(FLUSH, ranks[:5])
+
+
+def build_tables() -> Tuple[array, array, array]:
+    """
+    建立查表
+    返回：(排序後的點數鍵, 對應強度, 同花表)
+    """
+    entries = []
+    for num_cards in (5, 6, 7):
+        for ranks in combinations_with_replacement(range(2, 15), num_cards):
+            if max(Counter(ranks).values()) > 4:
+                continue
+            key = sum(RANK_KEYS[r] for r in ranks)
+            entries.append((key, _rank_strength(ranks)))
+    entries.sort()
+
+    keys = array("I", (key for key, _ in entries))
+    strengths = array("I", (strength for _, strength in entries))
+
+    flush_table = array("I", bytes(4 * FLUSH_TABLE_SIZE))
+    for mask in range(FLUSH_TABLE_SIZE):
+        if bin(mask).count("1") >= 5:
+            flush_table[mask] = _flush_strength(mask)
+
+    return keys, strengths, flush_table
+
+
+def save_tables(tables: Tuple[array, array, array], path: str = TABLE_PATH):
+    """將查表寫入磁碟（先寫暫存檔再改名，避免多個行程同時寫入）"""
+    keys, strengths, flush_table = tables
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(TABLE_MAGIC)
+        f.write(array("I", [len(keys), len(flush_table)]).tobytes())
+        keys.tofile(f)
+        strengths.tofile(f)
+        flush_table.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def load_tables_from_file(path: str = TABLE_PATH) -> Optional[Tuple[array, array, array]]:
+    """從磁碟載入查表，檔案不存在或格式不符時返回 None"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if data[:4] != TABLE_MAGIC:
+        return None
+
+    header = array("I")
+    header.frombytes(data[4:12])
+    num_keys, flush_size = header
+    body = array("I")
+    body.frombytes(data[12:])
+    if len(body) != 2 * num_keys + flush_size:
+        return None
+
+    keys = body[:num_keys]
+    strengths = body[num_keys:2 * num_keys]
+    flush_table = body[2 * num_keys:]
+    return keys, strengths, flush_table
+
+
+def get_tables() -> Tuple[array, array, array]:
+    """獲取查表（延遲載入：先讀磁碟，沒有則建立並儲存）"""
+    global _tables
+    if _tables is None:
+        tables = load_tables_from_file()
+        if tables is None:
+            tables = build_tables()
+            try:
+                save_tables(tables)
+            except OSError:
+                # 唯讀環境下只保留在記憶體中
+                pass
+        _tables = tables
+    return _tables
+
+
+def get_lookup() -> Tuple[Dict[int, int], array]:
+    """獲取純 Python 查表：(點數鍵 -> 強度 字典, 同花表)"""
+    global _lookup
+    if _lookup is None:
+        keys, strengths, flush_table = get_tables()
+        _lookup = (dict(zip(keys, strengths)), flush_table)
+    return _lookup
+
+
+def _colex_binomials(num_cards: int) -> np.ndarray:
+    """組合數系統係數：第 i 張（由小到大）點數索引 r 的貢獻為 C(r + i, i + 1)"""
+    return np.array([[comb(r + i, i + 1) for r in range(13)] for i in range(num_cards)],
+                    dtype=np.int32)
+
+
+def get_numpy_tables() -> Tuple[Dict[int, np.ndarray], np.ndarray]:
+    """
+    獲取 NumPy 查表
+    返回：({張數: 以排序點數的組合索引為下標的強度表}, 同花表)
+    """
+    global _numpy_tables
+    if _numpy_tables is None:
+        keys, strengths, flush_table = get_tables()
+        keys_np = np.frombuffer(keys, dtype=np.uint32).astype(np.int64)
+        strengths_np = np.frombuffer(strengths, dtype=np.uint32).astype(np.int32)
+        rank_key_np = np.array([RANK_KEYS[r] for r in range(2, 15)], dtype=np.int64)
+
+        rank_tables = {}
+        for num_cards in (5, 6, 7):
+            # 列舉所有排序後的點數組合，將點數鍵表重新排列為組合索引順序
+            ranks = np.array(list(combinations_with_replacement(range(13), num_cards)),
+                             dtype=np.intp)
+            index = _colex_binomials(num_cards)[np.arange(num_cards), ranks].sum(axis=1)
+            key = rank_key_np[ranks].sum(axis=1)
+            pos = np.minimum(np.searchsorted(keys_np, key), len(keys_np) - 1)
+            table = np.zeros(comb(12 + num_cards, num_cards), dtype=np.int32)
+            table[index] = np.where(keys_np[pos] == key, strengths_np[pos], 0)
+            rank_tables[num_cards] = table
+
+        _numpy_tables = (rank_tables, np.frombuffer(flush_table, dtype=np.uint32).astype(np.int32))
+    return _numpy_tables
+
+
+_CARD_SUIT_COUNT_KEYS = np.array([1 << (4 * (c & 3)) for c in range(NUM_CARDS)], dtype=np.int32)
+_CARD_RANK_BITS_NP = np.array(CARD_RANK_BITS, dtype=np.int32)
+
+
+def evaluate_batch(cards: np.ndarray) -> np.ndarray:
+    """
+    批次評估
+    cards: 形狀 (N, 5-7) 的整數編碼陣列
+    返回：形狀 (N,) 的整數強度陣列
+    """
+    cards = np.asarray(cards)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError(f"需要形狀為 (N, 5-7) 的陣列，收到 {cards.shape}")
+
+    result = np.empty(cards.shape[0], dtype=np.int32)
+    for start in range(0, cards.shape[0], BATCH_CHUNK_SIZE):
+        chunk = cards[start:start + BATCH_CHUNK_SIZE].astype(np.intp)
+        result[start:start + len(chunk)] = _evaluate_chunk(chunk)
+    return result
+
+
+def _evaluate_chunk(cards: np.ndarray) -> np.ndarray:
+    """批次評估的單一區塊"""
+    rank_tables, flush_table = get_numpy_tables()
+    num_cards = cards.shape[1]
+
+    # 非同花：排序點數後以組合索引直接查表
+    ranks = np.sort(cards >> 2, axis=1)
+    binomials = _colex_binomials(num_cards)
+    index = binomials[0][ranks[:, 0]]
+    for i in range(1, num_cards):
+        index += binomials[i][ranks[:, i]]
+    strength = rank_tables[num_cards][index]
+    if not strength.all():
+        raise ValueError("含有無效的牌")
+
+    # 同花：每種花色張數佔4位元，只對有5張以上同花色的列計算遮罩
+    suit_counts = _CARD_SUIT_COUNT_KEYS[cards].sum(axis=1)
+    counts = np.stack([(suit_counts >> (4 * suit)) & 0xF for suit in range(4)], axis=1)
+    flush_rows = np.nonzero(counts.max(axis=1) >= 5)[0]
+    if len(flush_rows):
+        flush_cards = cards[flush_rows]
+        flush_suit = counts[flush_rows].argmax(axis=1)
+        bits = np.where((flush_cards & 3) == flush_suit[:, None], _CARD_RANK_BITS_NP[flush_cards], 0)
+        flush_strength = flush_table[bits.sum(axis=1)]
+        strength[flush_rows] = np.maximum(strength[flush_rows], flush_strength)
+
+    return strength
@@ -0,0 +1,255 @@
+"""
+無介面模擬
+在沒有 Streamlit、日誌與延遲的情況下讓策略物件打完整手牌，回報每秒手數與各策略盈虧
+
+執行: python headless_runner.py --hands 10000 --policies engine,analyzer [--workers 4] [--seed 0] [--history text|json]
+"""
+
+import abc
+import argparse
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from debug_logger import DebugLogger
+from hand_history import FORMATS, HISTORY_DIR, HandHistoryWriter
+from postflop_analyzer import PostflopAnalyzer
+from texas_holdem_complete import MAX_ACTIONS_PER_HAND, Action, Player, Street, TexasHoldemGame
+from texas_holdem_simple import GTOAnalyzer
+
+
+class Policy(abc.ABC):
+    """策略介面：給定牌局與行動玩家，返回 (動作, 金額)（未實作 act 的子類別無法建立）"""
+    name = "policy"
+
+    @abc.abstractmethod
+    def act(self, game: TexasHoldemGame, player_index: int) -> Tuple[Action, int]:
+        ...
+
+
+class EngineGTOPolicy(Policy):
+    """引擎內建的 get_gto_action，可指定自己的混合策略（比較不同範圍檔時使用）"""
+    name = "engine"
+
+    def __init__(self, strategy=None):
+        self.strategy = strategy  # MixedStrategy，None 表示使用牌局本身的策略
+
+    def act(self, game, player_index):
+        if self.strategy is None:
+            return game.get_gto_action(game.players[player_index])
+        saved, game.strategy = game.strategy, self.strategy
+        try:
+            return game.get_gto_action(game.players[player_index])
+        finally:
+            game.strategy = saved
+
+
+class AnalyzerPolicy(Policy):
+    """
+    UI 電腦玩家使用的 GTOAnalyzer（翻牌後交給 PostflopAnalyzer）
+    未指定分析器時建立不寫日誌、也不計算說明用勝率的分析器
+    """
+    name = "analyzer"
+
+    def __init__(self, analyzer: GTOAnalyzer = None):
+        self.analyzer = analyzer or GTOAnalyzer(logger=DebugLogger(enabled=False), postflop_equity=False)
+
+    def act(self, game, player_index):
+        player = game.players[player_index]
+        hand = game.get_hand_string(player.hole_cards)
+        action, amount, _ = self.analyzer.get_preflop_recommendation(
+            hand, player.position, game.current_bet, game.big_blind, game.street, game
+        )
+        return _parse_action(game, action, amount)
+
+
+class PostflopPolicy(Policy):
+    """翻牌前使用 get_gto_action，翻牌後直接使用 PostflopAnalyzer"""
+    name = "postflop"
+
+    def act(self, game, player_index):
+        player = game.players[player_index]
+        if game.street == Street.PREFLOP:
+            return game.get_gto_action(player)
+        action, amount, _ = PostflopAnalyzer.get_postflop_recommendation(
+            player.hole_cards, game.community_cards, player.position, game.current_bet,
+            game.pot, game.big_blind, num_opponents=len(game.get_active_players()) - 1,
+            with_equity=False
+        )
+        return _parse_action(game, action, amount)
+
+
+POLICIES = {cls.name: cls for cls in (EngineGTOPolicy, AnalyzerPolicy, PostflopPolicy)}
+
+
+def _parse_action(game: TexasHoldemGame, action: str, amount: float) -> Tuple[Action, int]:
+    """分析器返回的文字動作轉為 Action（與 UI 電腦玩家相同的對應方式）"""
+    if action in ("raise", "bet"):
+        return (Action.BET if game.current_bet == 0 else Action.RAISE), int(amount)
+    if action in ("fold", "check", "call"):
+        return Action(action), int(amount)
+    return (Action.CHECK if game.current_bet == 0 else Action.FOLD), 0
+
+
+def _legalize(game: TexasHoldemGame, player: Player, action: Action, amount: int) -> Tuple[Action, int]:
+    """把策略的動作修正為合法動作：金額限制在允許範圍內，不可用的動作改為過牌或棄牌"""
+    valid = {a: (low, high) for a, low, high in game.get_valid_actions(player)}
+    if action in (Action.BET, Action.RAISE) and action not in valid:
+        action = Action.CALL if Action.CALL in valid else Action.CHECK
+    if action == Action.CALL and Action.CALL not in valid:
+        action = Action.CHECK
+    if action == Action.CHECK and Action.CHECK not in valid:
+        action = Action.FOLD
+    if action in (Action.BET, Action.RAISE):
+        low, high = valid[action]
+        amount = min(max(amount, low), high)
+    return action, amount
+
+
+def policy_action(game: TexasHoldemGame, policy: Policy, player_index: int) -> Tuple[Action, int]:
+    """策略在目前牌局的合法動作"""
+    return _legalize(game, game.players[player_index], *policy.act(game, player_index))
+
+
+def play_hand(game: TexasHoldemGame, policies: Sequence[Policy]) -> int:
+    """以各座位的策略打完一手牌（牌局需已 start_new_hand，座位皆為電腦玩家），返回行動次數"""
+    actions = game.advance(lambda seat: policy_action(game, policies[seat], seat), MAX_ACTIONS_PER_HAND)
+    # 提早結束（只剩一人）時不需要補齊公共牌，直接結算
+    game.determine_winner()
+    return actions
+
+
+class SimulationStats:
+    """模擬結果"""
+    __slots__ = ('hands', 'actions', 'seconds', 'profit', 'seat_hands', 'big_blind')
+
+    def __init__(self, policy_names: Sequence[str], big_blind: int):
+        self.hands = 0
+        self.actions = 0
+        self.seconds = 0.0
+        self.profit: Dict[str, int] = {name: 0 for name in policy_names}
+        self.seat_hands: Dict[str, int] = {name: 0 for name in policy_names}
+        self.big_blind = big_blind
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.seconds if self.seconds > 0 else 0.0
+
+    def bb_per_100(self, name: str) -> float:
+        """每 100 手贏得的大盲數（以該策略實際坐過的座位手數平均）"""
+        return self.profit[name] / self.big_blind / max(self.seat_hands[name], 1) * 100
+
+    def merge(self, other: "SimulationStats") -> "SimulationStats":
+        self.hands += other.hands
+        self.actions += other.actions
+        self.seconds = max(self.seconds, other.seconds)
+        for name, value in other.profit.items():
+            self.profit[name] = self.profit.get(name, 0) + value
+            self.seat_hands[name] = self.seat_hands.get(name, 0) + other.seat_hands[name]
+        return self
+
+    def summary(self) -> str:
+        lines = [f"{self.hands} 手, {self.actions} 次行動, {self.seconds:.2f} 秒, "
+                 f"{self.hands_per_second:,.0f} 手/秒"]
+        for name in self.profit:
+            lines.append(f"  {name}: {self.profit[name]:+d} 籌碼, {self.bb_per_100(name):+.2f} bb/100")
+        return "\n".join(lines)
+
+
+class HeadlessRunner:
+    """
+    無介面模擬器
+    每手牌重設籌碼，策略依序輪換座位，讓每個策略坐過每個位置
+    指定 seed 時每手牌由 (seed, 手牌編號) 決定亂數，任何一手都能以 replay_hand 單獨重現
+    """
+
+    def __init__(self, policy_names: Sequence[str], num_players: int = 6, starting_stack: int = 5000,
+                 small_blind: int = 50, big_blind: int = 100, seed: Optional[int] = None,
+                 history=None):
+        self.policy_names = list(policy_names)
+        self.history = history  # HandHistoryWriter，None 表示不匯出手牌紀錄
+        self.policies = [POLICIES[name]() for name in self.policy_names]
+        self.game = TexasHoldemGame(num_players, starting_stack, small_blind, big_blind,
+                                    enable_logging=False, seed=seed)
+        self.game.initialize_players(human_seat=-1)
+        self.seed = seed
+
+    def _seats(self, hand_no: int) -> List[int]:
+        """第 hand_no 手牌每個座位使用的策略索引"""
+        return [(seat + hand_no) % len(self.policies) for seat in range(self.game.num_players)]
+
+    def replay_hand(self, hand_no: int) -> int:
+        """打第 hand_no 手牌（重設籌碼），返回行動次數；結果留在 self.game"""
+        game = self.game
+        for player in game.players:
+            player.stack = game.starting_stack
+        game.start_new_hand(None if self.seed is None else (self.seed << 32) | hand_no)
+        return play_hand(game, [self.policies[i] for i in self._seats(hand_no)])
+
+    def run(self, num_hands: int) -> SimulationStats:
+        game = self.game
+        stats = SimulationStats(self.policy_names, game.big_blind)
+        start = time.perf_counter()
+        for hand_no in range(num_hands):
+            stats.actions += self.replay_hand(hand_no)
+            if self.history is not None:
+                self.history.write(game)
+            seats = self._seats(hand_no)
+            for seat, player in enumerate(game.players):
+                name = self.policy_names[seats[seat]]
+                stats.profit[name] += player.stack - game.starting_stack
+                stats.seat_hands[name] += 1
+        stats.hands = num_hands
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+
+def _run_chunk(policy_names: List[str], num_hands: int, history_format: Optional[str] = None,
+               rng: np.random.Generator = None) -> SimulationStats:
+    """工作行程中的一段模擬（匯出時每段寫入自己的檔案）"""
+    seed = int(rng.integers(1 << 63)) if rng is not None else None
+    if history_format is None:
+        return HeadlessRunner(policy_names, seed=seed).run(num_hands)
+    with HandHistoryWriter(fmt=history_format, prefix="sim") as writer:
+        return HeadlessRunner(policy_names, seed=seed, history=writer).run(num_hands)
+
+
+def run_parallel(policy_names: Sequence[str], num_hands: int, executor,
+                 chunk_hands: int = 2000, history_format: Optional[str] = None) -> SimulationStats:
+    """以 ParallelExecutor 分段平行模擬，返回合併後的結果（秒數為實際經過時間）"""
+    start = time.perf_counter()
+    chunks = max(1, -(-num_hands // chunk_hands))
+    jobs = [(list(policy_names), num_hands // chunks + (1 if i < num_hands % chunks else 0), history_format)
+            for i in range(chunks)]
+    stats = executor.reduce(_run_chunk, jobs, SimulationStats.merge)
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="無介面模擬策略對戰")
+    parser.add_argument("--hands", type=int, default=10000, help="模擬手數")
+    parser.add_argument("--policies", default="engine,analyzer",
+                        help=f"以逗號分隔的策略名稱（可用: {', '.join(POLICIES)}）")
+    parser.add_argument("--workers", type=int, default=1, help="工作行程數（1 表示在本行程執行）")
+    parser.add_argument("--seed", type=int, default=None, help="亂數種子")
+    parser.add_argument("--history", choices=FORMATS, default=None,
+                        help=f"把每手牌匯出到 {HISTORY_DIR}（text: PokerStars 格式, json: NDJSON）")
+    args = parser.parse_args()
+
+    policy_names = [name.strip() for name in args.policies.split(",") if name.strip()]
+    if args.workers > 1:
+        from parallel_executor import ParallelExecutor
+        with ParallelExecutor(max_workers=args.workers, seed=args.seed) as executor:
+            stats = run_parallel(policy_names, args.hands, executor, history_format=args.history)
+    elif args.history is not None:
+        with HandHistoryWriter(fmt=args.history, prefix="sim") as writer:
+            stats = HeadlessRunner(policy_names, seed=args.seed, history=writer).run(args.hands)
+    else:
+        stats = HeadlessRunner(policy_names, seed=args.seed).run(args.hands)
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""
+手牌紀錄匯入與批次決策評分
+串流處理大型手牌紀錄檔（本專案匯出的 PokerStars 文字 / NDJSON，以及第三方的 PokerStars 格式）：
+- 主行程只依位元組位置把檔案切成以手牌開頭為界的區塊，不讀取整個檔案
+- 各工作行程自行讀取、解析區塊，並以訓練器相同的邏輯評分每個英雄決策
+  翻牌前：GTOAnalyzer.judge_decision，翻牌後：PostflopAnalyzer.get_postflop_recommendation
+- 輸出彙總報告（JSON）與逐筆決策結果（NDJSON）
+
+執行: python history_importer.py data/hand_history/*.txt [--hero You] [--workers 4] [-o data/analysis]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import time
+from collections import Counter, deque
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from card_codec import hand_class_of, parse_cards
+from debug_logger import DebugLogger
+from hand_rank_table import DATA_DIR
+from postflop_analyzer import PostflopAnalyzer
+from texas_holdem_simple import GTOAnalyzer
+
+ANALYSIS_DIR = os.path.join(DATA_DIR, "analysis")
+
+# 每個工作區塊的大小；區塊邊界會對齊到下一手牌的開頭
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+
+# 解析時把金額換算成籌碼，大盲固定為 100（與訓練器相同），分析器的金額判斷不受級別影響
+BIG_BLIND_CHIPS = 100
+
+STREETS = ["preflop", "flop", "turn", "river"]
+
+# 手牌開頭：PokerStars Hand #、PokerStars Zoom Hand #、PokerStars Home Game Hand #、舊版的 PokerStars Game #
+_HEADER_RE = re.compile(r"PokerStars (?:Zoom |Home Game )?(?:Hand|Game) #(\d+)")
+_HEADER_BYTES_RE = re.compile(_HEADER_RE.pattern.encode())
+_BLINDS_RE = re.compile(r"\(\$?([\d.]+)/\$?([\d.]+)")
+_BUTTON_RE = re.compile(r"Seat #(\d+) is the button")
+_SEAT_RE = re.compile(r"^Seat (\d+): (.+?) \(\$?([\d.]+) in chips")
+_POST_RE = re.compile(r"^(.+?): posts (small|big) blind \$?([\d.]+)")
+_DEALT_RE = re.compile(r"^Dealt to (.+?) \[([^\]]+)\]")
+_ACTION_RE = re.compile(r"^(.+?): (folds|checks|calls|bets|raises)(?: \$?([\d.]+))?(?: to \$?([\d.]+))?")
+_STREET_RE = re.compile(r"^\*\*\* (FLOP|TURN|RIVER) \*\*\*")
+_CARDS_RE = re.compile(r"\[([^\]]+)\]")
+
+_ACTION_NAMES = {"folds": "fold", "checks": "check", "calls": "call", "bets": "bet", "raises": "raise"}
+
+_analyzer: Optional[GTOAnalyzer] = None
+
+
+def _chips(value, scale: float) -> int:
+    """以 scale（每單位金額的籌碼數）換算成整數籌碼"""
+    return int(round(float(value) * scale))
+
+
+def positions_from_button(seats: Sequence[int], button: int) -> Dict[int, str]:
+    """
+    依按鈕位置推算每個座位的位置名稱
+    按鈕之後依序為 SB、BB，其餘座位由按鈕往前為 CO、MP、UTG（超過 6 人時多出的座位視為 UTG）
+    """
+    seats = sorted(seats)
+    if button not in seats:
+        button = max([s for s in seats if s < button] or seats)
+    start = seats.index(button)
+    order = seats[start + 1:] + seats[:start + 1]  # SB, BB, ..., BTN
+    if len(order) == 2:
+        return {order[1]: "SB", order[0]: "BB"}
+    middle = order[2:-1]
+    names = (["UTG"] * max(len(middle) - 3, 0) + ["UTG", "MP", "CO"])[-len(middle):] if middle else []
+    positions = {order[0]: "SB", order[1]: "BB", order[-1]: "BTN"}
+    positions.update(zip(middle, names))
+    return positions
+
+
+class ParsedHand:
+    """解析後的一手牌（只保留評分需要的資訊，金額皆已換算成籌碼）"""
+    __slots__ = ('hand_id', 'big_blind', 'scale', 'positions', 'holes', 'board', 'actions')
+
+    def __init__(self, hand_id: str, big_blind):
+        self.hand_id = hand_id
+        self.big_blind = BIG_BLIND_CHIPS
+        self.scale = BIG_BLIND_CHIPS / float(big_blind)  # 原始金額 * scale = 籌碼
+        self.positions: Dict[str, str] = {}          # 玩家 -> 位置
+        self.holes: Dict[str, List[int]] = {}        # 玩家 -> 手牌（只有已知的玩家）
+        self.board: List[int] = []
+        # (玩家, 動作, 籌碼, 街索引)；加注為加注到的總額，其他為投入的籌碼
+        self.actions: List[Tuple[str, str, int, int]] = []
+
+
+def parse_text_hand(text: str) -> Optional[ParsedHand]:
+    """解析 PokerStars 格式的一手牌，無法辨識時返回 None"""
+    lines = text.strip().splitlines()
+    if not lines:
+        return None
+    header = _HEADER_RE.match(lines[0])
+    blinds = _BLINDS_RE.search(lines[0])
+    if header is None or blinds is None:
+        return None
+    if float(blinds.group(2)) <= 0:
+        return None
+    hand = ParsedHand(header.group(1), blinds.group(2))
+
+    seats: Dict[int, str] = {}
+    button = 1
+    street = 0
+    for line in lines[1:]:
+        # 依行首分派，每行只比對一到兩個正規表示式
+        if line.startswith("***"):
+            if line.startswith("*** SUMMARY") or line.startswith("*** SHOW"):
+                break
+            match = _STREET_RE.match(line)
+            if match:
+                street = STREETS.index(match.group(1).lower())
+                hand.board = [c for group in _CARDS_RE.findall(line) for c in parse_cards(group)]
+        elif line.startswith("Seat "):
+            match = _SEAT_RE.match(line)
+            if match:
+                seats[int(match.group(1))] = match.group(2)
+        elif line.startswith("Dealt to "):
+            match = _DEALT_RE.match(line)
+            if match:
+                hand.holes[match.group(1)] = parse_cards(match.group(2))
+        elif line.startswith("Table "):
+            match = _BUTTON_RE.search(line)
+            if match:
+                button = int(match.group(1))
+        else:
+            match = _ACTION_RE.match(line)
+            if match:
+                name, verb, first, second = match.groups()
+                hand.actions.append((name, _ACTION_NAMES[verb],
+                                     _chips(second or first or 0, hand.scale), street))
+                continue
+            match = _POST_RE.match(line)
+            if match:
+                name, blind, amount = match.groups()
+                hand.actions.append((name, f"post_{'sb' if blind == 'small' else 'bb'}",
+                                     _chips(amount, hand.scale), 0))
+
+    positions = positions_from_button(list(seats), button) if seats else {}
+    hand.positions = {name: positions[seat] for seat, name in seats.items()}
+    return hand
+
+
+def parse_json_hand(line: str) -> Optional[ParsedHand]:
+    """解析本專案匯出的 NDJSON 單行"""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    hand = ParsedHand(str(data["hand_id"]), data["blinds"][1])
+    names = {}
+    for player in data["players"]:
+        names[player["seat"]] = player["name"]
+        hand.positions[player["name"]] = player["position"]
+        if player.get("cards"):
+            hand.holes[player["name"]] = parse_cards("".join(player["cards"]))
+    hand.board = parse_cards("".join(data.get("board", [])))
+    for action in data["actions"]:
+        street = action["street"]
+        if action["action"].startswith("win") or street not in STREETS:
+            continue
+        hand.actions.append((names[action["seat"]], action["action"], _chips(action["amount"], hand.scale),
+                             STREETS.index(street)))
+    return hand
+
+
+def iter_hands(text: str, fmt: str, report: Optional["ImportReport"] = None) -> Iterator[ParsedHand]:
+    """把一段文字切成手牌並逐一解析；無法解析的區塊（非空白）計入 report.skipped"""
+    if fmt == "json":
+        blocks = (line for line in text.splitlines() if line.strip())
+        parse = parse_json_hand
+    else:
+        blocks = _text_blocks(text)
+        parse = parse_text_hand
+    for block in blocks:
+        hand = parse(block)
+        if hand is not None:
+            yield hand
+        elif report is not None:
+            report.skipped += 1
+
+
+def _text_blocks(text: str) -> Iterator[str]:
+    """以手牌開頭切成區塊（第一個開頭之前若有非空白文字，自成一個區塊）"""
+    block: List[str] = []
+    for line in text.splitlines():
+        if _HEADER_RE.match(line) and block:
+            if any(part.strip() for part in block):
+                yield "\n".join(block)
+            block = []
+        block.append(line)
+    if any(part.strip() for part in block):
+        yield "\n".join(block)
+
+
+def _get_analyzer() -> GTOAnalyzer:
+    """行程內共用的分析器（不寫日誌、不計算說明用的勝率）"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = GTOAnalyzer(logger=DebugLogger(enabled=False), postflop_equity=False)
+    return _analyzer
+
+
+def grade_hand(hand: ParsedHand, heroes: Optional[Sequence[str]] = None) -> List[dict]:
+    """
+    重播一手牌並評分英雄的每個決策（金額以籌碼計，大盲 = BIG_BLIND_CHIPS）
+    heroes 為 None 時評分所有已知手牌的玩家
+    """
+    analyzer = _get_analyzer()
+    folded = set()
+    street_bets: Dict[str, int] = {}
+    current_bet = 0
+    pot = 0
+    street = 0
+    decisions = []
+
+    for name, action, amount, action_street in hand.actions:
+        if action_street != street:
+            street = action_street
+            street_bets = {}
+            current_bet = 0
+
+        hole = hand.holes.get(name)
+        if hole and len(hole) == 2 and not action.startswith("post") and (heroes is None or name in heroes):
+            position = hand.positions.get(name, "")
+            hand_class = hand_class_of(hole[0], hole[1])
+            if street == 0:
+                # 只判斷對錯，不產生詳細分析文字
+                record = analyzer.judge_decision(hand_class, position, action, amount, current_bet, hand.big_blind)
+                recommended, recommended_amount, _ = record.best
+                correct, verdict = record.is_correct, record.suggestion
+            else:
+                board = hand.board[:2 + street]
+                opponents = len(hand.positions) - len(folded) - 1
+                recommended, recommended_amount, explanation = PostflopAnalyzer.get_postflop_recommendation(
+                    hole, board, position, current_bet, pot, hand.big_blind,
+                    num_opponents=max(opponents, 1), with_equity=False)
+                correct = _same_action(action, recommended)
+                verdict = f"[{'正確' if correct else '錯誤'}] {explanation}"
+            decisions.append({
+                "hand_id": hand.hand_id, "player": name, "position": position, "street": STREETS[street],
+                "hand": hand_class, "action": action, "amount": amount,
+                "recommended": recommended, "recommended_amount": recommended_amount,
+                "correct": bool(correct), "verdict": verdict,
+            })
+
+        if action == "fold":
+            folded.add(name)
+        elif action == "raise":
+            pot += amount - street_bets.get(name, 0)
+            street_bets[name] = amount
+        elif action != "check":
+            pot += amount
+            street_bets[name] = street_bets.get(name, 0) + amount
+        current_bet = max(current_bet, street_bets.get(name, 0))
+    return decisions
+
+
+def _same_action(action: str, recommended: str) -> bool:
+    """翻牌後只比較動作類別：下注與加注視為相同"""
+    aggressive = ("bet", "raise")
+    return action == recommended or (action in aggressive and recommended in aggressive)
+
+
+class ImportReport:
+    """彙總結果（可合併）"""
+    __slots__ = ('hands', 'skipped', 'decisions', 'correct', 'by_street', 'by_position', 'by_player', 'mistakes')
+
+    def __init__(self):
+        self.hands = 0
+        self.skipped = 0  # 無法解析的區塊數
+        self.decisions = 0
+        self.correct = 0
+        self.by_street: Counter = Counter()      # (街, 是否正確) -> 次數
+        self.by_position: Counter = Counter()    # (位置, 是否正確) -> 次數
+        self.by_player: Counter = Counter()      # (玩家, 是否正確) -> 次數
+        self.mistakes: Counter = Counter()       # "位置 街 動作->建議" -> 次數
+
+    def add(self, decision: dict):
+        ok = decision["correct"]
+        self.decisions += 1
+        self.correct += ok
+        self.by_street[(decision["street"], ok)] += 1
+        self.by_position[(decision["position"], ok)] += 1
+        self.by_player[(decision["player"], ok)] += 1
+        if not ok:
+            self.mistakes[f"{decision['position']} {decision['street']} "
+                          f"{decision['action']}->{decision['recommended']}"] += 1
+
+    def merge(self, other: "ImportReport") -> "ImportReport":
+        self.hands += other.hands
+        self.skipped += other.skipped
+        self.decisions += other.decisions
+        self.correct += other.correct
+        self.by_street.update(other.by_street)
+        self.by_position.update(other.by_position)
+        self.by_player.update(other.by_player)
+        self.mistakes.update(other.mistakes)
+        return self
+
+    @staticmethod
+    def _accuracy(counter: Counter) -> Dict[str, dict]:
+        keys = sorted({key for key, _ in counter})
+        return {key: {"decisions": counter[(key, True)] + counter[(key, False)],
+                      "accuracy": counter[(key, True)] / max(counter[(key, True)] + counter[(key, False)], 1)}
+                for key in keys}
+
+    def to_dict(self, top_mistakes: int = 20) -> dict:
+        return {
+            "hands": self.hands,
+            "skipped": self.skipped,
+            "decisions": self.decisions,
+            "accuracy": self.correct / max(self.decisions, 1),
+            "by_street": self._accuracy(self.by_street),
+            "by_position": self._accuracy(self.by_position),
+            "by_player": self._accuracy(self.by_player),
+            "top_mistakes": self.mistakes.most_common(top_mistakes),
+        }
+
+    def summary(self) -> str:
+        lines = [f"{self.hands} 手, {self.decisions} 個決策, 正確率 {self.correct / max(self.decisions, 1):.1%}"]
+        if self.skipped:
+            lines.append(f"  警告: {self.skipped} 個區塊無法解析，已略過")
+        for street, stats in self._accuracy(self.by_street).items():
+            lines.append(f"  {street}: {stats['decisions']} 個決策, 正確率 {stats['accuracy']:.1%}")
+        for mistake, count in self.mistakes.most_common(5):
+            lines.append(f"  常見錯誤 {mistake}: {count} 次")
+        return "\n".join(lines)
+
+
+def detect_format(path: str) -> str:
+    """由第一個非空白字元判斷格式：{ 為 NDJSON，其餘視為 PokerStars 文字"""
+    with open(path, "rb") as f:
+        head = f.read(4096).lstrip(b"\xef\xbb\xbf \t\r\n")
+    return "json" if head.startswith(b"{") else "text"
+
+
+def chunk_ranges(path: str, fmt: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """把檔案切成 [起點, 終點) 位元組範圍，每個起點都是一手牌（或一行 JSON）的開頭"""
+    size = os.path.getsize(path)
+    starts = [0]
+    with open(path, "rb") as f:
+        position = chunk_bytes
+        while position < size:
+            f.seek(position)
+            f.readline()  # 跳過可能只讀到一半的行
+            while True:
+                line_start = f.tell()
+                line = f.readline()
+                if not line or fmt == "json" or _HEADER_BYTES_RE.match(line):
+                    break
+            if not line:
+                break
+            starts.append(line_start)
+            position = line_start + chunk_bytes
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def analyze_chunk(path: str, start: int, end: int, fmt: str,
+                  heroes: Optional[Sequence[str]] = None) -> Tuple[ImportReport, List[str]]:
+    """工作行程：讀取並評分一個區塊，返回 (彙總, 逐筆決策的 JSON 行)"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8", errors="replace").lstrip("\ufeff")
+    report = ImportReport()
+    lines = []
+    for hand in iter_hands(text, fmt, report):
+        report.hands += 1
+        for decision in grade_hand(hand, heroes):
+            report.add(decision)
+            lines.append(json.dumps(decision, ensure_ascii=False))
+    return report, lines
+
+
+def import_histories(paths: Sequence[str], output_dir: str = ANALYSIS_DIR,
+                     heroes: Optional[Sequence[str]] = None, executor=None,
+                     chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Tuple[ImportReport, str, str]:
+    """
+    匯入並評分多個檔案，返回 (彙總, 報告路徑, 逐筆決策路徑)
+    executor 為 ParallelExecutor 時分散到工作行程，進行中的區塊數有上限，記憶體用量與檔案大小無關
+    """
+    jobs = []
+    for path in paths:
+        fmt = detect_format(path)
+        jobs.extend((path, start, end, fmt, heroes) for start, end in chunk_ranges(path, fmt, chunk_bytes))
+
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = f"{datetime.datetime.now():%Y%m%d-%H%M%S}"
+    decisions_path = os.path.join(output_dir, f"decisions-{stamp}.ndjson")
+    report_path = os.path.join(output_dir, f"report-{stamp}.json")
+
+    report = ImportReport()
+    with open(decisions_path, "w", encoding="utf-8") as out:
+        def collect(result):
+            chunk_report, lines = result
+            report.merge(chunk_report)
+            if lines:
+                out.write("\n".join(lines) + "\n")
+
+        if executor is None:
+            for job in jobs:
+                collect(analyze_chunk(*job))
+        else:
+            # 依提交順序寫出結果，同時最多保留 2 倍工作行程數的區塊在處理中
+            pending = deque()
+            for job in jobs:
+                pending.append(executor.pool.submit(analyze_chunk, *job))
+                if len(pending) >= 2 * executor.max_workers:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+    return report, report_path, decisions_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="匯入手牌紀錄並以訓練器的邏輯評分每個決策")
+    parser.add_argument("paths", nargs="+", help="手牌紀錄檔（PokerStars 文字或 NDJSON）")
+    parser.add_argument("--hero", action="append", default=None,
+                        help="要評分的玩家名稱，可重複指定（預設為所有已知手牌的玩家）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="工作行程數（1 表示在本行程執行）")
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_BYTES / 1024 / 1024, help="每個區塊的大小（MB）")
+    parser.add_argument("-o", "--output", default=ANALYSIS_DIR, help="輸出目錄")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    chunk_bytes = max(int(args.chunk_mb * 1024 * 1024), 1)
+    if args.workers > 1:
+        from parallel_executor import ParallelExecutor
+        with ParallelExecutor(max_workers=args.workers) as executor:
+            report, report_path, decisions_path = import_histories(
+                args.paths, args.output, args.hero, executor, chunk_bytes)
+    else:
+        report, report_path, decisions_path = import_histories(args.paths, args.output, args.hero,
+                                                               chunk_bytes=chunk_bytes)
+    print(report.summary())
+    print(f"耗時 {time.perf_counter() - start:.2f} 秒")
+    print(f"報告: {report_path}")
+    print(f"逐筆決策: {decisions_path}")
+
+
+if __name__ == "__main__":
+    main()
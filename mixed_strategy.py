@@ -0,0 +1,247 @@
+"""
+混合頻率策略
+每個情境 (位置, 情境) 以 169 x 行動數 的陣列記錄每種起手牌的行動頻率與下注尺寸：
+- 頻率：float16
+- 尺寸：uint8，單位為參考金額的 1/10（開局以大盲為參考，面對加注以目前下注為參考）
+
+混合策略 JSON 格式（轉換器輸入，可與 gto_ranges_clean.json 一起轉換，後者提供純策略預設值）:
+{
+  "spots": {
+    "BTN/rfi": {
+      "actions": ["fold", "raise"],
+      "sizes": [0, 2.5],
+      "default": [1, 0],
+      "hands": {"AA": [0, 1], "A5s": [0.3, 0.7]},
+      "hand_sizes": {"AA": [0, 3.0]}
+    }
+  }
+}
+
+轉換: python mixed_strategy.py gto_ranges_clean.json [solver.json ...] [-o data/gto_strategy.npz]
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from card_codec import HAND_CLASS_INDEX, NUM_HAND_CLASSES
+from hand_rank_table import DATA_DIR
+from range_index import FACING_RAISE, RANGES_PATH, CompiledRanges, file_version, get_compiled_ranges
+
+STRATEGY_PATH = os.path.join(DATA_DIR, "gto_strategy.npz")
+
+# 尺寸以 uint8 儲存，1 單位 = 參考金額的 0.1 倍
+SIZE_SCALE = 10
+
+# 由純策略範圍轉換時使用的預設值
+RFI_RAISE_SIZE = 2.5          # 開局加注 2.5BB
+ISO_RAISE_SIZE = 3.0          # BB 面對 limp 加注到 3 倍
+THREE_BET_SIZE = 2.5          # 3bet 到目前下注的 2.5 倍
+DEFAULT_3BET_FREQUENCY = 0.3  # 加注範圍內的手牌面對加注時 3bet 的頻率
+
+_strategy: Optional[Tuple[Tuple[int, int], "MixedStrategy"]] = None  # ((策略檔版本, 範圍檔版本), 策略)
+
+
+class StrategySpot:
+    """單一情境的策略"""
+    __slots__ = ('actions', 'freqs', 'sizes', '_cumulative', '_pure')
+
+    def __init__(self, actions: List[str], freqs: np.ndarray, sizes: np.ndarray):
+        self.actions = list(actions)
+        self.freqs = np.asarray(freqs, dtype=np.float16)
+        self.sizes = np.asarray(sizes, dtype=np.uint8)
+
+        # 抽樣用的正規化累積頻率；全部為 0 的列視為第一個行動
+        freqs32 = self.freqs.astype(np.float32)
+        totals = freqs32.sum(axis=1, keepdims=True)
+        freqs32 = np.where(totals > 0, freqs32 / np.where(totals > 0, totals, 1), 0)
+        freqs32[totals[:, 0] == 0, 0] = 1.0
+        self._cumulative = np.cumsum(freqs32, axis=1)
+        # 純策略的列直接取最大頻率的行動，不需要亂數
+        self._pure = np.where(freqs32.max(axis=1) >= 1.0, freqs32.argmax(axis=1), -1)
+
+    def frequencies(self, hand: str) -> Dict[str, float]:
+        """手牌類別在此情境的行動頻率"""
+        row = self.freqs[HAND_CLASS_INDEX[hand]]
+        return {action: float(freq) for action, freq in zip(self.actions, row)}
+
+    def sample_one(self, hand_id: int, rand: Callable[[], float] = random.random) -> Tuple[str, float]:
+        """抽出單手牌的行動，返回 (行動, 尺寸倍數)；純策略時不消耗亂數"""
+        index = int(self._pure[hand_id])
+        if index < 0:
+            index = min(int(np.searchsorted(self._cumulative[hand_id], rand(), side='right')),
+                        len(self.actions) - 1)
+        return self.actions[index], self.sizes[hand_id, index] / SIZE_SCALE
+
+    def sample(self, hand_ids: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """向量化抽樣，返回 (行動索引陣列, 尺寸倍數陣列)"""
+        hand_ids = np.asarray(hand_ids, dtype=np.int64)
+        cumulative = self._cumulative[hand_ids]
+        draws = rng.random(len(hand_ids))
+        indices = np.minimum((draws[:, None] >= cumulative).sum(axis=1), len(self.actions) - 1)
+        return indices, self.sizes[hand_ids, indices] / SIZE_SCALE
+
+
+def _pure_spot(actions: List[str], masks: Dict[str, np.ndarray], sizes: Dict[str, float],
+               fallback: str) -> StrategySpot:
+    """由不重疊的純策略範圍建立情境，不在任何範圍內的手牌採用 fallback 行動"""
+    freqs = np.zeros((NUM_HAND_CLASSES, len(actions)), dtype=np.float32)
+    covered = np.zeros(NUM_HAND_CLASSES, dtype=bool)
+    for i, action in enumerate(actions):
+        mask = masks.get(action)
+        if mask is not None and action != fallback:
+            freqs[mask & ~covered, i] = 1.0
+            covered |= mask
+    freqs[~covered, actions.index(fallback)] = 1.0
+    size_row = np.array([sizes.get(action, 0) * SIZE_SCALE for action in actions])
+    return StrategySpot(actions, freqs, np.broadcast_to(size_row, freqs.shape))
+
+
+class MixedStrategy:
+    """所有情境的混合策略，鍵為 (位置, 情境)，如 ("BTN", "rfi")、("facing_raise", "BB_vs_raise")"""
+
+    def __init__(self, spots: Optional[Dict[Tuple[str, str], StrategySpot]] = None):
+        self.spots = spots or {}
+
+    def get(self, position: str, scenario: str) -> Optional[StrategySpot]:
+        return self.spots.get((position, scenario))
+
+    @classmethod
+    def from_ranges(cls, ranges: CompiledRanges) -> "MixedStrategy":
+        """
+        由純策略範圍建立預設策略
+        除了檔案中的情境，另外為每個位置加上：
+        - vs_raise：加注範圍內的手牌以 DEFAULT_3BET_FREQUENCY 3bet，其餘跟注；範圍外棄牌
+        - BB 的 vs_limp：加注範圍內加注，其餘過牌
+        """
+        spots = {}
+        for (position, scenario, _) in ranges.spots:
+            if (position, scenario) in spots:
+                continue
+            names = [action for (p, s, action) in ranges.spots if (p, s) == (position, scenario)]
+            masks = {action: ranges.get_mask(position, scenario, action) for action in names}
+            size = THREE_BET_SIZE if position == FACING_RAISE else RFI_RAISE_SIZE
+            spots[(position, scenario)] = _pure_spot(
+                names, masks, {"raise": size, "3bet": size}, "fold" if "fold" in names else names[-1]
+            )
+
+            if position != FACING_RAISE and scenario == "rfi":
+                raise_mask = masks.get("raise", np.zeros(NUM_HAND_CLASSES, dtype=bool))
+                # 行動順序讓 3bet 對應亂數 [0, DEFAULT_3BET_FREQUENCY)
+                freqs = np.zeros((NUM_HAND_CLASSES, 3), dtype=np.float32)
+                freqs[raise_mask, 1] = DEFAULT_3BET_FREQUENCY
+                freqs[raise_mask, 2] = 1.0 - DEFAULT_3BET_FREQUENCY
+                freqs[~raise_mask, 0] = 1.0
+                sizes = np.zeros(freqs.shape, dtype=np.uint8)
+                sizes[:, 1] = THREE_BET_SIZE * SIZE_SCALE
+                spots[(position, "vs_raise")] = StrategySpot(["fold", "raise", "call"], freqs, sizes)
+
+                if position == "BB":
+                    spots[(position, "vs_limp")] = _pure_spot(
+                        ["check", "raise"], {"raise": raise_mask}, {"raise": ISO_RAISE_SIZE}, "check"
+                    )
+        return cls(spots)
+
+    def update_from_json(self, data: dict):
+        """套用混合策略 JSON（格式見模組說明），同名情境會被覆蓋"""
+        for name, spec in data.get("spots", {}).items():
+            position, scenario = name.split("/", 1)
+            actions = spec["actions"]
+            default = spec.get("default", [1.0] + [0.0] * (len(actions) - 1))
+            freqs = np.tile(np.array(default, dtype=np.float32), (NUM_HAND_CLASSES, 1))
+            size_row = np.array(spec.get("sizes", [0] * len(actions)), dtype=np.float32) * SIZE_SCALE
+            sizes = np.tile(size_row, (NUM_HAND_CLASSES, 1))
+
+            for hand, row in spec.get("hands", {}).items():
+                freqs[HAND_CLASS_INDEX[hand]] = row
+            for hand, row in spec.get("hand_sizes", {}).items():
+                sizes[HAND_CLASS_INDEX[hand]] = np.array(row, dtype=np.float32) * SIZE_SCALE
+
+            if (freqs < 0).any() or (sizes > 255).any():
+                raise ValueError(f"情境 {name} 的頻率或尺寸超出範圍")
+            self.spots[(position, scenario)] = StrategySpot(actions, freqs, np.rint(sizes))
+
+    def save(self, path: str = STRATEGY_PATH):
+        """寫成單一 .npz：各情境的行動數不同，補齊到相同寬度後堆疊"""
+        keys = sorted(self.spots)
+        width = max(len(self.spots[key].actions) for key in keys)
+        freqs = np.zeros((len(keys), NUM_HAND_CLASSES, width), dtype=np.float16)
+        sizes = np.zeros((len(keys), NUM_HAND_CLASSES, width), dtype=np.uint8)
+        meta = []
+        for i, key in enumerate(keys):
+            spot = self.spots[key]
+            freqs[i, :, :len(spot.actions)] = spot.freqs
+            sizes[i, :, :len(spot.actions)] = spot.sizes
+            meta.append({"spot": "/".join(key), "actions": spot.actions})
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), freqs=freqs, sizes=sizes)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = STRATEGY_PATH) -> "MixedStrategy":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            freqs, sizes = data["freqs"], data["sizes"]
+        spots = {}
+        for i, entry in enumerate(meta):
+            position, scenario = entry["spot"].split("/", 1)
+            count = len(entry["actions"])
+            spots[(position, scenario)] = StrategySpot(entry["actions"], freqs[i, :, :count], sizes[i, :, :count])
+        return cls(spots)
+
+
+def merge(json_paths: Iterable[str]) -> MixedStrategy:
+    """把範圍檔與混合策略 JSON 依序合併，後面的檔案覆蓋前面的同名情境"""
+    strategy = MixedStrategy()
+    for path in json_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if "preflop" in data:
+            strategy.spots.update(MixedStrategy.from_ranges(CompiledRanges(data)).spots)
+        else:
+            strategy.update_from_json(data)
+    return strategy
+
+
+def convert(json_paths: Iterable[str], output: str = STRATEGY_PATH) -> MixedStrategy:
+    """把範圍檔與混合策略 JSON 依序合併後寫成二進位檔"""
+    strategy = merge(json_paths)
+    strategy.save(output)
+    return strategy
+
+
+def get_strategy() -> MixedStrategy:
+    """
+    行程內共用的策略：優先讀取轉換好的二進位檔，沒有時由範圍檔建立
+    策略檔或範圍檔修改後重新載入
+    """
+    global _strategy
+    version = (file_version(STRATEGY_PATH), file_version(RANGES_PATH))
+    if _strategy is None or _strategy[0] != version:
+        try:
+            strategy = MixedStrategy.load()
+        except (OSError, KeyError, ValueError):
+            strategy = MixedStrategy.from_ranges(get_compiled_ranges())
+        _strategy = (version, strategy)
+    return _strategy[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="將範圍檔與混合策略 JSON 轉為二進位策略檔")
+    parser.add_argument("inputs", nargs="+", help="依序套用的 JSON 檔")
+    parser.add_argument("-o", "--output", default=STRATEGY_PATH, help="輸出路徑")
+    args = parser.parse_args()
+
+    strategy = convert(args.inputs, args.output)
+    print(f"已寫入 {args.output}，共 {len(strategy.spots)} 個情境")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+多桌同步模擬
+以 NumPy 陣列（每個欄位一個陣列，列為牌桌）保存數千張 6 人桌的狀態，
+每一步讓所有未結束的牌桌同時由目前行動玩家行動一次。
+規則與 TexasHoldemGame 的 post_blinds / get_valid_actions / process_action /
+get_next_player_index / move_to_next_street 相同，座位即位置（0=UTG ... 5=BB）
+
+執行: python multi_table.py --tables 4096 --hands 200000 [--policy strategy|random] [--seed 0]
+"""
+
+import argparse
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from card_codec import COMBO_CLASS, NUM_CARDS, combo_index
+from hand_rank_table import evaluate_batch
+from mixed_strategy import get_strategy
+from positions import POSTFLOP_ORDER as POSTFLOP_POSITIONS, SEAT_POSITIONS
+from settlement import settle_batch
+
+POSITIONS = SEAT_POSITIONS
+NUM_SEATS = len(POSITIONS)
+SB_SEAT, BB_SEAT = POSITIONS.index('SB'), POSITIONS.index('BB')
+
+# 動作代碼，順序與 Action 列舉相同
+FOLD, CHECK, CALL, BET, RAISE = range(5)
+NUM_ACTIONS = 5
+
+PREFLOP, FLOP, TURN, RIVER, SHOWDOWN = range(5)
+
+# 翻牌後第一個行動的順序（座位索引）
+POSTFLOP_ORDER = np.array([POSITIONS.index(position) for position in POSTFLOP_POSITIONS])
+
+# 兩張牌 -> 起手牌類別編號
+_HAND_CLASS = np.full((NUM_CARDS, NUM_CARDS), -1, dtype=np.int64)
+for _a in range(NUM_CARDS):
+    for _b in range(NUM_CARDS):
+        if _a != _b:
+            _HAND_CLASS[_a, _b] = COMBO_CLASS[combo_index(_a, _b)]
+
+
+class MultiTableEngine:
+    """結構陣列形式的多桌引擎"""
+
+    def __init__(self, num_tables: int, starting_stack: int = 5000, small_blind: int = 50,
+                 big_blind: int = 100, rng: Optional[np.random.Generator] = None):
+        self.num_tables = num_tables
+        self.starting_stack = starting_stack
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        shape = (num_tables, NUM_SEATS)
+        self.stacks = np.full(shape, starting_stack, dtype=np.int64)
+        self.bets = np.zeros(shape, dtype=np.int64)          # 本條街已下注（Player.current_bet）
+        self.contributed = np.zeros(shape, dtype=np.int64)   # 本手牌總投入
+        self.folded = np.zeros(shape, dtype=bool)
+        self.all_in = np.zeros(shape, dtype=bool)
+        self.acted = np.zeros(shape, dtype=bool)
+        self.hole = np.zeros((num_tables, NUM_SEATS, 2), dtype=np.int64)
+        self.board = np.zeros((num_tables, 5), dtype=np.int64)
+
+        self.pot = np.zeros(num_tables, dtype=np.int64)
+        self.current_bet = np.zeros(num_tables, dtype=np.int64)
+        self.min_raise = np.full(num_tables, big_blind, dtype=np.int64)
+        self.street = np.zeros(num_tables, dtype=np.int64)
+        self.actor = np.zeros(num_tables, dtype=np.int64)
+        self.done = np.ones(num_tables, dtype=bool)
+
+    # ------------------------------------------------------------------
+    # 開始新手牌
+    # ------------------------------------------------------------------
+    def start_hands(self, tables: np.ndarray):
+        """在指定牌桌開始新的一手牌：重設籌碼、洗牌發牌、收盲注"""
+        n = len(tables)
+        if n == 0:
+            return
+        self.stacks[tables] = self.starting_stack
+        for array in (self.bets, self.contributed):
+            array[tables] = 0
+        for array in (self.folded, self.all_in, self.acted):
+            array[tables] = False
+
+        deck = np.argsort(self.rng.random((n, NUM_CARDS)), axis=1)
+        self.hole[tables] = deck[:, :2 * NUM_SEATS].reshape(n, NUM_SEATS, 2)
+        self.board[tables] = deck[:, 2 * NUM_SEATS:2 * NUM_SEATS + 5]
+
+        self.pot[tables] = 0
+        self.street[tables] = PREFLOP
+        self.min_raise[tables] = self.big_blind
+        self.done[tables] = False
+
+        self._pay(tables, np.full(n, SB_SEAT), np.full(n, self.small_blind))
+        self._pay(tables, np.full(n, BB_SEAT), np.full(n, self.big_blind))
+        self.current_bet[tables] = self.big_blind
+        self.actor[tables] = 0  # UTG 先行動
+
+    def _pay(self, tables: np.ndarray, seats: np.ndarray, amounts: np.ndarray) -> np.ndarray:
+        """Player.bet_amount：最多付出全部籌碼，付完即全下"""
+        paid = np.minimum(amounts, self.stacks[tables, seats])
+        self.stacks[tables, seats] -= paid
+        self.bets[tables, seats] += paid
+        self.contributed[tables, seats] += paid
+        self.pot[tables] += paid
+        self.all_in[tables, seats] |= self.stacks[tables, seats] == 0
+        return paid
+
+    # ------------------------------------------------------------------
+    # 合法動作
+    # ------------------------------------------------------------------
+    def legal_actions(self, tables: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        目前行動玩家的合法動作（get_valid_actions 的向量版）
+        返回 (動作遮罩 (n, 5), 跟注金額, 下注/加注最小值, 下注/加注最大值)
+        下注的金額為下注額，加注的金額為加注到的總額
+        """
+        seats = self.actor[tables]
+        stack = self.stacks[tables, seats]
+        bet = self.bets[tables, seats]
+        current = self.current_bet[tables]
+        to_call = current - bet
+
+        mask = np.zeros((len(tables), NUM_ACTIONS), dtype=bool)
+        mask[:, FOLD] = True
+        mask[:, CHECK] = to_call == 0
+        mask[:, CALL] = to_call != 0
+        call_amount = np.minimum(to_call, stack)
+
+        no_bet = current == 0
+        min_amount = np.where(no_bet, self.big_blind, current + self.min_raise[tables])
+        max_amount = np.where(no_bet, stack, stack + bet)
+        can_size = max_amount >= min_amount
+        mask[:, BET] = no_bet & can_size
+        mask[:, RAISE] = ~no_bet & can_size
+        return mask, call_amount, min_amount, max_amount
+
+    def legalize(self, tables: np.ndarray, actions: np.ndarray, amounts: np.ndarray):
+        """把策略的動作修正為合法動作（與 headless_runner._legalize 相同的規則）"""
+        mask, _, low, high = self.legal_actions(tables)
+        rows = np.arange(len(tables))
+        actions = actions.copy()
+
+        sizing = (actions == BET) | (actions == RAISE)
+        bad = sizing & ~mask[rows, actions]
+        actions[bad] = np.where(mask[bad, CALL], CALL, CHECK)
+        actions[(actions == CALL) & ~mask[:, CALL]] = CHECK
+        actions[(actions == CHECK) & ~mask[:, CHECK]] = FOLD
+        sizing = (actions == BET) | (actions == RAISE)
+        amounts = np.where(sizing, np.clip(amounts, low, high), 0)
+        return actions, amounts
+
+    # ------------------------------------------------------------------
+    # 執行動作
+    # ------------------------------------------------------------------
+    def apply(self, tables: np.ndarray, actions: np.ndarray, amounts: np.ndarray):
+        """所有指定牌桌的目前行動玩家同時執行一個（已合法化的）動作"""
+        seats = self.actor[tables]
+        self.acted[tables, seats] = True
+        self.folded[tables, seats] |= actions == FOLD
+
+        bet_before = self.bets[tables, seats]
+        current = self.current_bet[tables]
+        pay = np.zeros(len(tables), dtype=np.int64)
+        pay = np.where(actions == CALL, current - bet_before, pay)
+        pay = np.where(actions == BET, amounts, pay)
+        pay = np.where(actions == RAISE, amounts - bet_before, pay)
+        paid = self._pay(tables, seats, pay)
+
+        is_bet = actions == BET
+        is_raise = actions == RAISE
+        aggressive = is_bet | is_raise
+        self.current_bet[tables] = np.where(is_bet, bet_before + paid,
+                                            np.where(is_raise, amounts, current))
+        self.min_raise[tables] = np.where(
+            is_bet, paid,
+            np.where(is_raise, np.maximum(self.min_raise[tables], amounts - current), self.min_raise[tables])
+        )
+
+        # 下注或加注後，其他未棄牌的玩家需要重新行動
+        if aggressive.any():
+            agg_tables = tables[aggressive]
+            others = ~self.folded[agg_tables]
+            others[np.arange(len(agg_tables)), seats[aggressive]] = False
+            self.acted[agg_tables] &= ~others
+
+    def _needs_to_act(self, tables: np.ndarray) -> np.ndarray:
+        """每個座位是否還需要行動 (n, 6)"""
+        return (~self.folded[tables] & ~self.all_in[tables]
+                & (~self.acted[tables] | (self.bets[tables] < self.current_bet[tables, None])))
+
+    def _next_seat(self, tables: np.ndarray, start: np.ndarray, needs: np.ndarray) -> np.ndarray:
+        """從 start 的下一個座位開始循環尋找需要行動的玩家，start 本身最後檢查；找不到返回 -1"""
+        order = (start[:, None] + 1 + np.arange(NUM_SEATS)) % NUM_SEATS
+        candidates = needs[np.arange(len(tables))[:, None], order]
+        found = candidates.any(axis=1)
+        first = order[np.arange(len(tables)), candidates.argmax(axis=1)]
+        return np.where(found, first, -1)
+
+    def advance(self, tables: np.ndarray):
+        """行動後推進：找下一位玩家；下注輪結束則發下一條街，直到有人需要行動或牌局結束"""
+        pending = tables
+        start = self.actor[tables]
+        while len(pending):
+            live = (~self.folded[pending]).sum(axis=1)
+            over = (live <= 1) | (self.street[pending] == SHOWDOWN)
+            self.done[pending[over]] = True
+            pending, start = pending[~over], start[~over]
+            if not len(pending):
+                break
+
+            needs = self._needs_to_act(pending)
+            nxt = self._next_seat(pending, start, needs)
+            has_next = nxt >= 0
+            self.actor[pending[has_next]] = nxt[has_next]
+
+            # 下注輪結束：進入下一條街，從第一個未棄牌的翻牌後位置開始
+            pending = pending[~has_next]
+            if not len(pending):
+                break
+            self.bets[pending] = 0
+            self.acted[pending] = False
+            self.current_bet[pending] = 0
+            self.min_raise[pending] = self.big_blind
+            self.street[pending] += 1
+            showdown = self.street[pending] == SHOWDOWN
+            self.done[pending[showdown]] = True
+            pending = pending[~showdown]
+            if not len(pending):
+                break
+
+            alive = ~self.folded[pending][:, POSTFLOP_ORDER]
+            first = POSTFLOP_ORDER[alive.argmax(axis=1)]
+            self.actor[pending] = first
+            # 第一位若不需要行動（全下），以它為起點再找一次
+            needs = self._needs_to_act(pending)
+            ok = needs[np.arange(len(pending)), first]
+            pending, start = pending[~ok], first[~ok]
+
+    # ------------------------------------------------------------------
+    # 結算
+    # ------------------------------------------------------------------
+    def settle(self, tables: np.ndarray):
+        """結算已結束的牌桌（含邊池與平分，零頭從 SB 開始分配）"""
+        n = len(tables)
+        if n == 0:
+            return
+        cards = np.concatenate([
+            self.hole[tables],
+            np.broadcast_to(self.board[tables][:, None, :], (n, NUM_SEATS, 5))
+        ], axis=2).reshape(n * NUM_SEATS, 7)
+        strengths = evaluate_batch(cards).reshape(n, NUM_SEATS)
+        self.stacks[tables] += settle_batch(self.contributed[tables], self.folded[tables], strengths,
+                                            POSTFLOP_ORDER)
+        self.pot[tables] = 0
+
+    # ------------------------------------------------------------------
+    # 主迴圈
+    # ------------------------------------------------------------------
+    def run(self, num_hands: int, policy) -> Tuple[np.ndarray, int, float]:
+        """
+        模擬 num_hands 手牌，牌桌打完一手就立刻開新的一手
+        policy(engine, tables, mask, call_amount, min_amount, max_amount) -> (動作陣列, 金額陣列)
+        返回 (各座位總盈虧, 行動次數, 秒數)
+        """
+        start = time.perf_counter()
+        profit = np.zeros(NUM_SEATS, dtype=np.int64)
+        started = min(num_hands, self.num_tables)
+        self.done[:] = True
+        self.start_hands(np.arange(started))
+        active = np.zeros(self.num_tables, dtype=bool)
+        active[:started] = True
+        actions_taken = 0
+
+        while active.any():
+            tables = np.flatnonzero(active)
+            mask, call_amount, low, high = self.legal_actions(tables)
+            actions, amounts = policy(self, tables, mask, call_amount, low, high)
+            actions, amounts = self.legalize(tables, np.asarray(actions), np.asarray(amounts, dtype=np.int64))
+            self.apply(tables, actions, amounts)
+            actions_taken += len(tables)
+            self.advance(tables)
+
+            finished = tables[self.done[tables]]
+            if len(finished):
+                self.settle(finished)
+                profit += (self.stacks[finished] - self.starting_stack).sum(axis=0)
+                active[finished] = False
+                restart = finished[:max(0, num_hands - started)]
+                self.start_hands(restart)
+                active[restart] = True
+                started += len(restart)
+
+        return profit, actions_taken, time.perf_counter() - start
+
+
+def random_policy(engine: MultiTableEngine, tables, mask, call_amount, low, high):
+    """在合法動作中均勻隨機選擇，下注金額在允許範圍內均勻取值"""
+    rng = engine.rng
+    scores = np.where(mask, rng.random(mask.shape), -1.0)
+    actions = scores.argmax(axis=1)
+    amounts = low + (rng.random(len(tables)) * (high - low + 1)).astype(np.int64)
+    return actions, amounts
+
+
+def strategy_policy(engine: MultiTableEngine, tables, mask, call_amount, low, high):
+    """
+    get_gto_action 的向量版：翻牌前依混合頻率策略抽樣，
+    翻牌後沒人下注時 30% 下注半個底池、面對下注時 70% 跟注
+    """
+    rng = engine.rng
+    strategy = get_strategy()
+    n = len(tables)
+    seats = engine.actor[tables]
+    current = engine.current_bet[tables]
+    actions = np.full(n, FOLD, dtype=np.int64)
+    amounts = np.zeros(n, dtype=np.int64)
+
+    preflop = engine.street[tables] == PREFLOP
+    if preflop.any():
+        rows = np.flatnonzero(preflop)
+        hole = engine.hole[tables[rows], seats[rows]]
+        hand_ids = _HAND_CLASS[hole[:, 0], hole[:, 1]]
+        bb_limped = ((seats[rows] == BB_SEAT) & (current[rows] == engine.big_blind)
+                     & (engine.bets[tables[rows], seats[rows]] == engine.big_blind))
+        scenario = np.where(bb_limped, 0, np.where(current[rows] <= engine.big_blind, 1, 2))
+        names = ("vs_limp", "rfi", "vs_raise")
+        for seat in range(NUM_SEATS):
+            for code, name in enumerate(names):
+                pick = (seats[rows] == seat) & (scenario == code)
+                if not pick.any():
+                    continue
+                target = rows[pick]
+                spot = strategy.get(POSITIONS[seat], name)
+                if spot is None:
+                    actions[target] = CHECK if code == 0 else FOLD
+                    continue
+                chosen, sizes = spot.sample(hand_ids[pick], rng)
+                labels = np.array(spot.actions)[chosen]
+                raise_to = (current[target] * sizes).astype(np.int64)
+                # 與 get_gto_action 相同：只有面對加注時才會跟注
+                actions[target] = np.select(
+                    [labels == "raise", (labels == "call") & (code == 2), labels == "check"],
+                    [np.where(current[target] == 0, BET, RAISE), CALL, CHECK],
+                    CHECK if code == 0 else FOLD
+                )
+                amounts[target] = np.where(current[target] == 0,
+                                           (engine.big_blind * sizes).astype(np.int64), raise_to)
+
+    post = np.flatnonzero(~preflop)
+    if len(post):
+        draws = rng.random(len(post))
+        unopened = current[post] == 0
+        actions[post] = np.where(unopened, np.where(draws < 0.3, BET, CHECK),
+                                 np.where(draws < 0.7, CALL, FOLD))
+        amounts[post] = engine.pot[tables[post]] // 2
+    return actions, amounts
+
+
+POLICIES = {"random": random_policy, "strategy": strategy_policy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多桌同步模擬")
+    parser.add_argument("--tables", type=int, default=4096, help="同時進行的牌桌數")
+    parser.add_argument("--hands", type=int, default=200000, help="模擬手數")
+    parser.add_argument("--policy", default="strategy", choices=sorted(POLICIES), help="所有座位使用的策略")
+    parser.add_argument("--seed", type=int, default=None, help="亂數種子")
+    args = parser.parse_args()
+
+    engine = MultiTableEngine(args.tables, rng=np.random.default_rng(args.seed))
+    profit, actions, seconds = engine.run(args.hands, POLICIES[args.policy])
+    print(f"{args.hands} 手, {actions} 次行動, {seconds:.2f} 秒, {args.hands / seconds:,.0f} 手/秒")
+    for seat, position in enumerate(POSITIONS):
+        print(f"  {position}: {profit[seat] / engine.big_blind / args.hands * 100:+.2f} bb/100")
+
+
+if __name__ == "__main__":
+    main()
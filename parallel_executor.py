@@ -0,0 +1,118 @@
+"""
+多核心執行層
+把勝率與模擬工作切成區塊分給 ProcessPoolExecutor，同步返回彙總結果
+- 每個區塊由 SeedSequence 衍生獨立的亂數種子，結果與分配到哪個工作行程無關
+- 工作行程啟動時先載入牌力查表與勝率表，之後的工作不再重複載入
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+import hand_rank_table
+import preflop_equity
+from equity import EquityResult, equity_from_totals, monte_carlo_totals
+
+# 每個蒙地卡羅區塊的模擬次數
+DEFAULT_CHUNK_ITERATIONS = 20000
+
+
+def _warm_worker():
+    """工作行程初始化：預先載入查表"""
+    hand_rank_table.get_lookup()
+    hand_rank_table.get_numpy_tables()
+    preflop_equity.get_class_table()
+    preflop_equity.get_combo_table()
+
+
+def _run_seeded(func: Callable, seed: np.random.SeedSequence, args: tuple):
+    """在工作行程中以該區塊專屬的亂數產生器執行工作"""
+    return func(*args, rng=np.random.default_rng(seed))
+
+
+def _equity_chunk(hero_cards, board, dead_cards, opponent_ranges, iterations, rng=None):
+    """單一蒙地卡羅區塊，返回可相加的累計值"""
+    return monte_carlo_totals(hero_cards, board, dead_cards, opponent_ranges=opponent_ranges,
+                              iterations=iterations, rng=rng)
+
+
+def _add_totals(first, second):
+    return tuple(a + b for a, b in zip(first, second))
+
+
+class ParallelExecutor:
+    """以行程池分散計算的執行器（同步介面）"""
+
+    def __init__(self, max_workers: Optional[int] = None, seed: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """延遲建立行程池，工作行程會保留到 shutdown"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_warm_worker)
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def map(self, func: Callable, items: Iterable, chunksize: int = 1) -> List[Any]:
+        """平行執行 func(item)，依輸入順序返回結果"""
+        return list(self.pool.map(func, items, chunksize=chunksize))
+
+    def map_seeded(self, func: Callable, jobs: Sequence[tuple]) -> List[Any]:
+        """平行執行 func(*args, rng=...)，每個工作配一個獨立的亂數產生器"""
+        seeds = self.seed_sequence.spawn(len(jobs))
+        futures = [self.pool.submit(_run_seeded, func, seed, tuple(args))
+                   for seed, args in zip(seeds, jobs)]
+        return [future.result() for future in futures]
+
+    def reduce(self, func: Callable, jobs: Sequence[tuple], combine: Callable, initial=None,
+               seeded: bool = True):
+        """平行執行後依提交順序以 combine 合併結果（合併順序固定，結果可重現）"""
+        if seeded:
+            results = self.map_seeded(func, jobs)
+        else:
+            results = [future.result() for future in [self.pool.submit(func, *args) for args in jobs]]
+        total = initial
+        for result in results:
+            total = result if total is None else combine(total, result)
+        return total
+
+    def monte_carlo_equity(self, hero_cards, board=None, dead_cards=None, num_opponents: int = 1,
+                           opponent_ranges: Optional[Sequence] = None, iterations: int = 200000,
+                           chunk_iterations: int = DEFAULT_CHUNK_ITERATIONS) -> EquityResult:
+        """蒙地卡羅勝率，模擬次數平均分到各區塊後合併"""
+        if opponent_ranges is None:
+            opponent_ranges = [None] * num_opponents
+        chunks = max(1, -(-iterations // chunk_iterations))
+        jobs = [(hero_cards, board, dead_cards, opponent_ranges,
+                 iterations // chunks + (1 if i < iterations % chunks else 0))
+                for i in range(chunks)]
+        totals = self.reduce(_equity_chunk, jobs, _add_totals)
+        if totals[0] == 0:
+            raise ValueError("無法抽出不衝突的對手手牌")
+        return equity_from_totals(totals)
+
+
+_executor: Optional[ParallelExecutor] = None
+
+
+def get_executor() -> ParallelExecutor:
+    """行程內共用的執行器"""
+    global _executor
+    if _executor is None:
+        _executor = ParallelExecutor()
+    return _executor
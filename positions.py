@@ -0,0 +1,8 @@
+"""
+座位位置常數
+不依賴引擎與 Streamlit，牌局引擎與畫面範本共用
+"""
+
+# 座位的位置（依座位順序）與翻牌後的行動順序（也是平分底池時零頭的分配順序）
+SEAT_POSITIONS = ['UTG', 'MP', 'CO', 'BTN', 'SB', 'BB']
+POSTFLOP_ORDER = ['SB', 'BB', 'UTG', 'MP', 'CO', 'BTN']
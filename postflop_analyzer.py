@@ -4,29 +4,63 @@
 """
 
 from hand_evaluator import HandEvaluator, HandRank
+from card_codec import CARD_RANK, CARD_SUIT, to_card_ids
+from equity import calculate_equity
 from typing import List, Tuple
 
+# 建議中附帶的勝率計算預算（UI 每次重繪都會呼叫）
+EQUITY_TIME_LIMIT = 0.05
+EQUITY_MAX_ITERATIONS = 5000
+
 class PostflopAnalyzer:
     """翻牌後策略分析"""
     
     @staticmethod
     def get_postflop_recommendation(hole_cards: List, community_cards: List, 
                                    position: str, current_bet: float, pot: float, 
-                                   big_blind: float) -> Tuple[str, float, str]:
+                                   big_blind: float, num_opponents: int = 1,
+                                   with_equity: bool = True) -> Tuple[str, float, str]:
         """
         獲取翻牌後建議
+        with_equity: 是否在說明中附上勝率（只影響說明文字，模擬時可關閉以節省時間）
         返回: (action, amount, explanation)
         """
         if not community_cards:
             return "check", 0, "沒有公共牌"
         
+        # 轉為整數編碼，後續計算不再處理牌物件
+        hole_ids = to_card_ids(hole_cards)
+        board_ids = to_card_ids(community_cards)
+        
+        action, amount, explanation = PostflopAnalyzer._get_rank_based_action(
+            hole_ids, board_ids, current_bet, pot
+        )
+        
+        # 附上對隨機手牌的勝率
+        if with_equity:
+            equity = PostflopAnalyzer.get_equity(hole_ids, board_ids, num_opponents)
+            explanation += f"（對 {max(num_opponents, 1)} 位對手勝率約 {equity.equity:.0%}）"
+        
+        return action, amount, explanation
+    
+    @staticmethod
+    def get_equity(hole_cards: List, community_cards: List, num_opponents: int = 1):
+        """在 UI 時間預算內計算對隨機手牌的勝率（轉牌、河牌單挑時為精確值）"""
+        return calculate_equity(
+            hole_cards, community_cards, num_opponents=max(num_opponents, 1),
+            iterations=EQUITY_MAX_ITERATIONS, time_limit=EQUITY_TIME_LIMIT
+        )
+    
+    @staticmethod
+    def _get_rank_based_action(hole_ids: List[int], board_ids: List[int], 
+                               current_bet: float, pot: float) -> Tuple[str, float, str]:
+        """根據牌型決定行動"""
         # 評估手牌強度
-        all_cards = hole_cards + community_cards
-        hand_rank, values = HandEvaluator.evaluate_hand(all_cards)
+        hand_rank, values = HandEvaluator.decode_strength(HandEvaluator.evaluate_ids(hole_ids + board_ids))
         hand_name = HandEvaluator.get_hand_name(hand_rank)
         
         # 計算相對牌力
-        relative_strength = PostflopAnalyzer._calculate_relative_strength(hand_rank, community_cards)
+        relative_strength = PostflopAnalyzer._calculate_relative_strength(hand_rank, board_ids)
         
         # 是否有人下注
         facing_bet = current_bet > 0
@@ -90,7 +124,7 @@ class PostflopAnalyzer:
                     return "fold", 0, f"你只有{hand_name}，應該棄牌"
             else:
                 # 沒人下注，絕對不應該fold！
-                if PostflopAnalyzer._has_bluff_potential(hole_cards, community_cards):
+                if PostflopAnalyzer._has_bluff_potential(hole_ids, board_ids):
                     return "bet", pot * 0.33, f"你有{hand_name}但有詐唬機會，小額下注"
                 else:
                     return "check", 0, f"你只有{hand_name}，免費看牌"
@@ -116,13 +150,11 @@ class PostflopAnalyzer:
         
         # 根據公共牌調整
         # 如果公共牌很危險（如四張同花），降低非同花牌的強度
-        flush_cards = {}
-        for card in community_cards:
-            if hasattr(card, 'suit'):
-                suit = card.suit
-                flush_cards[suit] = flush_cards.get(suit, 0) + 1
+        flush_cards = [0, 0, 0, 0]
+        for card in to_card_ids(community_cards):
+            flush_cards[CARD_SUIT[card]] += 1
         
-        max_flush = max(flush_cards.values()) if flush_cards else 0
+        max_flush = max(flush_cards)
         if max_flush >= 4 and hand_rank != HandRank.FLUSH:
             strength *= 0.5
         
@@ -132,21 +164,19 @@ class PostflopAnalyzer:
     def _has_bluff_potential(hole_cards: List, community_cards: List) -> bool:
         """檢查是否有詐唬潛力"""
         # 檢查是否有抽牌可能（順子抽牌、同花抽牌等）
-        all_cards = hole_cards + community_cards
+        all_cards = to_card_ids(hole_cards) + to_card_ids(community_cards)
         
         # 簡化版：檢查是否接近順子或同花
         # 實際應該更複雜
         ranks = []
-        suits = {}
+        suits = [0, 0, 0, 0]
         
         for card in all_cards:
-            if hasattr(card, 'rank') and hasattr(card, 'suit'):
-                rank_value = HandEvaluator.get_rank_value(card.rank)
-                ranks.append(rank_value)
-                suits[card.suit] = suits.get(card.suit, 0) + 1
+            ranks.append(CARD_RANK[card])
+            suits[CARD_SUIT[card]] += 1
         
         # 檢查同花抽牌
-        for suit, count in suits.items():
+        for count in suits:
             if count == 4:  # 差一張同花
                 return True
         
@@ -0,0 +1,207 @@
+"""
+翻牌前全下勝率表
+離線產生 169x169 起手牌類別與 1326x1326 具體組合的勝率表，
+存成 .npy 檔後以 np.load(mmap_mode='r') 開啟，多個行程共用同一份頁面快取
+
+產生方式: python preflop_equity.py [--boards 20000] [--seed 0]
+"""
+
+import argparse
+import os
+import time
+from itertools import permutations
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from card_codec import (COMBO_CARDS, COMBO_CLASS, HAND_CLASS_INDEX, NUM_CARDS, NUM_COMBOS,
+                        NUM_HAND_CLASSES, hand_class_combos, combo_index)
+from hand_rank_table import DATA_DIR, evaluate_batch
+
+# 勝率表是唯讀的建置產物，可放在資料目錄以外（容器把資料目錄掛載成卷時不會遮住映像內的表）
+TABLE_DIR = os.environ.get("POKER_TABLE_DIR", DATA_DIR)
+CLASS_TABLE_PATH = os.path.join(TABLE_DIR, "preflop_equity_169.npy")
+COMBO_TABLE_PATH = os.path.join(TABLE_DIR, "preflop_equity_1326.npy")
+
+DEFAULT_BOARDS = 20000
+BOARD_BATCH = 256
+
+_COMBO_ARRAY = np.array(COMBO_CARDS, dtype=np.int64)
+_COMBO_CLASS = np.array(COMBO_CLASS, dtype=np.int64)
+_COMBO_MASKS = np.left_shift(1, _COMBO_ARRAY).sum(axis=1)
+
+_class_table: Optional[np.ndarray] = None
+_combo_table: Optional[np.ndarray] = None
+
+
+def _count_showdowns(boards: int, rng: np.random.Generator,
+                     progress: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    抽樣公共牌，每塊公共牌一次評估全部 1326 組手牌
+    返回 (勝場數, 有效公共牌數)，兩組手牌或手牌與公共牌衝突的不計入
+    """
+    wins = np.zeros((NUM_COMBOS, NUM_COMBOS), dtype=np.uint32)
+    valid_total = np.zeros((NUM_COMBOS, NUM_COMBOS), dtype=np.float64)
+    # 勝場只比較嚴格大於；無效組合強度設為 -1，事後扣掉「贏無效組合」的次數
+    invalid_wins = np.zeros((NUM_COMBOS, NUM_COMBOS), dtype=np.float64)
+
+    start = time.time()
+    done = 0
+    while done < boards:
+        count = min(BOARD_BATCH, boards - done)
+        board = np.argsort(rng.random((count, NUM_CARDS)), axis=1)[:, :5]
+        board_mask = np.left_shift(1, board).sum(axis=1)
+        valid = (_COMBO_MASKS[None, :] & board_mask[:, None]) == 0
+
+        hands = np.concatenate([
+            np.broadcast_to(_COMBO_ARRAY, (count, NUM_COMBOS, 2)),
+            np.broadcast_to(board[:, None, :], (count, NUM_COMBOS, 5))
+        ], axis=2)
+        strengths = np.full((count, NUM_COMBOS), -1, dtype=np.int32)
+        strengths[valid] = evaluate_batch(hands[valid])
+
+        for row in strengths:
+            wins += row[:, None] > row[None, :]
+
+        valid_f = valid.astype(np.float64)
+        valid_total += valid_f.T @ valid_f
+        invalid_wins += valid_f.T @ (1.0 - valid_f)
+
+        done += count
+        if progress:
+            print(f"{done}/{boards} 塊公共牌，經過 {time.time() - start:.0f} 秒", flush=True)
+
+    wins = wins.astype(np.float64) - invalid_wins
+    return wins, valid_total
+
+
+def _suit_permutation_indices() -> np.ndarray:
+    """24 種花色置換下，每個組合索引對應到的新組合索引"""
+    result = []
+    for perm in permutations(range(4)):
+        result.append([
+            combo_index((a & ~3) | perm[a & 3], (b & ~3) | perm[b & 3])
+            for a, b in COMBO_CARDS
+        ])
+    return np.array(result, dtype=np.int64)
+
+
+def generate_tables(boards: int = DEFAULT_BOARDS, seed: Optional[int] = None,
+                    progress: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    產生 (169x169 類別勝率表, 1326x1326 組合勝率表)
+    勝率 = 勝 + 平手/2，列為自己、欄為對手；組合表中衝突的組合為 NaN
+    抽樣結果再對 24 種花色置換取平均，降低同構組合之間的雜訊
+    """
+    rng = np.random.default_rng(seed)
+    wins, valid = _count_showdowns(boards, rng, progress)
+    ties = valid - wins - wins.T
+
+    points = wins + ties / 2
+    sym_points = np.zeros_like(points)
+    sym_valid = np.zeros_like(valid)
+    for perm in _suit_permutation_indices():
+        sym_points += points[np.ix_(perm, perm)]
+        sym_valid += valid[np.ix_(perm, perm)]
+
+    blocked = (_COMBO_MASKS[:, None] & _COMBO_MASKS[None, :]) != 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        combo_table = (sym_points / sym_valid).astype(np.float32)
+    combo_table[blocked] = np.nan
+
+    # 類別表：對每組不衝突的組合對等權平均
+    pair_class = (_COMBO_CLASS[:, None] * NUM_HAND_CLASSES + _COMBO_CLASS[None, :])[~blocked]
+    sums = np.bincount(pair_class, weights=combo_table[~blocked], minlength=NUM_HAND_CLASSES ** 2)
+    counts = np.bincount(pair_class, minlength=NUM_HAND_CLASSES ** 2)
+    class_table = (sums / counts).reshape(NUM_HAND_CLASSES, NUM_HAND_CLASSES).astype(np.float32)
+    return class_table, combo_table
+
+
+def _save_array(array: np.ndarray, path: str):
+    """先寫暫存檔再改名，避免其他行程讀到寫到一半的檔案"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def save_tables(class_table: np.ndarray, combo_table: np.ndarray,
+                class_path: str = CLASS_TABLE_PATH, combo_path: str = COMBO_TABLE_PATH):
+    """將勝率表寫入磁碟"""
+    _save_array(class_table, class_path)
+    _save_array(combo_table, combo_path)
+
+
+def _load_table(path: str, size: int) -> Optional[np.ndarray]:
+    """以唯讀記憶體映射開啟勝率表，檔案不存在或大小不符時返回 None"""
+    try:
+        table = np.load(path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if table.shape != (size, size):
+        return None
+    return table
+
+
+def get_class_table() -> Optional[np.ndarray]:
+    """169x169 類別勝率表（尚未產生時返回 None）"""
+    global _class_table
+    if _class_table is None:
+        _class_table = _load_table(CLASS_TABLE_PATH, NUM_HAND_CLASSES)
+    return _class_table
+
+
+def get_combo_table() -> Optional[np.ndarray]:
+    """1326x1326 組合勝率表（尚未產生時返回 None）"""
+    global _combo_table
+    if _combo_table is None:
+        _combo_table = _load_table(COMBO_TABLE_PATH, NUM_COMBOS)
+    return _combo_table
+
+
+def class_equity(hand: str, villain: str) -> Optional[float]:
+    """兩個起手牌類別全下的勝率，如 class_equity("AKs", "QQ")"""
+    table = get_class_table()
+    if table is None:
+        return None
+    return float(table[HAND_CLASS_INDEX[hand], HAND_CLASS_INDEX[villain]])
+
+
+def range_equity(hand: str, hand_range: Optional[Iterable[str]] = None) -> Optional[float]:
+    """
+    起手牌對一個範圍全下的勝率（範圍為類別名稱列表，None 表示任意兩張牌）
+    以組合表計算，已考慮自己手牌對對手範圍的阻擋
+    """
+    table = get_combo_table()
+    if table is None:
+        return None
+
+    hero = [combo_index(*cards) for cards in hand_class_combos(hand)]
+    if hand_range is None:
+        villain = np.arange(NUM_COMBOS)
+    else:
+        villain = np.isin(_COMBO_CLASS, [HAND_CLASS_INDEX[name] for name in hand_range
+                                         if name in HAND_CLASS_INDEX])
+        villain = np.flatnonzero(villain)
+    if len(villain) == 0:
+        return None
+
+    values = table[np.ix_(hero, villain)]
+    return float(np.nanmean(values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="產生翻牌前全下勝率表")
+    parser.add_argument("--boards", type=int, default=DEFAULT_BOARDS, help="抽樣的公共牌數量")
+    parser.add_argument("--seed", type=int, default=None, help="亂數種子")
+    args = parser.parse_args()
+
+    start = time.time()
+    class_table, combo_table = generate_tables(args.boards, args.seed, progress=True)
+    save_tables(class_table, combo_table)
+    print(f"已寫入 {CLASS_TABLE_PATH} 與 {COMBO_TABLE_PATH}，共 {time.time() - start:.0f} 秒")
+
+
+if __name__ == "__main__":
+    main()
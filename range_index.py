@@ -0,0 +1,104 @@
+"""
+GTO 範圍索引
+把 gto_ranges_clean.json 的每個 (位置, 情境, 行動) 編譯成 169 格的布林陣列，
+以起手牌類別編號直接查詢；每個行程只讀檔與編譯一次，所有對局共用，範圍檔修改後下一次取用時重新編譯
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from card_codec import HAND_CLASSES, HAND_CLASS_INDEX, NUM_HAND_CLASSES
+
+RANGES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gto_ranges_clean.json")
+
+# facing_raise 底下的情境沒有位置層，以此作為位置鍵
+FACING_RAISE = "facing_raise"
+
+_compiled: Dict[str, Tuple[int, "CompiledRanges"]] = {}  # 路徑 -> (檔案版本, 編譯結果)
+
+
+def hand_class_id(hand: str) -> int:
+    """起手牌類別編號（0-168），無法辨識時返回 -1"""
+    return HAND_CLASS_INDEX.get(hand, -1)
+
+
+class CompiledRanges:
+    """
+    編譯後的範圍
+    鍵：positions 底下為 (位置, 情境, 行動)，如 ("CO", "rfi", "raise")；
+        facing_raise 底下為 ("facing_raise", 情境, 行動)，如 ("facing_raise", "BB_vs_raise", "3bet")
+    "others" 會展開為同一情境中其他行動都不包含的手牌
+    """
+
+    def __init__(self, raw: dict):
+        self.raw = raw
+        self.spots: Dict[Tuple[str, str, str], np.ndarray] = {}
+
+        preflop = raw.get("preflop", {})
+        for position, scenarios in preflop.get("positions", {}).items():
+            for scenario, actions in scenarios.items():
+                self._compile_spot(position, scenario, actions)
+        for scenario, actions in preflop.get(FACING_RAISE, {}).items():
+            self._compile_spot(FACING_RAISE, scenario, actions)
+
+    def _compile_spot(self, position: str, scenario: str, actions: dict):
+        covered = np.zeros(NUM_HAND_CLASSES, dtype=bool)
+        others = []
+        for action, hands in actions.items():
+            if isinstance(hands, str):
+                others.append(action)
+                continue
+            mask = np.zeros(NUM_HAND_CLASSES, dtype=bool)
+            ids = [HAND_CLASS_INDEX[hand] for hand in hands if hand in HAND_CLASS_INDEX]
+            mask[ids] = True
+            mask.setflags(write=False)
+            self.spots[(position, scenario, action)] = mask
+            covered |= mask
+
+        rest = ~covered
+        rest.setflags(write=False)
+        for action in others:
+            self.spots[(position, scenario, action)] = rest
+
+    def contains(self, position: str, scenario: str, action: str, hand: str) -> bool:
+        """手牌類別是否在指定範圍中（範圍不存在時返回 False）"""
+        mask = self.spots.get((position, scenario, action))
+        index = HAND_CLASS_INDEX.get(hand)
+        return mask is not None and index is not None and bool(mask[index])
+
+    def get_mask(self, position: str, scenario: str, action: str) -> Optional[np.ndarray]:
+        """指定範圍的 169 格唯讀布林陣列"""
+        return self.spots.get((position, scenario, action))
+
+    def hands(self, position: str, scenario: str, action: str) -> List[str]:
+        """指定範圍中的手牌類別名稱"""
+        mask = self.spots.get((position, scenario, action))
+        if mask is None:
+            return []
+        return [HAND_CLASSES[i] for i in np.flatnonzero(mask)]
+
+    def has_position(self, position: str) -> bool:
+        return position in self.raw.get("preflop", {}).get("positions", {})
+
+
+def file_version(path: str) -> int:
+    """檔案版本（修改時間，奈秒），檔案不存在時返回 -1"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
+
+def get_compiled_ranges(path: str = RANGES_PATH) -> CompiledRanges:
+    """載入並編譯範圍檔（每個行程只做一次，檔案修改後重新載入）"""
+    version = file_version(path)
+    cached = _compiled.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        ranges = CompiledRanges(json.load(f))
+    _compiled[path] = (version, ranges)
+    return ranges
@@ -0,0 +1,103 @@
+"""
+底池結算
+依每位玩家本手牌的總投入建立分層邊池，各層由有資格的玩家以整數牌力比大小
+- 棄牌玩家的投入留在底池中，但不能贏得任何一層
+- 平分時的零頭依 odd_chip_order（預設為座位順序）逐一分給該層的贏家，結果固定可重現
+- 籌碼守恆：所有分配金額加總等於總投入
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def build_side_pots(contributions: Sequence[int], folded: Sequence[bool]) -> List[Tuple[int, List[int]]]:
+    """
+    建立分層邊池
+    返回 [(金額, 有資格的座位列表), ...]，由主池到最外層邊池
+    層級為未棄牌玩家的各個投入額；超過最高層的棄牌投入併入最後一層
+    """
+    levels = sorted({c for c, f in zip(contributions, folded) if not f})
+    if not levels:
+        return []
+
+    pots = []
+    previous = 0
+    for i, level in enumerate(levels):
+        top = i == len(levels) - 1
+        amount = sum((c if top else min(c, level)) - min(c, previous) for c in contributions)
+        eligible = [seat for seat, (c, f) in enumerate(zip(contributions, folded)) if not f and c >= level]
+        if amount > 0:
+            pots.append((amount, eligible))
+        previous = level
+    return pots
+
+
+def settle(contributions: Sequence[int], folded: Sequence[bool], strengths: Sequence[int],
+           odd_chip_order: Optional[Sequence[int]] = None) -> List[int]:
+    """
+    結算底池，返回每個座位獲得的籌碼
+    strengths: 每個座位的整數牌力（越大越好，棄牌座位的值不使用）
+    odd_chip_order: 零頭的分配順序（座位列表），預設為 0, 1, 2, ...
+    """
+    num_seats = len(contributions)
+    order = list(odd_chip_order) if odd_chip_order is not None else list(range(num_seats))
+    rank = {seat: i for i, seat in enumerate(order)}
+    payouts = [0] * num_seats
+
+    for amount, eligible in build_side_pots(contributions, folded):
+        best = max(strengths[seat] for seat in eligible)
+        winners = sorted((seat for seat in eligible if strengths[seat] == best),
+                         key=lambda seat: rank.get(seat, num_seats + seat))
+        share, remainder = divmod(amount, len(winners))
+        for i, seat in enumerate(winners):
+            payouts[seat] += share + (1 if i < remainder else 0)
+    return payouts
+
+
+def settle_batch(contributions: np.ndarray, folded: np.ndarray, strengths: np.ndarray,
+                 odd_chip_order: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    settle 的向量版，每列一張牌桌
+    contributions, folded, strengths: (牌桌數, 座位數)
+    返回 (牌桌數, 座位數) 的分配金額
+    """
+    contributions = np.asarray(contributions, dtype=np.int64)
+    folded = np.asarray(folded, dtype=bool)
+    strengths = np.where(folded, -1, np.asarray(strengths, dtype=np.int64))
+    num_tables, num_seats = contributions.shape
+    order = np.asarray(odd_chip_order if odd_chip_order is not None else range(num_seats))
+    # 每個座位在零頭分配順序中的名次
+    priority = np.empty(num_seats, dtype=np.int64)
+    priority[order] = np.arange(num_seats)
+
+    # 各層層級：未棄牌玩家的投入額由小到大（棄牌座位不構成層級）
+    live_levels = np.sort(np.where(folded, np.iinfo(np.int64).max, contributions), axis=1)
+    payouts = np.zeros((num_tables, num_seats), dtype=np.int64)
+    previous = np.zeros(num_tables, dtype=np.int64)
+    live_count = (~folded).sum(axis=1)
+    max_level = live_levels[np.arange(num_tables), np.maximum(live_count - 1, 0)]
+
+    for layer in range(num_seats):
+        # 相同的投入額只構成一層，與 build_side_pots 一致
+        level = np.where(layer < live_count, live_levels[:, layer], previous)
+        exists = (layer < live_count) & ((level > previous) | (layer == 0))
+        top = level == max_level
+        capped = np.where(top[:, None], contributions, np.minimum(contributions, level[:, None]))
+        amount = (capped - np.minimum(contributions, previous[:, None])).sum(axis=1)
+        amount = np.where(exists, amount, 0)
+
+        eligible = ~folded & (contributions >= level[:, None])
+        best = np.where(eligible, strengths, -1).max(axis=1)
+        winners = eligible & (strengths == best[:, None])
+        count = np.maximum(winners.sum(axis=1), 1)
+        share, remainder = np.divmod(amount, count)
+
+        # 零頭：依名次排在前 remainder 位的贏家各多拿 1
+        winner_rank = np.where(winners, priority[None, :], num_seats)
+        position = np.argsort(np.argsort(winner_rank, axis=1, kind='stable'), axis=1)
+        extra = winners & (position < remainder[:, None])
+        payouts += winners * share[:, None] + extra
+
+        previous = level
+    return payouts
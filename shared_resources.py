@@ -0,0 +1,57 @@
+"""
+Streamlit 共用資源
+讓同一個伺服器行程中的所有工作階段共用唯讀資源，工作階段只在 session_state 保存引用，不得修改：
+- 範圍編譯結果與混合策略：get_compiled_ranges / get_strategy 本身即為行程內共用，檔案修改後重新載入
+- GTOAnalyzer：以 st.cache_resource 快取，快取鍵包含範圍檔版本，範圍檔更新後建立新的分析器
+  電腦玩家使用另一個不寫日誌、翻牌後不計算說明用勝率的分析器（說明文字不會顯示）
+- 牌力查表與翻牌前勝率表：以 st.cache_resource 在行程內只載入一次
+"""
+
+import streamlit as st
+
+import hand_rank_table
+import preflop_equity
+from debug_logger import DebugLogger
+from mixed_strategy import get_strategy
+from range_index import RANGES_PATH, file_version, get_compiled_ranges
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _analyzer(_analyzer_class, class_name: str, version: int):
+    return _analyzer_class(get_compiled_ranges(RANGES_PATH))
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _bot_analyzer(_analyzer_class, class_name: str, version: int):
+    return _analyzer_class(get_compiled_ranges(RANGES_PATH), logger=DebugLogger(enabled=False),
+                           postflop_equity=False)
+
+
+@st.cache_resource(show_spinner="載入牌力查表與勝率表...")
+def _tables() -> bool:
+    """勝率表為唯讀記憶體映射，由作業系統在行程間共用分頁"""
+    hand_rank_table.get_lookup()
+    hand_rank_table.get_numpy_tables()
+    preflop_equity.get_class_table()
+    preflop_equity.get_combo_table()
+    return True
+
+
+def get_analyzer(analyzer_class):
+    """
+    共用的分析器（analyzer_class 通常為 GTOAnalyzer，由呼叫端傳入以免循環匯入）
+    分析器只會寫入記憶化的勝率說明，多個工作階段同時使用是安全的
+    """
+    return _analyzer(analyzer_class, analyzer_class.__name__, file_version(RANGES_PATH))
+
+
+def get_bot_analyzer(analyzer_class):
+    """電腦玩家共用的分析器：只需要建議的動作與金額，翻牌後不做勝率模擬"""
+    return _bot_analyzer(analyzer_class, analyzer_class.__name__, file_version(RANGES_PATH))
+
+
+def warm_up():
+    """每次重繪開頭呼叫：第一次載入所有共用資源，之後只檢查檔案版本"""
+    _tables()
+    get_compiled_ranges()
+    get_strategy()
@@ -0,0 +1,33 @@
+"""
+Test the structured action log
+"""
+
+import action_log
+from action_log import ActionLog
+from card_codec import parse_cards
+
+
+def test_events_render_like_the_old_history():
+    log = ActionLog(["You", "Player 2", "Player 3"])
+    log.append(1, action_log.POST_SB, 50, 0)
+    log.append(2, action_log.POST_BB, 100, 0)
+    log.append(0, action_log.RAISE, 250, 0)
+    log.append(1, action_log.FOLD, 0, 0)
+    log.append(2, action_log.CALL, 150, 0)
+    log.deal(parse_cards("AsKhTd"), action_log.FLOP)
+    log.append(2, action_log.CHECK, 0, 1)
+    log.deal(parse_cards("2c"), action_log.TURN)
+    log.deal([], action_log.SHOWDOWN)
+    log.append(0, action_log.WIN_SHOWDOWN, 550, 4)
+
+    assert list(log) == [
+        "Player 2 posts SB $50", "Player 3 posts BB $100", "You raises to $250", "Player 2 folds",
+        "Player 3 calls $150", "\n=== FLOP: A♠ K♥ T♦ ===", "Player 3 checks", "\n=== TURN: 2♣ ===",
+        "\n=== SHOWDOWN ===", "\nYou wins $550 at showdown",
+    ]
+    assert log[-1] == "\nYou wins $550 at showdown"
+    assert log[-2:] == list(log)[-2:]
+    assert list(log.events(9)) == [(0, action_log.WIN_SHOWDOWN, 550, 4)]
+
+    log.truncate(3)
+    assert len(log) == 3 and log[-1] == "You raises to $250"
@@ -0,0 +1,57 @@
+"""
+Test the duplicate-dealing bot arena
+"""
+
+import numpy as np
+
+from bot_arena import DuplicateArena, allin_ev
+from card_codec import parse_card
+from headless_runner import Policy, play_hand
+from texas_holdem_complete import Action, Card, TexasHoldemGame
+
+
+class ShoveOrFold(Policy):
+    """UTG shoves, BB calls, everyone else folds"""
+
+    def act(self, game, player_index):
+        position = game.players[player_index].position
+        if position == "UTG":
+            return Action.RAISE, game.players[player_index].stack + game.players[player_index].current_bet
+        if position == "BB":
+            return Action.CALL, game.current_bet
+        return Action.FOLD, 0
+
+
+def test_preflop_allin_is_settled_by_equity():
+    game = TexasHoldemGame(enable_logging=False, seed=5)
+    game.initialize_players(human_seat=-1)
+    game.start_new_hand()
+    utg, bb = game.get_position_index("UTG"), game.get_position_index("BB")
+    game.players[utg].hole_cards = [Card.from_id(parse_card(c)) for c in ("As", "Ah")]
+    game.players[bb].hole_cards = [Card.from_id(parse_card(c)) for c in ("Ks", "Kh")]
+    play_hand(game, [ShoveOrFold()] * game.num_players)
+
+    expected = allin_ev(game, np.random.default_rng(0))
+    pot = sum(p.total_contributed for p in game.players)
+    assert expected.sum() == pot
+    # AA 對 KK 約 82% 勝率
+    assert abs(expected[utg] / pot - 0.82) < 0.04
+    assert expected[bb] > 0
+
+
+def test_duplicate_deals_are_zero_sum_and_chunkable():
+    arena = DuplicateArena(["engine", "postflop"], seed=7)
+    whole = arena.run(40)
+    first = DuplicateArena(["engine", "postflop"], seed=7).run(25)
+    rest = DuplicateArena(["engine", "postflop"], seed=7).run(15, first_deal=25)
+
+    assert whole.hands == 80
+    np.testing.assert_allclose(whole.samples.sum(axis=1), 0, atol=1e-9)
+    np.testing.assert_allclose(whole.raw.sum(axis=1), 0, atol=1e-9)
+    np.testing.assert_array_equal(whole.samples, first.merge(rest).samples)
+    mean, half = whole.difference(1)
+    assert np.isfinite(mean) and half > 0
+
+    # 同一個策略坐滿整桌時，每副牌的結果完全相同
+    mirror = DuplicateArena(["engine", "engine"], seed=7).run(20)
+    np.testing.assert_array_equal(mirror.samples[:, 0], mirror.samples[:, 1])
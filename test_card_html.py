@@ -0,0 +1,23 @@
+"""
+Test the precomputed card and table HTML templates
+"""
+
+from card_codec import CARD_STR, parse_card
+from card_html import BOARD_CARD_HTML, HOLE_CARD_HTML, player_card_html, table_html
+
+
+def test_templates_use_css_classes_and_card_ids():
+    assert len(set(HOLE_CARD_HTML)) == len(set(BOARD_CARD_HTML)) == 52
+    assert HOLE_CARD_HTML[parse_card("Ah")] == '<div class="hole-card red">A♥</div>'
+    assert BOARD_CARD_HTML[parse_card("Tc")] == '<div class="community-card black">T♣</div>'
+    assert all("style=" not in html for html in HOLE_CARD_HTML + BOARD_CARD_HTML)
+
+    board = [parse_card(c) for c in ("Ks", "7d", "2c")]
+    table = table_html(300, board, waiting=False)
+    assert "$300" in table
+    assert table.index(CARD_STR[board[0]]) < table.index(CARD_STR[board[1]]) < table.index(CARD_STR[board[2]])
+    assert "等待翻牌" in table_html(150, [], waiting=True)
+
+    human = player_card_html("You", "BTN", 4900, True, [parse_card("As"), parse_card("Ad")])
+    assert human.startswith('<div class="player-card human"><h4>You (BTN)</h4>') and "A♦" in human
+    assert "hole-card" not in player_card_html("Player 1", "UTG", 5000, False)
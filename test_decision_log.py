@@ -0,0 +1,46 @@
+"""
+Test the compact decision records and the paginated decision log
+"""
+
+from debug_logger import DebugLogger
+from decision_log import DecisionLog
+from texas_holdem_simple import GTOAnalyzer
+
+
+def test_detail_is_built_from_the_stored_recommendation():
+    analyzer = GTOAnalyzer(logger=DebugLogger(enabled=False))
+    calls = []
+    recommend = analyzer.get_preflop_recommendation
+
+    def counting(*args):
+        calls.append(args)
+        return recommend(*args)
+
+    analyzer.get_preflop_recommendation = counting
+    record = analyzer.judge_decision("AKs", "UTG", "fold", 0, 100, 100)
+    assert not record.is_correct and record.best[0] == "raise"
+    assert record.street == "PREFLOP"
+
+    detail = analyzer.detailed_analysis(record)
+    # 產生詳細分析不再重新取得建議
+    assert len(calls) == 1
+    assert "RAISE $250" in detail
+    assert (record.is_correct, record.suggestion, detail) == analyzer.analyze_decision("AKs", "UTG", "fold", 0, 100, 100)
+
+
+def test_log_counts_incrementally_and_pages_newest_first():
+    analyzer = GTOAnalyzer(logger=DebugLogger(enabled=False))
+    log = DecisionLog()
+    for hand_no in range(3):
+        log.new_hand()
+        for action in ("raise", "fold", "call"):
+            log.add(analyzer.judge_decision("AA", "BTN", action, 250, 100, 100))
+
+    assert (log.total, log.correct) == (9, 3)
+    assert (log.hand_total, log.hand_correct) == (3, 1)
+    assert [r.hand_no for r in log.hand_records()] == [3, 3, 3]
+
+    assert log.num_pages(4) == 3
+    assert [number for number, _ in log.page(1, 4)] == [9, 8, 7, 6]
+    assert [number for number, _ in log.page(3, 4)] == [1]
+    assert DecisionLog().num_pages() == 1 and DecisionLog().page(1) == []
@@ -0,0 +1,31 @@
+"""
+Test the partial-shuffle deck
+"""
+
+import random
+from collections import Counter
+
+from texas_holdem_complete import CARDS, Card, Deck
+
+
+def test_deck_deals_singletons_and_skips_dead_cards():
+    deck = Deck(random.Random(8))
+    dead = [0, 13, 51]
+    counts = Counter()
+    for _ in range(4900):
+        deck.reset(5, dead=dead)
+        cards = deck.deal(5)
+        assert all(card is CARDS[card.id] for card in cards)
+        counts.update(card.id for card in cards)
+        assert len(set(cards)) == 5
+
+    assert not set(dead) & set(counts)
+    assert len(counts) == 49
+    # 每張牌期望出現 500 次
+    assert min(counts.values()) > 400 and max(counts.values()) < 600
+
+    # 超過預先抽出的張數時補抽，整副牌抽完後不再重複
+    deck.reset(2)
+    assert len({card.id for card in deck.deal(52)}) == 52
+    assert deck.remaining() == 0
+    assert Card.from_id(7) is CARDS[7]
@@ -0,0 +1,54 @@
+"""
+Test the Monte Carlo and exact equity engines
+"""
+
+import numpy as np
+
+from equity import calculate_equity, exact_equity, monte_carlo_equity
+
+
+def test_aces_against_random_hand():
+    result = monte_carlo_equity("AsAh", iterations=40000, rng=np.random.default_rng(1))
+    assert abs(result.equity - 0.852) < 4 * result.std_error + 0.005
+    assert result.iterations == 40000
+
+
+def test_explicit_range_and_complete_board():
+    result = monte_carlo_equity("AsKs", board="Qs Js 2d 3c 4h", opponent_ranges=[["QQ", "JJ"]],
+                                iterations=2000, rng=np.random.default_rng(2))
+    assert result.equity == 0.0
+    assert result.std_error == 0.0
+
+
+def test_time_limit_stops_early():
+    result = monte_carlo_equity("7c2d", num_opponents=5, iterations=10 ** 9, time_limit=0.02,
+                                rng=np.random.default_rng(3))
+    assert 0 < result.iterations < 10 ** 9
+    assert 0.0 < result.equity < 1.0
+
+
+def test_exact_preflop_all_in():
+    result = exact_equity("AsKs", ["QhQd"])
+    assert result.iterations == 1712304
+    assert abs(result.equity - 0.4621) < 0.0005
+    assert result.std_error == 0.0
+
+
+def test_isomorphic_inputs_share_exact_result():
+    first = exact_equity("AsAh", ["KsKh"], board="2c 7d 9h")
+    second = exact_equity("AdAc", ["KdKc"], board="2s 7h 9c")
+    assert first.equity == second.equity
+    assert first.iterations == 990
+
+
+def test_monte_carlo_agrees_with_exact():
+    exact = exact_equity("AhKh", ["2c2d"], board="Qh Jh 3s")
+    sampled = monte_carlo_equity("AhKh", board="Qh Jh 3s", opponent_ranges=[["2c2d"]],
+                                 iterations=30000, rng=np.random.default_rng(4))
+    assert abs(sampled.equity - exact.equity) < 4 * sampled.std_error
+
+
+def test_exact_against_range_on_river():
+    result = calculate_equity("AhKh", board="Qh Jh 3s 4d 5c")
+    assert result.std_error == 0.0
+    assert result.iterations == 990
@@ -0,0 +1,118 @@
+"""
+Test game-state snapshots and undo
+"""
+
+from headless_runner import EngineGTOPolicy, HeadlessRunner, _legalize
+from texas_holdem_complete import Action, TexasHoldemGame
+
+
+def test_undo_restores_every_intermediate_state():
+    game = TexasHoldemGame(enable_logging=False, seed=5)
+    game.initialize_players(human_seat=-1)
+    policy = EngineGTOPolicy()
+
+    for _ in range(200):
+        game.start_new_hand()
+        states, histories = [], []
+        actor = game.current_player_index
+        while game.should_continue_hand() and actor != -1:
+            game.current_player_index = actor
+            states.append(game.snapshot())
+            histories.append(list(game.action_history))
+            action, amount = _legalize(game, game.players[actor], *policy.act(game, actor))
+            game.apply_action(actor, action, amount)
+            actor = game.get_next_player_index()
+        final = game.snapshot()
+
+        # 逐步撤銷，每一步都回到行動前的狀態
+        for state, history in zip(reversed(states), reversed(histories)):
+            assert game.undo()
+            assert game.snapshot() == state
+            assert list(game.action_history) == history
+        assert not game.undo()
+
+        # 還原到最後的快照後可以繼續正常結算
+        game.restore(final)
+        game.determine_winner()
+        assert sum(p.stack for p in game.players) == game.starting_stack * game.num_players
+        for player in game.players:
+            player.stack = game.starting_stack
+
+
+def test_restore_across_streets():
+    game = TexasHoldemGame(enable_logging=False, seed=9)
+    game.initialize_players(human_seat=-1)
+    game.start_new_hand()
+    preflop = game.snapshot()
+    game.move_to_next_street()
+    flop = [str(c) for c in game.community_cards]
+    game.move_to_next_street()
+
+    game.restore(preflop)
+    assert game.community_cards == [] and game.deck.position == preflop.deck_position
+    game.move_to_next_street()
+    assert [str(c) for c in game.community_cards] == flop
+
+
+def test_turn_bookkeeping_matches_full_scans():
+    runner = HeadlessRunner(["engine", "analyzer", "postflop"], seed=4)
+    game = runner.game
+    checked = 0
+    for hand_no in range(300):
+        game.start_new_hand((4 << 32) | hand_no)
+        policies = [runner.policies[i] for i in runner._seats(hand_no)]
+        while game.should_continue_hand():
+            need = [i for i, p in enumerate(game.players)
+                    if not p.is_folded and not p.is_all_in
+                    and (not p.has_acted_this_street or p.current_bet < game.current_bet)]
+            # 目前玩家之後循環找第一個需要行動的玩家，目前玩家最後檢查
+            order = [(game.current_player_index + k) % game.num_players for k in range(1, game.num_players + 1)]
+            assert game.get_next_player_index() == next((i for i in order if i in need), -1)
+            assert game.num_players_to_act == len(need)
+            assert game.is_betting_round_complete() == (len(game.get_active_players()) <= 1 or not need)
+            checked += 1
+
+            actor = game.get_next_player_index() if not game.needs_to_act(game.current_player_index) \
+                else game.current_player_index
+            if actor == -1:
+                game.move_to_next_street()
+                continue
+            game.current_player_index = actor
+            action, amount = _legalize(game, game.players[actor], *policies[actor].act(game, actor))
+            game.process_action(actor, action, amount)
+        game.determine_winner()
+        for player in game.players:
+            player.stack = game.starting_stack
+    assert checked > 1000
+
+
+def test_advance_runs_computer_players_until_the_human_acts():
+    game = TexasHoldemGame(enable_logging=False, seed=2)
+    game.initialize_players(human_seat=3)
+    policy = EngineGTOPolicy()
+    choose = lambda seat: _legalize(game, game.players[seat], *policy.act(game, seat))
+
+    for _ in range(100):
+        game.start_new_hand()
+        while game.should_continue_hand():
+            game.advance(choose)
+            if not game.should_continue_hand():
+                break
+            # 停下來時一定輪到真人玩家
+            assert game.current_player_index == 3 and game.needs_to_act(3)
+            game.process_action(3, *choose(3))
+        game.determine_winner()
+        assert sum(p.stack for p in game.players) == game.starting_stack * game.num_players
+        for player in game.players:
+            player.stack = game.starting_stack
+
+
+def test_float_amounts_from_analyzers_are_recorded_as_chips():
+    game = TexasHoldemGame(enable_logging=False, seed=3)
+    game.initialize_players(human_seat=-1)
+    game.start_new_hand()
+    actor = game.current_player_index
+    # GTOAnalyzer 的開局建議為 big_blind * 2.5（浮點數）
+    game.process_action(actor, Action.RAISE, game.big_blind * 2.5)
+    assert game.current_bet == 250 and isinstance(game.players[actor].stack, int)
+    assert game.action_history.amounts[-1] == 250
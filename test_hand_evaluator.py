@@ -0,0 +1,62 @@
+"""
+Test the lookup-table hand evaluator against the combination-based reference
+"""
+
+import random
+
+import numpy as np
+
+from card_codec import card_str, cards_to_mask, mask_to_cards, parse_cards
+from hand_evaluator import HandEvaluator, HandRank
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+SUITS = ['♠', '♥', '♦', '♣']
+DECK = [{'rank': r, 'suit': s} for r in RANKS for s in SUITS]
+
+
+def cards(text):
+    return [{'rank': token[0], 'suit': token[1]} for token in text.split()]
+
+
+def test_matches_reference_on_random_hands():
+    rng = random.Random(1234)
+    for _ in range(3000):
+        hand = rng.sample(DECK, rng.choice([5, 6, 7]))
+        assert HandEvaluator.evaluate_hand(hand) == HandEvaluator._evaluate_combinations(hand)
+
+
+def test_special_hands():
+    assert HandEvaluator.evaluate_hand(cards("A♠ 2♥ 3♦ 4♣ 5♠ K♥ K♦")) == (HandRank.STRAIGHT, [5])
+    assert HandEvaluator.evaluate_hand(cards("A♥ K♥ Q♥ J♥ T♥ 2♠ 2♦")) == (HandRank.ROYAL_FLUSH, [14])
+    assert HandEvaluator.evaluate_hand(cards("9♠ 9♥ 9♦ 4♣ 4♠ 4♥ 2♦")) == (HandRank.FULL_HOUSE, [9, 4])
+    assert HandEvaluator.evaluate_hand(cards("8♠ 8♥ 5♦ 5♣ 3♠ 3♥ 2♦")) == (HandRank.TWO_PAIR, [8, 5, 3])
+    assert HandEvaluator.evaluate_hand(cards("7♣ 7♠ 7♥ 7♦ A♠")) == (HandRank.FOUR_OF_KIND, [7, 14])
+
+
+def test_strength_order_matches_compare_hands():
+    rng = random.Random(99)
+    for _ in range(1000):
+        first = rng.sample(DECK, 7)
+        second = rng.sample(DECK, 7)
+        expected = HandEvaluator.compare_hands(HandEvaluator.evaluate_hand(first),
+                                               HandEvaluator.evaluate_hand(second))
+        s1 = HandEvaluator.evaluate_strength(first)
+        s2 = HandEvaluator.evaluate_strength(second)
+        assert (s1 > s2) - (s1 < s2) == expected
+
+
+def test_card_ids_and_masks():
+    ids = parse_cards("As Kd 2c")
+    assert [card_str(c) for c in ids] == ['A♠', 'K♦', '2♣']
+    assert mask_to_cards(cards_to_mask(ids)) == sorted(ids)
+    assert HandEvaluator.evaluate_hand(parse_cards("AsKsQsJsTs")) == (HandRank.ROYAL_FLUSH, [14])
+    assert HandEvaluator.evaluate_strength(parse_cards("Ah Kh Qh Jh 9h 2s 3d")) == \
+        HandEvaluator.evaluate_strength(cards("A♥ K♥ Q♥ J♥ 9♥ 2♠ 3♦"))
+
+
+def test_evaluate_batch_matches_scalar():
+    rng = np.random.default_rng(7)
+    for num_cards in (5, 6, 7):
+        hands = np.argsort(rng.random((500, 52)), axis=1)[:, :num_cards]
+        expected = [HandEvaluator.evaluate_ids(list(row)) for row in hands.tolist()]
+        assert HandEvaluator.evaluate_batch(hands).tolist() == expected
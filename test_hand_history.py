@@ -0,0 +1,65 @@
+"""
+Test the hand-history exporter
+"""
+
+import json
+import re
+
+from hand_history import HandHistoryWriter
+from headless_runner import HeadlessRunner
+
+
+def test_exports_every_hand_and_rotates_files(tmp_path):
+    with HandHistoryWriter(str(tmp_path), fmt="json", max_bytes=20000) as writer:
+        HeadlessRunner(["engine", "postflop"], seed=4, history=writer).run(300)
+    assert writer.hands_written == 300
+    assert len(writer.files) > 1
+
+    hands = [json.loads(line) for path in writer.files for line in open(path, encoding="utf-8")]
+    assert len(hands) == 300
+    assert len({hand["hand_id"] for hand in hands}) == 300
+    for hand in hands:
+        contributed = sum(a["amount"] for a in hand["actions"] if a["action"] in ("post_sb", "post_bb", "call", "bet"))
+        assert sum(p["won"] for p in hand["players"]) > 0
+        assert sum(p["stack"] for p in hand["players"]) == 6 * 5000
+        assert contributed <= sum(p["won"] for p in hand["players"])
+
+
+def test_writers_created_together_get_distinct_ids(tmp_path):
+    with HandHistoryWriter(str(tmp_path)) as first, HandHistoryWriter(str(tmp_path)) as second:
+        assert first._next_id != second._next_id
+        assert first._session != second._session
+
+
+def test_text_format_matches_game(tmp_path):
+    runner = HeadlessRunner(["engine", "postflop"], seed=7)
+    with HandHistoryWriter(str(tmp_path), fmt="text") as writer:
+        for hand_no in range(200):
+            runner.replay_hand(hand_no)
+            writer.write(runner.game)
+            if len(runner.game.community_cards) == 5:
+                board = " ".join(f"{c.rank}{'shdc'[c.id & 3]}" for c in runner.game.community_cards)
+                break
+
+    text = open(writer.files[0], encoding="utf-8").read()
+    hands = text.strip().split("\n\n\n")
+    assert len(hands) == hand_no + 1
+    assert all(hand.startswith("PokerStars Hand #") for hand in hands)
+    assert f"Board [{board}]" in hands[-1]
+    assert "*** RIVER ***" in hands[-1]
+
+    # 摘要區的座位行使用 PokerStars 的固定寫法
+    seat_line = re.compile(r"^Seat \d: Player \d( \((button|small blind|big blind)\))? "
+                           r"(folded before Flop( \(didn't bet\))?|folded on the (Flop|Turn|River)"
+                           r"|collected \(\$\d+\)|showed \[\w\w \w\w\] and (won \(\$\d+\)|lost))$")
+    summaries = [hand.split("*** SUMMARY ***\n")[1].splitlines()[1:] for hand in hands]
+    for summary in summaries:
+        seats = [line for line in summary if line.startswith("Seat ")]
+        assert len(seats) == 6 and all(seat_line.match(line) for line in seats), seats
+    assert any("folded before Flop (didn't bet)" in line for summary in summaries for line in summary)
+
+    # 沒有人跟到的下注先退回，底池等於實際贏得的金額
+    for hand in hands:
+        total = int(re.search(r"Total pot \$(\d+)", hand).group(1))
+        assert total == sum(int(x) for x in re.findall(r"collected \$(\d+) from pot", hand))
+    assert any("Uncalled bet ($50) returned to" in hand for hand in hands)
@@ -0,0 +1,57 @@
+"""
+Test the headless simulation runner
+"""
+
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from headless_runner import HeadlessRunner, Policy
+
+
+def test_headless_hands_conserve_chips_and_are_reproducible():
+    first = HeadlessRunner(["engine", "analyzer", "postflop"], seed=3).run(300)
+    second = HeadlessRunner(["engine", "analyzer", "postflop"], seed=3).run(300)
+
+    assert first.hands == 300
+    assert sum(first.profit.values()) == 0
+    assert sum(first.seat_hands.values()) == 300 * 6
+    assert first.profit == second.profit
+    assert first.hands_per_second > 0
+
+
+def test_any_hand_replays_without_touching_global_random():
+    random.seed(42)
+    expected = random.random()
+
+    runner = HeadlessRunner(["engine", "postflop"], seed=11)
+    histories = []
+    for hand_no in range(50):
+        runner.replay_hand(hand_no)
+        histories.append(list(runner.game.action_history))
+
+    random.seed(42)
+    other = HeadlessRunner(["engine", "postflop"], seed=11)
+    for hand_no in (37, 3, 49):
+        other.replay_hand(hand_no)
+        assert list(other.game.action_history) == histories[hand_no]
+    assert random.random() == expected
+
+
+def test_policy_without_act_fails_at_construction():
+    class Incomplete(Policy):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_headless_imports_do_not_touch_the_debug_log(tmp_path):
+    # 在新的行程中匯入，工作目錄不應出現（或清空）poker_debug.txt
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = f"import sys; sys.path.insert(0, {here!r}); import headless_runner, history_importer, bot_arena"
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, check=True, capture_output=True)
+    assert not (tmp_path / "poker_debug.txt").exists()
@@ -0,0 +1,116 @@
+"""
+Test the hand-history importer
+"""
+
+import json
+
+from hand_history import HandHistoryWriter
+from headless_runner import HeadlessRunner
+from history_importer import chunk_ranges, grade_hand, import_histories, iter_hands, parse_text_hand
+
+THIRD_PARTY_HAND = """﻿PokerStars Hand #243120398811: Hold'em No Limit ($0.25/$0.50 USD) - 2023/01/05 21:14:02 ET
+Table 'Aludra V' 6-max Seat #2 is the button
+Seat 1: villain1 ($48.10 in chips)
+Seat 2: hero ($50 in chips)
+Seat 3: sb_guy ($51.20 in chips)
+Seat 5: bb_guy ($50 in chips)
+Seat 6: villain2 ($22.75 in chips)
+sb_guy: posts small blind $0.25
+bb_guy: posts big blind $0.50
+*** HOLE CARDS ***
+Dealt to hero [Ah Qh]
+villain2: folds
+villain1: raises $0.75 to $1.25
+hero: raises $2.50 to $3.75
+sb_guy: folds
+bb_guy: folds
+villain1: calls $2.50
+*** FLOP *** [Qs 7d 2c]
+villain1: checks
+hero: bets $4.10
+villain1: folds
+Uncalled bet ($4.10) returned to hero
+hero collected $8.25 from pot
+*** SUMMARY ***
+Total pot $8.25 | Rake $0
+"""
+
+
+def test_parses_third_party_hand():
+    hand = parse_text_hand(THIRD_PARTY_HAND.lstrip("﻿"))
+    # 金額換算成籌碼，大盲 = 100
+    assert hand.big_blind == 100 and hand.scale == 200
+    assert hand.positions == {"villain1": "CO", "hero": "BTN", "sb_guy": "SB", "bb_guy": "BB", "villain2": "MP"}
+    assert list(hand.holes) == ["hero"]
+
+    decisions = grade_hand(hand)
+    assert [(d["street"], d["action"], d["amount"]) for d in decisions] == [("preflop", "raise", 750), ("flop", "bet", 820)]
+    assert decisions[0]["hand"] == "AQs" and decisions[0]["recommended"] == "call"
+
+
+MICRO_STAKES_HAND = """PokerStars Hand #243120398812: Hold'em No Limit ($0.05/$0.10 USD) - 2023/01/05 21:15:40 ET
+Table 'Aludra V' 6-max Seat #4 is the button
+Seat 1: hero ($10 in chips)
+Seat 2: mp ($10 in chips)
+Seat 3: co ($10 in chips)
+Seat 4: btn ($10 in chips)
+Seat 5: sb ($10 in chips)
+Seat 6: bb ($10 in chips)
+sb: posts small blind $0.05
+bb: posts big blind $0.10
+*** HOLE CARDS ***
+Dealt to hero [As Ad]
+hero: raises $0.15 to $0.25
+mp: folds
+co: folds
+btn: folds
+sb: folds
+bb: folds
+Uncalled bet ($0.15) returned to hero
+hero collected $0.25 from pot
+*** SUMMARY ***
+"""
+
+
+def test_micro_stakes_amounts_are_graded_in_big_blinds():
+    decisions = grade_hand(parse_text_hand(MICRO_STAKES_HAND))
+    assert len(decisions) == 1
+    decision = decisions[0]
+    assert (decision["position"], decision["hand"], decision["amount"]) == ("UTG", "AA", 250)
+    assert decision["correct"] and decision["recommended_amount"] == 250
+
+
+def test_zoom_headers_split_and_unparsed_blocks_are_counted(tmp_path):
+    zoom = MICRO_STAKES_HAND.replace("PokerStars Hand #", "PokerStars Zoom Hand #")
+    path = tmp_path / "zoom.txt"
+    path.write_text("not a hand history\n\n" + (zoom + "\n\n") * 40, encoding="utf-8")
+
+    hands = list(iter_hands(zoom * 3, "text"))
+    assert [hand.hand_id for hand in hands] == ["243120398812"] * 3
+    assert len(chunk_ranges(str(path), "text", chunk_bytes=2048)) > 1
+
+    report, _, _ = import_histories([str(path)], str(tmp_path / "out"), chunk_bytes=2048)
+    assert (report.hands, report.skipped, report.decisions) == (40, 1, 40)
+
+
+def test_text_and_json_exports_grade_the_same(tmp_path):
+    runner = HeadlessRunner(["engine", "postflop"], seed=6)
+    files = []
+    for fmt in ("text", "json"):
+        with HandHistoryWriter(str(tmp_path / fmt), fmt=fmt) as writer:
+            for hand_no in range(300):
+                runner.replay_hand(hand_no)
+                writer.write(runner.game)
+        files.append(writer.files[0])
+
+    def decisions(path):
+        return [{k: v for k, v in json.loads(line).items() if k != "hand_id"} for line in open(path, encoding="utf-8")]
+
+    text_report, _, text_path = import_histories(files[:1], str(tmp_path / "a"), chunk_bytes=4096)
+    json_report, _, json_path = import_histories(files[1:], str(tmp_path / "b"))
+    assert text_report.hands == json_report.hands == 300
+    assert text_report.decisions == json_report.decisions > 300
+    assert decisions(text_path) == decisions(json_path)
+
+    hero_report, _, _ = import_histories(files[:1], str(tmp_path / "c"), heroes=["Player 1"])
+    assert 0 < hero_report.decisions < text_report.decisions
@@ -0,0 +1,41 @@
+"""
+Test the mixed-frequency strategy format, converter and samplers
+"""
+
+import json
+
+import numpy as np
+
+from card_codec import HAND_CLASS_INDEX
+from mixed_strategy import MixedStrategy, convert
+from range_index import RANGES_PATH, get_compiled_ranges
+
+
+def test_pure_ranges_convert_to_single_actions():
+    strategy = MixedStrategy.from_ranges(get_compiled_ranges())
+    rfi = strategy.get("UTG", "rfi")
+    assert rfi.sample_one(HAND_CLASS_INDEX["AA"], rand=None) == ("raise", 2.5)
+    assert rfi.sample_one(HAND_CLASS_INDEX["72o"], rand=None)[0] == "fold"
+    assert strategy.get("UTG", "vs_raise").frequencies("AA")["raise"] == np.float16(0.3)
+
+
+def test_converter_round_trip_and_sampling(tmp_path):
+    mixed = {"spots": {"BTN/rfi": {
+        "actions": ["fold", "raise"], "sizes": [0, 2.5],
+        "hands": {"A5s": [0.25, 0.75]}, "hand_sizes": {"A5s": [0, 3.0]}
+    }}}
+    mixed_path = tmp_path / "mixed.json"
+    mixed_path.write_text(json.dumps(mixed), encoding="utf-8")
+    output = str(tmp_path / "strategy.npz")
+    convert([RANGES_PATH, str(mixed_path)], output)
+
+    strategy = MixedStrategy.load(output)
+    spot = strategy.get("BTN", "rfi")
+    assert spot.freqs.dtype == np.float16 and spot.sizes.dtype == np.uint8
+    assert strategy.get("CO", "rfi").frequencies("AA") == {"raise": 1.0, "fold": 0.0}
+
+    hand_ids = np.full(40000, HAND_CLASS_INDEX["A5s"])
+    actions, sizes = spot.sample(hand_ids, np.random.default_rng(5))
+    assert abs((actions == 1).mean() - 0.75) < 0.01
+    assert set(sizes[actions == 1]) == {3.0}
+    assert spot.sample_one(HAND_CLASS_INDEX["A5s"], rand=lambda: 0.1)[0] == "fold"
@@ -0,0 +1,65 @@
+"""
+Test the lockstep multi-table engine against TexasHoldemGame
+"""
+
+import numpy as np
+
+from headless_runner import Policy, play_hand
+from multi_table import NUM_SEATS, MultiTableEngine, random_policy, strategy_policy
+from texas_holdem_complete import Action, Card, TexasHoldemGame, cards_to_mask
+
+
+class ReplayPolicy(Policy):
+    """依序重播多桌引擎記錄下來的動作"""
+
+    def __init__(self, moves):
+        self.moves = iter(moves)
+
+    def act(self, game, player_index):
+        seat, action, amount = next(self.moves)
+        assert seat == player_index
+        return Action(list(Action)[action].value), amount
+
+
+def test_engine_matches_texas_holdem_game():
+    engine = MultiTableEngine(500, rng=np.random.default_rng(8))
+    engine.start_hands(np.arange(500))
+    holes, boards = engine.hole.copy(), engine.board.copy()
+    moves = [[] for _ in range(500)]
+
+    active = np.arange(500)
+    while len(active):
+        mask, call_amount, low, high = engine.legal_actions(active)
+        actions, amounts = random_policy(engine, active, mask, call_amount, low, high)
+        actions, amounts = engine.legalize(active, actions, amounts)
+        for table, seat, action, amount in zip(active, engine.actor[active], actions, amounts):
+            moves[table].append((int(seat), int(action), int(amount)))
+        engine.apply(active, actions, amounts)
+        engine.advance(active)
+        finished = active[engine.done[active]]
+        engine.settle(finished)
+        active = active[~engine.done[active]]
+
+    game = TexasHoldemGame(enable_logging=False)
+    game.initialize_players(human_seat=-1)
+    for table in range(500):
+        game.start_new_hand()
+        for seat, player in enumerate(game.players):
+            player.stack = game.starting_stack - player.current_bet
+            player.hole_cards = [Card.from_id(int(c)) for c in holes[table, seat]]
+            player.hole_mask = cards_to_mask(player.hole_cards)
+        game.deck.cards = [int(c) for c in boards[table]]
+        game.deck.position = 0
+
+        replay = ReplayPolicy(moves[table])
+        play_hand(game, [replay] * NUM_SEATS)
+        assert [p.stack for p in game.players] == engine.stacks[table].tolist()
+        for player in game.players:
+            player.stack = game.starting_stack
+
+
+def test_strategy_policy_conserves_chips():
+    engine = MultiTableEngine(256, rng=np.random.default_rng(2))
+    profit, actions, _ = engine.run(3000, strategy_policy)
+    assert profit.sum() == 0
+    assert actions > 3000
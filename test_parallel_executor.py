@@ -0,0 +1,20 @@
+"""
+Test the process-pool executor used for multi-core equity jobs
+"""
+
+from equity import exact_equity
+from parallel_executor import ParallelExecutor
+
+
+def test_parallel_equity_is_reproducible_and_accurate():
+    expected = exact_equity("AhKh", ["2c2d"], board="Qh Jh 3s").equity
+    with ParallelExecutor(max_workers=2, seed=11) as executor:
+        first = executor.monte_carlo_equity("AhKh", board="Qh Jh 3s", opponent_ranges=[["2c2d"]],
+                                            iterations=40000, chunk_iterations=10000)
+    with ParallelExecutor(max_workers=3, seed=11) as executor:
+        second = executor.monte_carlo_equity("AhKh", board="Qh Jh 3s", opponent_ranges=[["2c2d"]],
+                                             iterations=40000, chunk_iterations=10000)
+
+    assert first.iterations == 40000
+    assert first.equity == second.equity
+    assert abs(first.equity - expected) < 4 * first.std_error
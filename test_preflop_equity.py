@@ -0,0 +1,49 @@
+"""
+Test the preflop equity table generator and memory-mapped lookups
+"""
+
+import numpy as np
+
+import preflop_equity
+from card_codec import HAND_CLASS_INDEX, combo_index, parse_cards
+
+
+def test_generated_tables_round_trip(tmp_path, monkeypatch):
+    class_table, combo_table = preflop_equity.generate_tables(boards=512, seed=3)
+
+    assert class_table.shape == (169, 169)
+    assert np.allclose(class_table + class_table.T, 1.0, atol=1e-5)
+    aa, kk = HAND_CLASS_INDEX["AA"], HAND_CLASS_INDEX["KK"]
+    assert abs(class_table[aa, kk] - 0.82) < 0.03
+
+    blocked = combo_index(*parse_cards("AsAh"))
+    assert np.isnan(combo_table[blocked, combo_index(*parse_cards("AsKd"))])
+
+    class_path, combo_path = str(tmp_path / "c.npy"), str(tmp_path / "k.npy")
+    preflop_equity.save_tables(class_table, combo_table, class_path, combo_path)
+    monkeypatch.setattr(preflop_equity, "CLASS_TABLE_PATH", class_path)
+    monkeypatch.setattr(preflop_equity, "COMBO_TABLE_PATH", combo_path)
+    monkeypatch.setattr(preflop_equity, "_class_table", None)
+    monkeypatch.setattr(preflop_equity, "_combo_table", None)
+
+    assert isinstance(preflop_equity.get_combo_table(), np.memmap)
+    assert preflop_equity.class_equity("AA", "KK") == float(class_table[aa, kk])
+    assert abs(preflop_equity.range_equity("AA", ["KK"]) - preflop_equity.class_equity("AA", "KK")) < 1e-6
+    assert 0.8 < preflop_equity.range_equity("AA") < 0.9
+
+
+def test_equity_line_appears_once_tables_are_generated(tmp_path, monkeypatch):
+    from debug_logger import DebugLogger
+    from texas_holdem_simple import GTOAnalyzer
+
+    class_path, combo_path = str(tmp_path / "c.npy"), str(tmp_path / "k.npy")
+    monkeypatch.setattr(preflop_equity, "CLASS_TABLE_PATH", class_path)
+    monkeypatch.setattr(preflop_equity, "COMBO_TABLE_PATH", combo_path)
+    monkeypatch.setattr(preflop_equity, "_class_table", None)
+    monkeypatch.setattr(preflop_equity, "_combo_table", None)
+    analyzer = GTOAnalyzer(logger=DebugLogger(enabled=False))
+    assert analyzer._get_equity_line("AA", False) == ""
+
+    # 同一個（行程內共用的）分析器在勝率表產生後就會顯示勝率
+    preflop_equity.save_tables(*preflop_equity.generate_tables(boards=64, seed=1), class_path, combo_path)
+    assert "全下勝率" in analyzer._get_equity_line("AA", False)
@@ -0,0 +1,47 @@
+"""
+Test the compiled GTO range index against the raw JSON lists
+"""
+
+import json
+import os
+import shutil
+
+from card_codec import HAND_CLASSES
+from range_index import FACING_RAISE, RANGES_PATH, get_compiled_ranges
+
+
+def test_compiled_ranges_match_json_lists():
+    with open(RANGES_PATH, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    ranges = get_compiled_ranges()
+    assert get_compiled_ranges() is ranges
+
+    for position, scenarios in raw["preflop"]["positions"].items():
+        for hand in HAND_CLASSES:
+            listed = hand in scenarios["rfi"]["raise"] or hand in scenarios["rfi"].get("call", [])
+            assert ranges.contains(position, "rfi", "raise", hand) == (hand in scenarios["rfi"]["raise"])
+            assert ranges.contains(position, "rfi", "fold", hand) == (not listed)
+
+    bb = raw["preflop"]["facing_raise"]["BB_vs_raise"]
+    assert ranges.hands(FACING_RAISE, "BB_vs_raise", "3bet") == [h for h in HAND_CLASSES if h in bb["3bet"]]
+    assert not ranges.contains("UTG", "rfi", "raise", "KQO")
+    assert not ranges.contains("XX", "rfi", "raise", "AA")
+
+
+def test_compiled_ranges_reload_when_the_file_changes(tmp_path):
+    path = str(tmp_path / "ranges.json")
+    shutil.copy(RANGES_PATH, path)
+    ranges = get_compiled_ranges(path)
+    assert get_compiled_ranges(path) is ranges
+
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    raw["preflop"]["positions"]["UTG"]["rfi"]["raise"] = ["AA"]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(raw, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    reloaded = get_compiled_ranges(path)
+    assert reloaded is not ranges
+    assert reloaded.hands("UTG", "rfi", "raise") == ["AA"]
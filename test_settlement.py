@@ -0,0 +1,53 @@
+"""
+Test side-pot and split-pot settlement
+"""
+
+import numpy as np
+
+from settlement import build_side_pots, settle, settle_batch
+
+
+def test_side_pots_from_all_ins():
+    # 座位 0 全下 100，座位 1 全下 300，座位 2、3 各投入 500，座位 3 最後棄牌
+    contributions = [100, 300, 500, 500]
+    folded = [False, False, False, True]
+    assert build_side_pots(contributions, folded) == [(400, [0, 1, 2]), (600, [1, 2]), (400, [2])]
+
+    # 最短的籌碼牌最大：主池給座位 0，其餘依序往外層
+    assert settle(contributions, folded, [9, 5, 1, 0]) == [400, 600, 400, 0]
+    assert settle(contributions, folded, [1, 5, 9, 0]) == [0, 0, 1400, 0]
+
+
+def test_odd_chips_follow_order():
+    contributions = [35, 35, 35]
+    folded = [False, False, False]
+    assert settle(contributions, folded, [7, 7, 3]) == [53, 52, 0]
+    assert settle(contributions, folded, [7, 7, 3], odd_chip_order=[1, 2, 0]) == [52, 53, 0]
+
+
+def _random_hands(rng, count, seats=6):
+    contributions = rng.integers(0, 6, size=(count, seats)) * rng.choice([1, 7, 25, 100], size=(count, seats))
+    folded = rng.random((count, seats)) < 0.4
+    # 至少一位未棄牌
+    folded[np.arange(count), rng.integers(seats, size=count)] = False
+    strengths = rng.integers(0, 4, size=(count, seats))  # 值域小，製造大量平手
+    return contributions, folded, strengths
+
+
+def test_batch_matches_scalar():
+    rng = np.random.default_rng(12)
+    contributions, folded, strengths = _random_hands(rng, 5000)
+    order = [4, 5, 0, 1, 2, 3]
+    batch = settle_batch(contributions, folded, strengths, order)
+    for row in range(len(batch)):
+        expected = settle(contributions[row].tolist(), folded[row].tolist(), strengths[row].tolist(), order)
+        assert batch[row].tolist() == expected
+
+
+def test_chip_conservation_over_million_hands():
+    rng = np.random.default_rng(2024)
+    contributions, folded, strengths = _random_hands(rng, 1_000_000)
+    payouts = settle_batch(contributions, folded, strengths, [4, 5, 0, 1, 2, 3])
+    assert (payouts.sum(axis=1) == contributions.sum(axis=1)).all()
+    assert (payouts[folded] == 0).all()
+    assert (payouts >= 0).all()
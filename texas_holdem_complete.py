@@ -14,7 +14,17 @@ import random
 import json
 import time
 from enum import Enum
-from typing import List, Optional, Dict, Tuple
+from typing import Callable, Iterable, List, Optional, Dict, Tuple
+
+import action_log
+from action_log import ActionLog
+from card_codec import CARD_RANK, CARD_STR, NUM_CARDS, RANKS, SUITS, card_id, cards_to_mask
+from hand_history import get_history_writer
+from hand_evaluator import HandEvaluator
+from mixed_strategy import get_strategy
+from positions import POSTFLOP_ORDER, SEAT_POSITIONS
+from range_index import get_compiled_ranges, hand_class_id
+from settlement import settle
 
 class Action(Enum):
     FOLD = "fold"
@@ -30,35 +40,109 @@ class Street(Enum):
     RIVER = "river"
     SHOWDOWN = "showdown"
 
+# 街在行動紀錄中的代碼
+STREET_INDEX = {street: i for i, street in enumerate(Street)}
+
+# 單手牌行動次數上限，避免策略互相加注造成無窮迴圈
+MAX_ACTIONS_PER_HAND = 200
+
 class Card:
+    """一張牌，以整數編碼 id (0-51) 為準，rank/suit 僅供顯示"""
+    __slots__ = ('id', 'rank', 'suit', 'value')
+    
     def __init__(self, rank: str, suit: str):
-        self.rank = rank
-        self.suit = suit
-        self.value = self._get_value()
+        self.id = card_id(rank, suit)
+        self.rank = RANKS[self.id >> 2]
+        self.suit = SUITS[self.id & 3]
+        self.value = CARD_RANK[self.id]
+    
+    @classmethod
+    def from_id(cls, cid: int) -> 'Card':
+        """取得整數編碼對應的牌（共用的唯讀單例，不建立新物件）"""
+        return CARDS[cid]
+    
+    @classmethod
+    def _make(cls, cid: int) -> 'Card':
+        card = cls.__new__(cls)
+        card.id = cid
+        card.rank = RANKS[cid >> 2]
+        card.suit = SUITS[cid & 3]
+        card.value = CARD_RANK[cid]
+        return card
+    
+    def __int__(self):
+        return self.id
     
-    def _get_value(self) -> int:
-        rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, 
-                       '8': 8, '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-        return rank_values[self.rank]
+    def __eq__(self, other):
+        return isinstance(other, Card) and other.id == self.id
+    
+    def __hash__(self):
+        return self.id
     
     def __str__(self):
-        return f"{self.rank}{self.suit}"
+        return CARD_STR[self.id]
     
     def __repr__(self):
         return str(self)
 
+# 52 張牌的單例，所有牌局共用
+CARDS = tuple(Card._make(cid) for cid in range(NUM_CARDS))
+_ORDERED_DECK = tuple(range(NUM_CARDS))
+
 class Deck:
-    def __init__(self):
+    """
+    牌堆
+    pool 是 52 個牌編碼的固定列表，每手牌以部分 Fisher-Yates 原地交換，只抽出需要的張數
+    cards 是本手牌依發牌順序抽出的牌編碼，發牌只移動 position；一手牌內只會在尾端追加，快照可直接引用
+    """
+    
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng if rng is not None else random.Random()
+        self.pool = list(range(NUM_CARDS))
         self.reset()
     
-    def reset(self):
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
-        suits = ['♠', '♥', '♦', '♣']
-        self.cards = [Card(rank, suit) for rank in ranks for suit in suits]
-        random.shuffle(self.cards)
+    def reset(self, count: int = NUM_CARDS, dead: Iterable[int] = ()):
+        """
+        開始新的一副牌，預先抽出 count 張
+        dead: 不可發出的牌編碼（如已知的手牌與公共牌），移到 pool 前端排除
+        """
+        # 每手牌從固定順序開始抽，牌序只由亂數產生器的狀態決定（可重現）
+        pool = self.pool
+        pool[:] = _ORDERED_DECK
+        low = 0
+        for card in dead:
+            i = pool.index(card)
+            pool[low], pool[i] = pool[i], pool[low]
+            low += 1
+        self.low = low
+        self.cards: List[int] = []
+        self.position = 0
+        self._draw(count)
+    
+    def _draw(self, count: int):
+        """由 pool 尾端往前抽牌：每張只需一次亂數與一次交換"""
+        pool, rand, low, cards = self.pool, self.rng.random, self.low, self.cards
+        top = NUM_CARDS - len(cards)
+        for _ in range(min(count, top - low)):
+            j = low + int(rand() * (top - low))
+            top -= 1
+            pool[j], pool[top] = pool[top], pool[j]
+            cards.append(pool[top])
+    
+    def remaining(self) -> int:
+        """還能發出的張數"""
+        return NUM_CARDS - self.low - self.position
     
     def deal(self, num: int = 1) -> List[Card]:
-        return [self.cards.pop() for _ in range(num)]
+        """發出 num 張牌，超過預先抽出的張數時再補抽"""
+        end = self.position + num
+        if end > len(self.cards):
+            self._draw(end - len(self.cards))
+            if end > len(self.cards):
+                raise ValueError("牌堆剩餘的牌不足")
+        cards = [CARDS[c] for c in self.cards[self.position:end]]
+        self.position = end
+        return cards
 
 class Player:
     def __init__(self, name: str, stack: int, position: str, is_human: bool = False):
@@ -67,15 +151,19 @@ class Player:
         self.position = position
         self.is_human = is_human
         self.hole_cards: List[Card] = []
+        self.hole_mask = 0
         self.current_bet = 0
         self.total_bet_this_street = 0
+        self.total_contributed = 0  # 本手牌的總投入（結算邊池用）
         self.has_acted_this_street = False
         self.is_folded = False
         self.is_all_in = False
         
     def reset_for_new_hand(self):
         self.hole_cards = []
+        self.hole_mask = 0
         self.current_bet = 0
+        self.total_contributed = 0
         self.total_bet_this_street = 0
         self.has_acted_this_street = False
         self.is_folded = False
@@ -87,58 +175,149 @@ class Player:
         self.stack -= actual_bet
         self.current_bet += actual_bet
         self.total_bet_this_street += actual_bet
+        self.total_contributed += actual_bet
         if self.stack == 0:
             self.is_all_in = True
         return actual_bet
 
+class GameState:
+    """
+    牌局快照（建立後不修改，可重複還原）
+    只記錄會變動的欄位；牌序、手牌列表在一手牌內不會原地修改，直接保存引用，
+    因此建立與還原的成本只與座位數有關，與已進行的行動數無關
+    行動紀錄只保存長度，還原時截斷，須依後進先出的順序還原（undo）
+    """
+    __slots__ = ('street', 'pot', 'current_bet', 'min_raise', 'current_player_index',
+                 'last_aggressor_index', 'live_mask', 'all_in_mask', 'to_act_mask', 'deck_cards',
+                 'deck_position', 'board', 'board_mask', 'history_length', 'payouts', 'players')
+    
+    def __init__(self, game: 'TexasHoldemGame'):
+        self.street = game.street
+        self.pot = game.pot
+        self.current_bet = game.current_bet
+        self.min_raise = game.min_raise
+        self.current_player_index = game.current_player_index
+        self.last_aggressor_index = game.last_aggressor_index
+        self.live_mask = game.live_mask
+        self.all_in_mask = game.all_in_mask
+        self.to_act_mask = game.to_act_mask
+        self.deck_cards = game.deck.cards
+        self.deck_position = game.deck.position
+        self.board = tuple(game.community_cards)
+        self.board_mask = game.board_mask
+        self.history_length = len(game.action_history)
+        self.payouts = tuple(game.payouts) if game.payouts is not None else None
+        self.players = tuple(
+            (p.stack, p.current_bet, p.total_bet_this_street, p.total_contributed,
+             p.has_acted_this_street, p.is_folded, p.is_all_in, p.hole_cards, p.hole_mask)
+            for p in game.players
+        )
+    
+    def __eq__(self, other):
+        return isinstance(other, GameState) and all(
+            getattr(self, name) == getattr(other, name) for name in GameState.__slots__)
+    
+    __hash__ = None
+    
+    def restore(self, game: 'TexasHoldemGame'):
+        """把牌局還原到此快照"""
+        game.street = self.street
+        game.pot = self.pot
+        game.current_bet = self.current_bet
+        game.min_raise = self.min_raise
+        game.current_player_index = self.current_player_index
+        game.last_aggressor_index = self.last_aggressor_index
+        game.live_mask = self.live_mask
+        game.all_in_mask = self.all_in_mask
+        game.to_act_mask = self.to_act_mask
+        game.deck.cards = self.deck_cards
+        game.deck.position = self.deck_position
+        game.community_cards = list(self.board)
+        game.board_mask = self.board_mask
+        game.action_history.truncate(self.history_length)
+        game.payouts = list(self.payouts) if self.payouts is not None else None
+        for player, fields in zip(game.players, self.players):
+            (player.stack, player.current_bet, player.total_bet_this_street, player.total_contributed,
+             player.has_acted_this_street, player.is_folded, player.is_all_in,
+             player.hole_cards, player.hole_mask) = fields
+
 class TexasHoldemGame:
     def __init__(self, num_players: int = 6, starting_stack: int = 5000, 
-                 small_blind: int = 50, big_blind: int = 100):
+                 small_blind: int = 50, big_blind: int = 100, enable_logging: bool = True,
+                 seed: Optional[int] = None):
         self.num_players = num_players
+        self.enable_logging = enable_logging
         self.starting_stack = starting_stack
         self.small_blind = small_blind
         self.big_blind = big_blind
-        self.deck = Deck()
+        # 每個牌局使用自己的亂數產生器（洗牌與電腦玩家的混合策略），不影響全域 random
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.deck = Deck(self.rng)
         self.players: List[Player] = []
         self.community_cards: List[Card] = []
+        self.board_mask = 0
         self.pot = 0
         self.current_bet = 0
         self.min_raise = big_blind
         self.street = Street.PREFLOP
-        self.action_history: List[str] = []
+        self.action_history = ActionLog()  # 結構化行動紀錄，顯示時才轉成文字
         self.current_player_index = 0
         self.last_aggressor_index = -1
-        self.num_players_to_act = 0
+        # 行動順序以座位位元遮罩增量維護（process_action、換街時更新），輪到誰的查詢皆為常數時間
+        self.live_mask = 0       # 未棄牌的座位
+        self.all_in_mask = 0     # 已全下的座位
+        self.to_act_mask = 0     # 本條街還需要行動的座位（未行動或下注不足）
+        self.position_index: Dict[str, int] = {}  # 位置 -> 座位
+        self.postflop_first: List[int] = []       # 未棄牌遮罩 -> 翻牌後第一個行動的座位
+        self.odd_chip_seats: List[int] = []
+        self.payouts: Optional[List[int]] = None  # 本手牌結算結果（每個座位獲得的籌碼）
+        self.undo_stack: List[GameState] = []  # apply_action 前的快照，供 undo 使用
         
-        # 載入GTO策略
-        with open('gto_ranges_clean.json', 'r', encoding='utf-8') as f:
-            self.gto_ranges = json.load(f)
+        # 載入GTO策略（行程內共用的編譯結果）
+        self.compiled_ranges = get_compiled_ranges()
+        self.gto_ranges = self.compiled_ranges.raw
+        self.strategy = get_strategy()
     
     def initialize_players(self, human_seat: int = 0):
         """初始化玩家"""
-        positions = ['UTG', 'MP', 'CO', 'BTN', 'SB', 'BB']
         for i in range(self.num_players):
             name = "You" if i == human_seat else f"Player {i+1}"
-            player = Player(name, self.starting_stack, positions[i], is_human=(i == human_seat))
+            player = Player(name, self.starting_stack, SEAT_POSITIONS[i], is_human=(i == human_seat))
             self.players.append(player)
+        
+        # 座位順序表：位置查詢、翻牌後行動順序（依未棄牌遮罩預先算好第一個行動的座位）
+        self.position_index = {player.position: i for i, player in enumerate(self.players)}
+        self.odd_chip_seats = [self.position_index[pos] for pos in POSTFLOP_ORDER if pos in self.position_index]
+        self.postflop_first = [next((seat for seat in self.odd_chip_seats if mask >> seat & 1), -1)
+                               for mask in range(1 << self.num_players)]
     
-    def start_new_hand(self):
-        """開始新的一手牌"""
-        self.deck.reset()
+    def start_new_hand(self, seed: Optional[int] = None):
+        """開始新的一手牌；指定 seed 時先重設亂數產生器，可單獨重現這一手牌"""
+        if seed is not None:
+            self.rng.seed(seed)
+        # 只抽出本手牌需要的牌：每人 2 張手牌加 5 張公共牌
+        self.deck.reset(2 * self.num_players + 5)
         self.community_cards = []
+        self.board_mask = 0
         self.pot = 0
         self.current_bet = 0
         self.min_raise = self.big_blind
         self.street = Street.PREFLOP
-        self.action_history = []
+        self.action_history = ActionLog([p.name for p in self.players])
+        self.payouts = None
+        self.undo_stack = []
         
         # 重置玩家狀態
         for player in self.players:
             player.reset_for_new_hand()
+        self.live_mask = self.to_act_mask = (1 << self.num_players) - 1
+        self.all_in_mask = 0
         
         # 發手牌
         for player in self.players:
             player.hole_cards = self.deck.deal(2)
+            player.hole_mask = cards_to_mask(player.hole_cards)
         
         # 收盲注
         self.post_blinds()
@@ -154,22 +333,21 @@ class TexasHoldemGame:
         # 小盲
         sb_amount = self.players[sb_index].bet_amount(self.small_blind)
         self.pot += sb_amount
-        self.action_history.append(f"{self.players[sb_index].name} posts SB ${sb_amount}")
+        self._update_turn_state(sb_index)
+        self.action_history.append(sb_index, action_log.POST_SB, sb_amount, 0)
         
         # 大盲
         bb_amount = self.players[bb_index].bet_amount(self.big_blind)
         self.pot += bb_amount
+        self._update_turn_state(bb_index)
         self.current_bet = self.big_blind
-        self.action_history.append(f"{self.players[bb_index].name} posts BB ${bb_amount}")
+        self.action_history.append(bb_index, action_log.POST_BB, bb_amount, 0)
         
         self.last_aggressor_index = bb_index
     
     def get_position_index(self, position: str) -> int:
         """獲取指定位置的玩家索引"""
-        for i, player in enumerate(self.players):
-            if player.position == position:
-                return i
-        return -1
+        return self.position_index.get(position, -1)
     
     def set_first_player_to_act(self):
         """設定第一個需要行動的玩家"""
@@ -177,21 +355,64 @@ class TexasHoldemGame:
             # Preflop: UTG第一個行動
             self.current_player_index = self.get_position_index('UTG')
         else:
-            # Postflop: 從SB開始找第一個還在的玩家
-            positions_order = ['SB', 'BB', 'UTG', 'MP', 'CO', 'BTN']
-            for pos in positions_order:
-                idx = self.get_position_index(pos)
-                if idx >= 0 and not self.players[idx].is_folded:
-                    self.current_player_index = idx
-                    break
-        
-        self.count_players_to_act()
+            # Postflop: 從SB開始第一個還在的玩家（查表）
+            first = self.postflop_first[self.live_mask]
+            if first >= 0:
+                self.current_player_index = first
     
-    def count_players_to_act(self):
+    @property
+    def num_players_to_act(self) -> int:
+        """還需要行動的玩家數"""
+        return self.to_act_mask.bit_count()
+    
+    def count_players_to_act(self) -> int:
         """計算還需要行動的玩家數"""
-        self.num_players_to_act = sum(1 for p in self.players 
-                                     if not p.is_folded and not p.is_all_in 
-                                     and (not p.has_acted_this_street or p.current_bet < self.current_bet))
+        return self.num_players_to_act
+    
+    def needs_to_act(self, player_index: int) -> bool:
+        """玩家本條街是否還需要行動（未行動或下注不足，且未棄牌、未全下）"""
+        return player_index >= 0 and (self.to_act_mask >> player_index) & 1 == 1
+    
+    def current_actor(self) -> int:
+        """目前該行動的玩家：目前玩家仍需行動時就是他，否則為下一個需要行動的玩家；-1 表示沒有人需要行動"""
+        if self.needs_to_act(self.current_player_index):
+            return self.current_player_index
+        return self.get_next_player_index()
+    
+    def advance(self, choose_action: Callable[[int], Tuple[Action, int]],
+                max_actions: int = MAX_ACTIONS_PER_HAND) -> int:
+        """
+        連續執行電腦玩家的行動，直到輪到真人玩家或手牌結束，返回執行的行動數
+        choose_action(座位) 返回電腦玩家的 (動作, 金額)，須為合法動作
+        沒有人需要行動時（下注輪結束或其餘玩家全下）自動發下一條街；不結算底池
+        """
+        actions = 0
+        while self.should_continue_hand():
+            actor = self.current_actor()
+            if actor == -1 or actions >= max_actions:
+                self.move_to_next_street()
+                continue
+            self.current_player_index = actor
+            if self.players[actor].is_human:
+                break
+            action, amount = choose_action(actor)
+            self.process_action(actor, action, amount)
+            actions += 1
+        return actions
+    
+    def _update_turn_state(self, player_index: int):
+        """玩家下注或行動後，更新該座位在各遮罩中的位元"""
+        player = self.players[player_index]
+        bit = 1 << player_index
+        if player.is_folded:
+            self.live_mask &= ~bit
+        if player.is_all_in:
+            self.all_in_mask |= bit
+        if (player.is_folded or player.is_all_in
+                or (player.has_acted_this_street and player.current_bet >= self.current_bet)):
+            self.to_act_mask &= ~bit
+        else:
+            self.to_act_mask |= bit
     
     def get_active_players(self) -> List[Player]:
         """獲取還在牌局中的玩家"""
@@ -202,21 +423,8 @@ class TexasHoldemGame:
         return [p for p in self.players if not p.is_folded]
     
     def is_betting_round_complete(self) -> bool:
-        """檢查當前下注輪是否結束"""
-        active_players = [p for p in self.players if not p.is_folded and not p.is_all_in]
-        
-        # 只剩一個玩家
-        if len(self.get_active_players()) <= 1:
-            return True
-        
-        # 所有還能行動的玩家都已經行動且下注相同
-        for player in active_players:
-            if not player.has_acted_this_street:
-                return False
-            if player.current_bet < self.current_bet:
-                return False
-        
-        return True
+        """檢查當前下注輪是否結束：只剩一個玩家，或所有還能行動的玩家都已經行動且下注相同"""
+        return self.live_mask.bit_count() <= 1 or self.to_act_mask == 0
     
     def move_to_next_street(self):
         """進入下一條街"""
@@ -228,49 +436,47 @@ class TexasHoldemGame:
         
         self.current_bet = 0
         self.min_raise = self.big_blind
+        self.to_act_mask = self.live_mask & ~self.all_in_mask
         
         if self.street == Street.PREFLOP:
             self.street = Street.FLOP
-            self.community_cards.extend(self.deck.deal(3))
-            self.action_history.append(f"\n=== FLOP: {' '.join(str(c) for c in self.community_cards[-3:])} ===")
+            self.deal_community_cards(3)
+            self.action_history.deal([c.id for c in self.community_cards[-3:]], action_log.FLOP)
         elif self.street == Street.FLOP:
             self.street = Street.TURN
-            self.community_cards.extend(self.deck.deal(1))
-            self.action_history.append(f"\n=== TURN: {self.community_cards[-1]} ===")
+            self.deal_community_cards(1)
+            self.action_history.deal([self.community_cards[-1].id], action_log.TURN)
         elif self.street == Street.TURN:
             self.street = Street.RIVER
-            self.community_cards.extend(self.deck.deal(1))
-            self.action_history.append(f"\n=== RIVER: {self.community_cards[-1]} ===")
+            self.deal_community_cards(1)
+            self.action_history.deal([self.community_cards[-1].id], action_log.RIVER)
         elif self.street == Street.RIVER:
             self.street = Street.SHOWDOWN
-            self.action_history.append("\n=== SHOWDOWN ===")
+            self.action_history.deal([], action_log.SHOWDOWN)
         
         self.set_first_player_to_act()
         
-        # Debug
-        from debug_logger import DebugLogger
-        debug_logger = DebugLogger()
-        debug_logger.log(f"進入 {self.street.name}, 第一個行動玩家索引: {self.current_player_index}")
+        # Debug（使用共用的 logger，避免每條街重建而清空日誌）
+        if self.enable_logging:
+            from debug_logger import debug_logger
+            debug_logger.log(f"進入 {self.street.name}, 第一個行動玩家索引: {self.current_player_index}")
+    
+    def deal_community_cards(self, num: int):
+        """發公共牌並更新公共牌遮罩"""
+        cards = self.deck.deal(num)
+        self.community_cards.extend(cards)
+        self.board_mask |= cards_to_mask(cards)
     
     def get_next_player_index(self) -> int:
-        """獲取下一個需要行動的玩家索引"""
-        start_idx = self.current_player_index
-        idx = start_idx
-        attempts = 0
-        
-        while attempts < self.num_players:
-            idx = (idx + 1) % self.num_players
-            attempts += 1
-            player = self.players[idx]
-            
-            # 找到下一個需要行動的玩家
-            if not player.is_folded and not player.is_all_in:
-                # 如果還沒行動，或者下注不夠，則需要行動
-                if not player.has_acted_this_street or player.current_bet < self.current_bet:
-                    return idx
-        
-        # 沒有找到需要行動的玩家
-        return -1
+        """獲取下一個需要行動的玩家索引：目前玩家之後循環第一個，目前玩家最後檢查；沒有時返回 -1"""
+        mask = self.to_act_mask
+        if not mask:
+            return -1
+        start = (self.current_player_index + 1) % self.num_players
+        # 先找 start 之後的座位，沒有時從座位 0 繞回
+        later = mask >> start << start
+        bits = later if later else mask
+        return (bits & -bits).bit_length() - 1
     
     def get_valid_actions(self, player: Player) -> List[Tuple[Action, int, int]]:
         """獲取玩家的有效動作 (action, min_amount, max_amount)"""
@@ -307,22 +513,24 @@ class TexasHoldemGame:
         return actions
     
     def process_action(self, player_index: int, action: Action, amount: int = 0):
-        """處理玩家動作"""
+        """處理玩家動作（分析器建議的金額可能是浮點數，籌碼一律以整數計算）"""
+        amount = int(amount)
         player = self.players[player_index]
         player.has_acted_this_street = True
+        street = STREET_INDEX[self.street]
         
         if action == Action.FOLD:
             player.is_folded = True
-            self.action_history.append(f"{player.name} folds")
+            self.action_history.append(player_index, action_log.FOLD, 0, street)
             
         elif action == Action.CHECK:
-            self.action_history.append(f"{player.name} checks")
+            self.action_history.append(player_index, action_log.CHECK, 0, street)
             
         elif action == Action.CALL:
             call_amount = self.current_bet - player.current_bet
             actual_bet = player.bet_amount(call_amount)
             self.pot += actual_bet
-            self.action_history.append(f"{player.name} calls ${actual_bet}")
+            self.action_history.append(player_index, action_log.CALL, actual_bet, street)
             
         elif action == Action.BET:
             actual_bet = player.bet_amount(amount)
@@ -330,7 +538,7 @@ class TexasHoldemGame:
             self.current_bet = player.current_bet
             self.min_raise = actual_bet
             self.last_aggressor_index = player_index
-            self.action_history.append(f"{player.name} bets ${actual_bet}")
+            self.action_history.append(player_index, action_log.BET, actual_bet, street)
             
             # 其他玩家需要重新行動
             for p in self.players:
@@ -348,30 +556,53 @@ class TexasHoldemGame:
             
             self.current_bet = raise_to
             self.last_aggressor_index = player_index
-            self.action_history.append(f"{player.name} raises to ${raise_to}")
+            self.action_history.append(player_index, action_log.RAISE, raise_to, street)
             
             # 其他玩家需要重新行動
             for p in self.players:
                 if not p.is_folded and p != player:
                     p.has_acted_this_street = False
+        
+        if action in (Action.BET, Action.RAISE):
+            self.to_act_mask = self.live_mask & ~self.all_in_mask
+        self._update_turn_state(player_index)
+    
+    def snapshot(self) -> GameState:
+        """建立目前牌局的快照"""
+        return GameState(self)
+    
+    def restore(self, state: GameState):
+        """還原到指定快照"""
+        state.restore(self)
+    
+    def apply_action(self, player_index: int, action: Action, amount: int = 0):
+        """處理動作並記錄還原點（搜尋與假設分析用）"""
+        self.undo_stack.append(GameState(self))
+        self.process_action(player_index, action, amount)
+    
+    def undo(self) -> bool:
+        """撤銷最後一個 apply_action，沒有可撤銷的動作時返回 False"""
+        if not self.undo_stack:
+            return False
+        self.undo_stack.pop().restore(self)
+        return True
     
     def get_hand_string(self, cards: List[Card]) -> str:
         """轉換手牌為標準格式（如 AKs, 99）"""
         if len(cards) != 2:
             return ""
         
-        rank1, rank2 = cards[0].rank, cards[1].rank
-        suit1, suit2 = cards[0].suit, cards[1].suit
+        id1, id2 = cards[0].id, cards[1].id
         
-        # 按牌力排序
-        if cards[1].value > cards[0].value:
-            rank1, rank2 = rank2, rank1
-            suit1, suit2 = suit2, suit1
+        # 按牌力排序（整數編碼的高位即點數）
+        if id2 > id1:
+            id1, id2 = id2, id1
         
+        rank1, rank2 = RANKS[id1 >> 2], RANKS[id2 >> 2]
         if rank1 == rank2:
             return rank1 + rank2
         else:
-            suited = "s" if suit1 == suit2 else "o"
+            suited = "s" if (id1 & 3) == (id2 & 3) else "o"
             return rank1 + rank2 + suited
     
     def get_gto_action(self, player: Player) -> Tuple[Action, int]:
@@ -379,43 +610,47 @@ class TexasHoldemGame:
         hand = self.get_hand_string(player.hole_cards)
         valid_actions = self.get_valid_actions(player)
         
-        # Preflop策略
+        # Preflop策略（依混合頻率策略抽樣，純策略的手牌不消耗亂數）
         if self.street == Street.PREFLOP:
+            hand_id = hand_class_id(hand)
+            
             # BB可以check
             if player.position == 'BB' and self.current_bet == self.big_blind and player.current_bet == self.big_blind:
                 # BB面對limp，根據手牌決定
-                if player.position in self.gto_ranges["preflop"]["positions"]:
-                    ranges = self.gto_ranges["preflop"]["positions"][player.position]["rfi"]
-                    if hand in ranges["raise"]:
+                spot = self.strategy.get(player.position, "vs_limp")
+                if spot is not None and hand_id >= 0:
+                    choice, size = spot.sample_one(hand_id, self.rng.random)
+                    if choice == "raise":
                         # 強牌加注
                         for action, min_amt, max_amt in valid_actions:
                             if action == Action.RAISE:
-                                return Action.RAISE, int(self.current_bet * 3)
+                                return Action.RAISE, int(self.current_bet * size)
                 return Action.CHECK, 0
             
             # 一般RFI情況
             if self.current_bet <= self.big_blind:
-                if player.position in self.gto_ranges["preflop"]["positions"]:
-                    ranges = self.gto_ranges["preflop"]["positions"][player.position]["rfi"]
-                    if hand in ranges["raise"]:
+                spot = self.strategy.get(player.position, "rfi")
+                if spot is not None and hand_id >= 0:
+                    choice, size = spot.sample_one(hand_id, self.rng.random)
+                    if choice == "raise":
                         for action, min_amt, max_amt in valid_actions:
                             if action == Action.RAISE:
-                                return Action.RAISE, int(self.current_bet * 2.5)
+                                return Action.RAISE, int(self.current_bet * size)
                         for action, min_amt, max_amt in valid_actions:
                             if action == Action.BET:
-                                return Action.BET, int(self.big_blind * 2.5)
+                                return Action.BET, int(self.big_blind * size)
                 return Action.FOLD, 0
             
             # 面對加注
             else:
-                if player.position in self.gto_ranges["preflop"]["positions"]:
-                    ranges = self.gto_ranges["preflop"]["positions"][player.position]["rfi"]
-                    if hand in ranges["raise"]:
-                        # 強牌可以跟注或3-bet
-                        if random.random() < 0.3:  # 30% 3-bet
-                            for action, min_amt, max_amt in valid_actions:
-                                if action == Action.RAISE:
-                                    return Action.RAISE, int(self.current_bet * 2.5)
+                spot = self.strategy.get(player.position, "vs_raise")
+                if spot is not None and hand_id >= 0:
+                    choice, size = spot.sample_one(hand_id, self.rng.random)
+                    if choice == "raise":
+                        for action, min_amt, max_amt in valid_actions:
+                            if action == Action.RAISE:
+                                return Action.RAISE, int(self.current_bet * size)
+                    if choice in ("raise", "call"):
                         for action, min_amt, max_amt in valid_actions:
                             if action == Action.CALL:
                                 return Action.CALL, min_amt
@@ -425,7 +660,7 @@ class TexasHoldemGame:
         else:
             # 沒有下注時
             if self.current_bet == 0:
-                if random.random() < 0.3:  # 30%下注
+                if self.rng.random() < 0.3:  # 30%下注
                     for action, min_amt, max_amt in valid_actions:
                         if action == Action.BET:
                             bet_size = int(self.pot * 0.5)
@@ -433,7 +668,7 @@ class TexasHoldemGame:
                 return Action.CHECK, 0
             # 面對下注
             else:
-                if random.random() < 0.7:  # 70%跟注
+                if self.rng.random() < 0.7:  # 70%跟注
                     for action, min_amt, max_amt in valid_actions:
                         if action == Action.CALL:
                             return Action.CALL, min_amt
@@ -441,22 +676,39 @@ class TexasHoldemGame:
     
     def should_continue_hand(self) -> bool:
         """判斷是否應該繼續這手牌"""
-        active_players = self.get_active_players()
-        return len(active_players) > 1 and self.street != Street.SHOWDOWN
+        return self.live_mask.bit_count() > 1 and self.street != Street.SHOWDOWN
     
-    def determine_winner(self):
-        """決定贏家（簡化版，只處理最後一人）"""
+    def odd_chip_order(self) -> List[int]:
+        """平分底池時零頭的分配順序：從按鈕左手邊（SB）開始"""
+        return self.odd_chip_seats
+    
+    def determine_winner(self) -> List[int]:
+        """
+        結算底池（含邊池與平分），返回每個座位獲得的籌碼
+        同一手牌只結算一次，重複呼叫（如 UI 重繪）直接返回第一次的結果
+        """
+        if self.payouts is not None:
+            return self.payouts
+        
         active_players = self.get_active_players()
+        contributions = [p.total_contributed for p in self.players]
+        folded = [p.is_folded for p in self.players]
         
         if len(active_players) == 1:
-            winner = active_players[0]
-            winner.stack += self.pot
-            self.action_history.append(f"\n{winner.name} wins ${self.pot}")
+            strengths = [0] * len(self.players)
         else:
-            # 簡化處理：隨機選一個贏家
-            winner = random.choice(active_players)
-            winner.stack += self.pot
-            self.action_history.append(f"\n{winner.name} wins ${self.pot} at showdown")
+            strengths = [0 if p.is_folded else HandEvaluator.evaluate_ids([c.id for c in p.hole_cards + self.community_cards])
+                         for p in self.players]
+        
+        self.payouts = settle(contributions, folded, strengths, self.odd_chip_order())
+        
+        code = action_log.WIN_SHOWDOWN if len(active_players) > 1 else action_log.WIN
+        street = STREET_INDEX[self.street]
+        for seat, (player, amount) in enumerate(zip(self.players, self.payouts)):
+            if amount > 0:
+                player.stack += amount
+                self.action_history.append(seat, code, amount, street)
+        return self.payouts
 
 def main():
     st.set_page_config(page_title="德州撲克 GTO 訓練器", layout="wide")
@@ -479,13 +731,12 @@ def main():
         st.divider()
         
         if st.button("🎯 開始新局", type="primary", use_container_width=True):
-            # 確保真正隨機化
-            random.seed(int(time.time() * 1000) % 2**32)
-            
+            # 每局使用自己的種子，不影響其他工作階段
             game = TexasHoldemGame(starting_stack=starting_stack, 
                                  small_blind=small_blind, 
-                                 big_blind=big_blind)
-            human_position = random.randint(0, 5)
+                                 big_blind=big_blind,
+                                 seed=int(time.time() * 1000) % 2**32)
+            human_position = game.rng.randint(0, 5)
             game.initialize_players(human_seat=human_position)
             game.start_new_hand()
             
@@ -743,6 +994,10 @@ def main():
         # 手牌結束
         else:
             game.determine_winner()
+            # 匯出手牌紀錄（重繪時不重複寫入）
+            if st.session_state.get('exported_game') is not game:
+                get_history_writer().write(game)
+                st.session_state.exported_game = game
             st.markdown("### 🏁 本手牌結束")
             
             # GTO分析報告
@@ -766,12 +1021,13 @@ def main():
                         is_correct = False
                         suggestion = ""
                         
-                        if position in st.session_state.game.gto_ranges["preflop"]["positions"]:
-                            ranges = st.session_state.game.gto_ranges["preflop"]["positions"][position]["rfi"]
+                        compiled_ranges = st.session_state.game.compiled_ranges
+                        if compiled_ranges.has_position(position):
+                            in_raise_range = compiled_ranges.contains(position, "rfi", "raise", hand)
                             
                             if decision["current_bet"] <= st.session_state.game.big_blind:
                                 # RFI情況
-                                if hand in ranges["raise"]:
+                                if in_raise_range:
                                     is_correct = (action in ["bet", "raise"])
                                     suggestion = f"{hand} 在 {position} 應該加注"
                                 else:
@@ -779,7 +1035,7 @@ def main():
                                     suggestion = f"{hand} 在 {position} 應該棄牌"
                             else:
                                 # 面對加注
-                                if hand in ranges["raise"]:
+                                if in_raise_range:
                                     is_correct = (action in ["call", "raise"])
                                     suggestion = f"{hand} 在 {position} 面對加注可以跟注或再加注"
                                 else:
@@ -798,14 +1054,12 @@ def main():
             
             # 重新開始按鈕
             if st.button("🎲 下一手牌", type="primary", use_container_width=True):
-                # 重新隨機化位置
-                random.seed(int(time.time() * 1000) % 2**32)
-                
-                # 重建遊戲
+                # 重建遊戲（新種子，重新隨機化位置）
                 new_game = TexasHoldemGame(starting_stack=game.starting_stack,
                                          small_blind=game.small_blind,
-                                         big_blind=game.big_blind)
-                human_position = random.randint(0, 5)
+                                         big_blind=game.big_blind,
+                                         seed=int(time.time() * 1000) % 2**32)
+                human_position = new_game.rng.randint(0, 5)
                 new_game.initialize_players(human_seat=human_position)
                 new_game.start_new_hand()
                 
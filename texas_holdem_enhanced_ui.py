@@ -4,9 +4,8 @@ Enhanced UI version with better visual design
 """
 
 import streamlit as st
-import random
+import html
 import json
-import time
 from enum import Enum
 from typing import List, Optional, Dict, Tuple
 import sys
@@ -110,6 +109,29 @@ st.markdown("""
         color: #212529;
     }
     
+    /* 撲克桌中央：底池與公共牌 */
+    .poker-table h2.pot {
+        text-align: center;
+        color: white;
+    }
+    
+    .poker-table .board, .board-message {
+        text-align: center;
+        margin: 20px 0;
+    }
+    
+    .board-message {
+        color: white;
+    }
+    
+    .hole-cards {
+        text-align: center;
+    }
+    
+    .player-card.human {
+        border-color: #FFD700;
+    }
+    
     /* 按鈕樣式 - 現代化設計 */
     .stButton > button {
         background: linear-gradient(145deg, #007bff, #0056b3);
@@ -160,6 +182,28 @@ st.markdown("""
         box-shadow: inset 0 2px 6px rgba(0,0,0,0.3);
     }
     
+    /* 電腦玩家行動重播 - 逐行淡入 */
+    .bot-replay {
+        background: rgba(0,0,0,0.35);
+        border-left: 4px solid #d4af37;
+        border-radius: 8px;
+        padding: 10px 15px;
+        margin: 10px 0;
+        color: #e2e8f0;
+        font-family: 'Courier New', monospace;
+        font-size: 14px;
+    }
+    
+    .bot-replay div {
+        opacity: 0;
+        animation: replay-in 0.3s ease forwards;
+    }
+    
+    @keyframes replay-in {
+        from { opacity: 0; transform: translateX(-8px); }
+        to { opacity: 1; transform: none; }
+    }
+    
     /* GTO 建議框 - 更突出的設計 */
     .gto-suggestion {
         background: linear-gradient(135deg, #6366f1 0%, #8b5cf6 50%, #d946ef 100%);
@@ -209,102 +253,37 @@ st.markdown("""
 # 從簡化版本導入所有必要的類和函數
 from texas_holdem_simple import *
 from hand_evaluator import HandEvaluator, HandRank
+from hand_history import get_history_writer
+from card_html import hole_cards_html, player_card_html, table_html
+from decision_log import DecisionLog, REPORT_PAGE_SIZE
+from headless_runner import AnalyzerPolicy, policy_action
+from shared_resources import get_analyzer, get_bot_analyzer, warm_up
 
-def get_card_html(card, size="normal"):
-    """生成卡片的 HTML"""
-    # Map both letter codes and symbols
-    suit_symbols = {
-        "s": ("♠", "black"),
-        "h": ("♥", "red"),
-        "d": ("♦", "red"),
-        "c": ("♣", "black"),
-        "♠": ("♠", "black"),
-        "♥": ("♥", "red"),
-        "♦": ("♦", "red"),
-        "♣": ("♣", "black")
-    }
-    
-    # Handle Card object - it's a Card class instance from texas_holdem_complete
-    if hasattr(card, 'rank') and hasattr(card, 'suit'):
-        rank = card.rank
-        suit = card.suit
-    else:
-        # Fallback for dict-like objects
-        rank = card.get("rank", "?") if hasattr(card, 'get') else "?"
-        suit = card.get("suit", "?") if hasattr(card, 'get') else "?"
-    
-    # Get symbol and color
-    symbol, color = suit_symbols.get(suit, (suit, "black"))  # Use suit directly if not found
-    
-    # Make sure we have valid values
-    if not rank or rank == "?":
-        rank = "?"
-    if not symbol:
-        symbol = "?"
-    
-    if size == "normal":
-        return f'<div class="hole-card {color}">{rank}{symbol}</div>'
-    else:
-        return f'<div class="community-card {color}">{rank}{symbol}</div>'
+# 電腦行動重播時每行的間隔（秒）
+REPLAY_STEP = 0.25
+
+# 局部重繪（st.fragment 需要 Streamlit 1.37+，較舊版本退回 experimental_fragment，都沒有時整頁重繪）
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+HUMAN_ACTIONS = {"fold": Action.FOLD, "check": Action.CHECK, "call": Action.CALL,
+                 "bet": Action.BET, "raise": Action.RAISE}
+
+def escape_text(text: str) -> str:
+    """純文字放進 HTML：跳脫標籤與 $（避免 markdown 把兩個金額之間當成數學式）"""
+    return html.escape(text).replace("$", "&#36;")
 
 def display_poker_table(game):
     """顯示撲克桌"""
-    st.markdown('<div class="poker-table">', unsafe_allow_html=True)
-    
-    # 顯示底池
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        st.markdown(f'<h2 style="text-align: center; color: white;">底池: <span class="chip-display">${game.pot}</span></h2>', unsafe_allow_html=True)
-        
-        # 顯示公共牌
-        if game.community_cards and len(game.community_cards) > 0:
-            # Create community cards container
-            cards_container = '<div style="text-align: center; margin: 20px 0;">'
-            
-            for card in game.community_cards:
-                if hasattr(card, 'rank') and hasattr(card, 'suit'):
-                    rank = card.rank
-                    suit = card.suit
-                    # Determine color based on suit
-                    if suit in ['♥', '♦', 'h', 'd']:
-                        color = '#FF0000'
-                    else:
-                        color = '#000000'
-                    # Create card HTML as a single line
-                    cards_container += f'<div style="display: inline-block; width: 70px; height: 90px; margin: 0 5px; background: white; border: 2px solid #333; border-radius: 5px; text-align: center; line-height: 90px; font-size: 28px; font-weight: bold; box-shadow: 0 3px 8px rgba(0,0,0,0.4); color: {color};">{rank}{suit}</div>'
-                else:
-                    cards_container += get_card_html(card, "large")
-            
-            cards_container += '</div>'
-            st.markdown(cards_container, unsafe_allow_html=True)
-        else:
-            # 顯示空的牌位或等待訊息
-            if game.street == Street.PREFLOP:
-                st.markdown('<div style="text-align: center; margin: 20px 0; color: white;">等待翻牌...</div>', unsafe_allow_html=True)
-            else:
-                st.markdown('<div style="text-align: center; margin: 20px 0; color: white;">沒有公共牌</div>', unsafe_allow_html=True)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
+        board = [card.id for card in game.community_cards]
+        st.markdown(table_html(game.pot, board, game.street == Street.PREFLOP), unsafe_allow_html=True)
 
 def display_player_info(player, game):
-    """顯示玩家資訊"""
-    if player.is_human:
-        st.markdown('<div class="player-card" style="border-color: #FFD700;">', unsafe_allow_html=True)
-    else:
-        st.markdown('<div class="player-card">', unsafe_allow_html=True)
-    
-    # 玩家名稱和位置
-    st.markdown(f'<h4>{player.name} ({player.position})</h4>', unsafe_allow_html=True)
-    
-    # 籌碼
-    st.markdown(f'<p>籌碼: <span class="chip-display">${player.stack}</span></p>', unsafe_allow_html=True)
-    
-    # 手牌（只顯示人類玩家的）
-    if player.is_human and player.hole_cards:
-        cards_html = "".join([get_card_html(card) for card in player.hole_cards])
-        st.markdown(f'<div style="text-align: center;">{cards_html}</div>', unsafe_allow_html=True)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
+    """顯示玩家資訊（手牌只顯示人類玩家的）"""
+    hole = [card.id for card in player.hole_cards] if player.is_human else ()
+    st.markdown(player_card_html(player.name, player.position, player.stack, player.is_human, hole),
+                unsafe_allow_html=True)
 
 def display_gto_suggestion(suggestion):
     """顯示 GTO 建議"""
@@ -334,20 +313,88 @@ def display_gto_suggestion(suggestion):
 def display_action_history(game):
     """顯示行動歷史"""
     if game.action_history:
-        st.markdown('<div class="action-history">', unsafe_allow_html=True)
-        for action in game.action_history[-10:]:  # 只顯示最近10個行動
-            st.text(action)
-        st.markdown('</div>', unsafe_allow_html=True)
+        # 只顯示最近10個行動，合成一個元素送出
+        lines = "\n".join(escape_text(action) for action in game.action_history[-10:])
+        st.markdown(f'<div class="action-history" style="white-space: pre-line;">{lines}</div>',
+                    unsafe_allow_html=True)
+
+def display_bot_replay(game):
+    """重播上一批電腦玩家的行動（同一次重繪中執行完畢，顯示時逐行淡入）"""
+    replay = st.session_state.get('bot_replay')
+    if not replay:
+        return
+    start, end = replay
+    items = "".join(
+        f'<div style="animation-delay: {i * REPLAY_STEP:.2f}s">{escape_text(line.strip())}</div>'
+        for i, line in enumerate(game.action_history[start:end])
+    )
+    st.markdown(f'<div class="bot-replay"><b>🤖 電腦玩家行動</b>{items}</div>', unsafe_allow_html=True)
+
+def start_hand(starting_stack: int, small_blind: int, big_blind: int):
+    """開始新的一手牌（按鈕回呼，在重繪前執行，不需要再 st.rerun）"""
+    game = TexasHoldemGame(starting_stack=starting_stack,
+                           small_blind=small_blind,
+                           big_blind=big_blind)
+    human_position = game.rng.randint(0, 5)
+    game.initialize_players(human_seat=human_position)
+    game.start_new_hand()
+    
+    st.session_state.game = game
+    st.session_state.hand_count = st.session_state.get('hand_count', 0) + 1
+    # 決策紀錄保留整個工作階段，報告回到第 1 頁（最新的決策）
+    if 'decision_log' not in st.session_state:
+        st.session_state.decision_log = DecisionLog()
+    st.session_state.decision_log.new_hand()
+    st.session_state.report_page = 1
+    st.session_state.gto_analyzer = get_analyzer(GTOAnalyzer)  # 範圍檔更新後換成新的分析器
+    st.session_state.bot_analyzer = get_bot_analyzer(GTOAnalyzer)  # 真人的建議說明才需要勝率
+    st.session_state.bot_replay = None
+    # 每手牌的重繪次數（衡量伺服器負擔）：牌局區域的執行次數與其中整頁重繪的次數
+    st.session_state.last_hand_reruns = st.session_state.get('reruns_this_hand', 0)
+    st.session_state.reruns_this_hand = 0
+    st.session_state.page_runs_this_hand = 0
 
-def display_analysis_report(decisions, gto_analyzer, game=None):
-    """顯示增強版分析報告"""
+def on_human_action(action_name: str, amount: int = 0, amount_key: Optional[str] = None):
+    """真人玩家行動按鈕的回呼：記錄決策分析並處理動作（下注金額從 amount_key 的輸入框讀取）"""
+    game = st.session_state.game
+    index = game.current_player_index
+    player = game.players[index]
+    # 重複點擊或過期的按鈕不處理
+    if not player.is_human or not game.needs_to_act(index):
+        return
+    if amount_key is not None:
+        amount = int(st.session_state[amount_key])
+    
+    hand_str = game.get_hand_string(player.hole_cards)
+    st.session_state.decision_log.add(st.session_state.gto_analyzer.judge_decision(
+        hand_str, player.position, action_name, amount, game.current_bet, game.big_blind, game.street, game
+    ))
+    
+    game.process_action(index, HUMAN_ACTIONS[action_name], amount)
+    st.session_state.bot_replay = None
+
+def advance_computer_players(game):
+    """一次執行完輪到真人之前的所有電腦行動（含發牌），記錄這批行動供重播"""
+    start = len(game.action_history)
+    policy = AnalyzerPolicy(st.session_state.bot_analyzer)
+    game.advance(lambda seat: policy_action(game, policy, seat))
+    if len(game.action_history) > start:
+        st.session_state.bot_replay = (start, len(game.action_history))
+
+@fragment
+def display_analysis_report(decision_log, gto_analyzer, game=None):
+    """
+    顯示增強版分析報告
+    統計數字由決策紀錄累加，決策細節分頁顯示整個工作階段（最新的在第 1 頁），詳細分析只為目前這一頁產生
+    報告是牌局區域內的獨立片段：換頁只重新執行報告，不重繪撲克桌與玩家
+    """
     st.markdown('<div class="analysis-report">', unsafe_allow_html=True)
     
     st.markdown("## 📊 手牌分析報告")
     
-    total = len(decisions)
-    correct = sum(1 for d in decisions if d['is_correct'])
-    accuracy = (correct / total * 100) if total > 0 else 0
+    total = decision_log.hand_total
+    correct = decision_log.hand_correct
+    accuracy = DecisionLog.accuracy(correct, total)
     
     # 總體表現
     col1, col2, col3 = st.columns(3)
@@ -357,6 +404,8 @@ def display_analysis_report(decisions, gto_analyzer, game=None):
         st.metric("正確決策", correct)
     with col3:
         st.metric("準確率", f"{accuracy:.1f}%")
+    st.caption(f"本次訓練共 {decision_log.total} 個決策，準確率 "
+               f"{DecisionLog.accuracy(decision_log.correct, decision_log.total):.1f}%")
     
     # 評級
     if accuracy >= 90:
@@ -377,39 +426,224 @@ def display_analysis_report(decisions, gto_analyzer, game=None):
     # 詳細分析
     st.markdown("### 🎯 決策細節")
     
-    for i, decision in enumerate(decisions):
-        with st.expander(f"決策 {i+1}: {decision['street'].upper()} - {decision['hand']} @ {decision['position']}"):
+    num_pages = decision_log.num_pages()
+    page = 1
+    if num_pages > 1:
+        page = st.number_input(f"頁數（共 {num_pages} 頁，每頁 {REPORT_PAGE_SIZE} 個決策）",
+                               min_value=1, max_value=num_pages, step=1, key="report_page")
+    
+    # 手牌強度只對這一手牌的決策有意義（以目前的公共牌計算）
+    hand_name = None
+    if game and game.community_cards and len(game.community_cards) >= 3:
+        human_player = next((p for p in game.players if p.is_human), None)
+        if human_player and human_player.hole_cards:
+            hand_rank, _ = HandEvaluator.evaluate_hand(human_player.hole_cards + game.community_cards)
+            hand_name = HandEvaluator.get_hand_name(hand_rank)
+    
+    for number, decision in decision_log.page(page):
+        current = decision.hand_no == decision_log.hand_no
+        label = "" if current else f"（第 {decision.hand_no} 手）"
+        with st.expander(f"決策 {number}{label}: {decision.street.upper()} - {decision.hand} @ {decision.position}"):
             col1, col2 = st.columns([1, 2])
             
             with col1:
-                st.write(f"**你的行動:** {decision['action'].upper()}")
-                if decision['amount'] > 0:
-                    st.write(f"**下注金額:** ${decision['amount']}")
+                st.write(f"**你的行動:** {decision.action.upper()}")
+                if decision.amount > 0:
+                    st.write(f"**下注金額:** ${decision.amount}")
                 
                 # 顯示手牌強度（如果有公牌的話）
-                if game and game.community_cards and len(game.community_cards) >= 3:
-                    human_player = next((p for p in game.players if p.is_human), None)
-                    if human_player and human_player.hole_cards:
-                        all_cards = human_player.hole_cards + game.community_cards
-                        hand_rank, _ = HandEvaluator.evaluate_hand(all_cards)
-                        hand_name = HandEvaluator.get_hand_name(hand_rank)
-                        st.write(f"**手牌強度:** {hand_name}")
+                if current and hand_name:
+                    st.write(f"**手牌強度:** {hand_name}")
                 
-                if decision['is_correct']:
+                if decision.is_correct:
                     st.success("✅ 正確決策")
                 else:
                     st.error("❌ 可以改進")
             
             with col2:
-                st.info(decision['suggestion'])
-                
-                if 'detailed' in decision and decision['detailed']:
-                    st.markdown("**詳細分析:**")
-                    st.markdown(decision['detailed'])
+                st.info(decision.suggestion)
+                st.markdown("**詳細分析:**")
+                st.markdown(gto_analyzer.detailed_analysis(decision))
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+@fragment
+def game_panel():
+    """
+    牌局區域：撲克桌、玩家、行動歷史、行動按鈕與結果
+    區域內的按鈕只重新執行這個函式，CSS、標題與側邊欄不重新送出
+    """
+    game = st.session_state.game
+    st.session_state.reruns_this_hand += 1
+    
+    # 先執行完輪到真人之前的電腦行動，整個區域只繪製一次
+    if game.should_continue_hand():
+        advance_computer_players(game)
+    
+    # 顯示撲克桌
+    display_poker_table(game)
+    
+    # 顯示所有玩家
+    st.markdown("### 👥 玩家")
+    cols = st.columns(6)
+    for i, player in enumerate(game.players):
+        with cols[i]:
+            display_player_info(player, game)
+    
+    # 顯示行動歷史
+    with st.expander("📝 行動歷史", expanded=False):
+        display_action_history(game)
+    display_bot_replay(game)
+    
+    # 遊戲邏輯
+    if game.street == Street.SHOWDOWN or len(game.get_active_players()) == 1:
+        # 遊戲結束，顯示結果
+        st.markdown("## 🏁 手牌結束")
+    
+        # 處理結算（含邊池與平分，重繪時不會重複分配）
+        payouts = game.determine_winner()
+        # 匯出手牌紀錄（重繪時不重複寫入）
+        if st.session_state.get('exported_game') is not game:
+            get_history_writer().write(game)
+            st.session_state.exported_game = game
+        if len(game.get_active_players()) == 1:
+            winner = next(p for p in game.players if not p.is_folded)
+            st.success(f"🎉 {winner.name} 贏得底池 ${game.pot}")
+        else:
+            # Multiple players - determine winner using hand evaluator
+            st.info(f"🤝 攤牌！底池 ${game.pot}")
+    
+            # 顯示所有玩家的手牌
+            active_players = game.get_active_players()
+            winners = [p for p, amount in zip(game.players, payouts) if amount > 0]
+    
+            # 顯示每個玩家的手牌和牌型
+            st.markdown("### 🎴 攤牌結果")
+            cols = st.columns(len(active_players))
+    
+            for i, player in enumerate(active_players):
+                with cols[i]:
+                    # 顯示玩家手牌
+                    st.markdown(f"**{player.name}**", unsafe_allow_html=True)
+                    st.markdown(hole_cards_html([card.id for card in player.hole_cards]), unsafe_allow_html=True)
+    
+                    # 評估手牌
+                    all_cards = player.hole_cards + game.community_cards
+                    hand_rank, values = HandEvaluator.evaluate_hand(all_cards)
+                    hand_name = HandEvaluator.get_hand_name(hand_rank)
+    
+                    if player in winners:
+                        st.success(f"🏆 {hand_name}")
+                    else:
+                        st.info(f"{hand_name}")
+    
+            # 分配底池
+            if len(winners) == 1:
+                st.success(f"🎉 {winners[0].name} 贏得底池 ${game.pot}！")
+            else:
+                winner_text = ", ".join(f"{p.name} ${amount}" for p, amount in zip(game.players, payouts) if amount > 0)
+                st.success(f"🤝 分配底池：{winner_text}")
+    
+        # 顯示分析報告
+        if st.session_state.decision_log.hand_total:
+            display_analysis_report(
+                st.session_state.decision_log,
+                st.session_state.gto_analyzer,
+                game
+            )
+    
+        # 下一手按鈕
+        st.button("🎲 下一手牌", type="primary", use_container_width=True, on_click=start_hand,
+                  args=(game.starting_stack, game.small_blind, game.big_blind))
+    
+    else:
+        # 遊戲進行中：電腦行動已在上方執行完畢，此時一定輪到真人玩家
+        current_player_idx = game.current_player_index
+        current_player = game.players[current_player_idx]
+        if current_player.is_human and game.needs_to_act(current_player_idx):
+            # 顯示當前玩家資訊
+            st.markdown(f"### 🎮 輪到你行動了！")
+    
+            # 獲取並顯示 GTO 建議
+            hand_str = game.get_hand_string(current_player.hole_cards)
+            action, amount, explanation = st.session_state.gto_analyzer.get_preflop_recommendation(
+                hand_str, current_player.position, game.current_bet, game.big_blind, game.street, game
+            )
+    
+            suggestion = {
+                'action': action,
+                'amount': amount,
+                'explanation': explanation
+            }
+    
+            display_gto_suggestion(suggestion)
+    
+            # 行動按鈕（回呼在下一次重繪前處理動作，電腦行動接著在同一次重繪中執行）
+            col1, col2, col3 = st.columns(3)
+    
+            with col1:
+                st.button("❌ FOLD 棄牌", use_container_width=True,
+                          on_click=on_human_action, args=("fold", 0))
+    
+            with col2:
+                if game.current_bet == 0 or (current_player.position == "BB" and game.current_bet == game.big_blind):
+                    st.button("✅ CHECK 過牌", use_container_width=True,
+                              on_click=on_human_action, args=("check", 0))
+                else:
+                    call_amount = game.current_bet - current_player.current_bet
+                    st.button(f"📞 CALL 跟注 ${call_amount}", use_container_width=True,
+                              on_click=on_human_action, args=("call", game.current_bet))
+    
+            with col3:
+                # 下注/加注選項
+                if game.current_bet == 0:
+                    min_bet = int(game.big_blind)
+                    default_bet = int(game.big_blind * 2.5)
+                else:
+                    min_bet = int(game.current_bet * 2)
+                    default_bet = int(game.current_bet * 2.5)
+    
+                # Handle all-in situations - if player doesn't have enough chips for min raise
+                player_total_chips = int(current_player.stack + current_player.current_bet)
+                if min_bet > player_total_chips:
+                    # Player can only go all-in
+                    min_bet = int(current_player.stack)
+                    default_bet = int(current_player.stack)
+    
+                # 每個決策使用新的輸入框，避免沿用上一個決策超出範圍的金額
+                amount_key = f"bet_amount_{len(game.action_history)}"
+                bet_amount = st.number_input(
+                    "下注金額",
+                    min_value=min_bet,
+                    max_value=int(current_player.stack),
+                    value=min(default_bet, int(current_player.stack)),
+                    step=int(game.big_blind),
+                    label_visibility="collapsed",
+                    key=amount_key
+                )
+    
+                # Update button text for all-in situations
+                if bet_amount == int(current_player.stack):
+                    action_text = "💎 ALL-IN 全下"
+                elif game.current_bet == 0:
+                    action_text = "💰 BET 下注"
+                else:
+                    action_text = "🚀 RAISE 加注"
+    
+                action_type = "bet" if game.current_bet == 0 else "raise"
+                st.button(f"{action_text} ${bet_amount}", use_container_width=True,
+                          on_click=on_human_action, args=(action_type, 0, amount_key))
+    
+    hands = st.session_state.hand_count
+    st.caption(f"第 {hands} 手 · 本手重繪 {st.session_state.reruns_this_hand} 次"
+               f"（整頁 {st.session_state.page_runs_this_hand} 次）· 上一手 {st.session_state.last_hand_reruns} 次")
+
 def main():
+    # 共用資源（伺服器行程內第一次載入後，所有工作階段共用）
+    warm_up()
+    if st.session_state.get('game'):
+        st.session_state.page_runs_this_hand += 1
+    
     # 標題
     st.markdown("""
     <h1 style='text-align: center; color: #FFD700; text-shadow: 2px 2px 4px rgba(0,0,0,0.5);'>
@@ -430,379 +664,12 @@ def main():
         
         st.divider()
         
-        # 統計資訊
-        if "hand_count" in st.session_state:
-            st.metric("已玩手數", st.session_state.hand_count)
-        
-        if st.button("🆕 開始新局", type="primary", use_container_width=True):
-            # 初始化遊戲邏輯（與簡化版相同）
-            game = TexasHoldemGame(starting_stack=starting_stack, 
-                                 small_blind=small_blind, 
-                                 big_blind=big_blind)
-            human_position = random.randint(0, 5)
-            game.initialize_players(human_seat=human_position)
-            game.start_new_hand()
-            
-            # 創建GTO分析器
-            with open('gto_ranges_clean.json', 'r', encoding='utf-8') as f:
-                gto_ranges = json.load(f)
-            gto_analyzer = GTOAnalyzer(gto_ranges)
-            
-            st.session_state.game = game
-            st.session_state.hand_count = st.session_state.get('hand_count', 0) + 1
-            st.session_state.player_decisions = []
-            st.session_state.gto_analyzer = gto_analyzer
-            st.session_state.ai_action_count = 0  # 重置AI行動計數器
-            
-            st.rerun()
+        st.button("🆕 開始新局", type="primary", use_container_width=True,
+                  on_click=start_hand, args=(starting_stack, small_blind, big_blind))
     
     # 主遊戲區域
-    game = st.session_state.get('game')
-    if game:
-        # 顯示撲克桌
-        display_poker_table(game)
-        
-        # 顯示所有玩家
-        st.markdown("### 👥 玩家")
-        cols = st.columns(6)
-        for i, player in enumerate(game.players):
-            with cols[i]:
-                display_player_info(player, game)
-        
-        # 顯示行動歷史
-        with st.expander("📝 行動歷史", expanded=False):
-            display_action_history(game)
-        
-        # 遊戲邏輯
-        if game.street == Street.SHOWDOWN or len(game.get_active_players()) == 1:
-            # 遊戲結束，顯示結果
-            st.markdown("## 🏁 手牌結束")
-            
-            # 處理結算
-            if len(game.get_active_players()) == 1:
-                winner = next(p for p in game.players if not p.is_folded)
-                st.success(f"🎉 {winner.name} 贏得底池 ${game.pot}")
-            else:
-                # Multiple players - determine winner using hand evaluator
-                st.info(f"🤝 攤牌！底池 ${game.pot}")
-                
-                # 顯示所有玩家的手牌
-                active_players = game.get_active_players()
-                winners = HandEvaluator.determine_winner(game.players, game.community_cards)
-                
-                # 顯示每個玩家的手牌和牌型
-                st.markdown("### 🎴 攤牌結果")
-                cols = st.columns(len(active_players))
-                
-                for i, player in enumerate(active_players):
-                    with cols[i]:
-                        # 顯示玩家手牌
-                        cards_html = "".join([get_card_html(card) for card in player.hole_cards])
-                        st.markdown(f"**{player.name}**", unsafe_allow_html=True)
-                        st.markdown(f'<div style="text-align: center;">{cards_html}</div>', unsafe_allow_html=True)
-                        
-                        # 評估手牌
-                        all_cards = player.hole_cards + game.community_cards
-                        hand_rank, values = HandEvaluator.evaluate_hand(all_cards)
-                        hand_name = HandEvaluator.get_hand_name(hand_rank)
-                        
-                        if player in winners:
-                            st.success(f"🏆 {hand_name}")
-                        else:
-                            st.info(f"{hand_name}")
-                
-                # 分配底池
-                pot_share = game.pot // len(winners)
-                if len(winners) == 1:
-                    st.success(f"🎉 {winners[0].name} 贏得底池 ${game.pot}！")
-                else:
-                    winner_names = ", ".join([w.name for w in winners])
-                    st.success(f"🤝 平手！{winner_names} 各獲得 ${pot_share}")
-            
-            # 顯示分析報告
-            if st.session_state.get('player_decisions'):
-                display_analysis_report(
-                    st.session_state.player_decisions,
-                    st.session_state.gto_analyzer,
-                    game
-                )
-            
-            # 下一手按鈕
-            if st.button("🎲 下一手牌", type="primary", use_container_width=True):
-                # 開始新手牌的邏輯...
-                new_game = TexasHoldemGame(
-                    starting_stack=game.starting_stack,
-                    small_blind=game.small_blind,
-                    big_blind=game.big_blind
-                )
-                human_position = random.randint(0, 5)
-                new_game.initialize_players(human_seat=human_position)
-                new_game.start_new_hand()
-                
-                st.session_state.game = new_game
-                st.session_state.hand_count += 1
-                st.session_state.player_decisions = []
-                st.session_state.ai_action_count = 0  # 重置AI行動計數器
-                
-                st.rerun()
-        
-        else:
-            # 遊戲進行中
-            # 檢查是否所有玩家都all-in或fold（除了一個以外）
-            active_non_allin = [p for p in game.players if not p.is_folded and not p.is_all_in]
-            
-            if len(active_non_allin) <= 1:
-                # 所有玩家都all-in或fold了，直接跑到攤牌
-                while game.street != Street.SHOWDOWN:
-                    game.move_to_next_street()
-                st.rerun()
-            
-            current_player_idx = game.get_next_player_index()
-            if current_player_idx != -1:
-                current_player = game.players[current_player_idx]
-                
-                if current_player.is_human:
-                    # 顯示當前玩家資訊
-                    st.markdown(f"### 🎮 輪到你行動了！")
-                    
-                    # 獲取並顯示 GTO 建議
-                    hand_str = game.get_hand_string(current_player.hole_cards)
-                    action, amount, explanation = st.session_state.gto_analyzer.get_preflop_recommendation(
-                        hand_str, current_player.position, game.current_bet, game.big_blind, game.street, game
-                    )
-                    
-                    suggestion = {
-                        'action': action,
-                        'amount': amount,
-                        'explanation': explanation
-                    }
-                    
-                    display_gto_suggestion(suggestion)
-                    
-                    # 行動按鈕
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        if st.button("❌ FOLD 棄牌", use_container_width=True):
-                            # 處理棄牌邏輯...
-                            is_correct, suggestion_text, detailed = st.session_state.gto_analyzer.analyze_decision(
-                                hand_str, current_player.position, "fold", 0, game.current_bet, game.big_blind, game.street, game
-                            )
-                            
-                            st.session_state.player_decisions.append({
-                                'street': game.street.name,
-                                'hand': hand_str,
-                                'position': current_player.position,
-                                'action': 'fold',
-                                'amount': 0,
-                                'is_correct': is_correct,
-                                'suggestion': suggestion_text,
-                                'detailed': detailed
-                            })
-                            
-                            game.process_action(current_player_idx, Action.FOLD, 0)
-                            
-                            # Check if only one player remains
-                            if len(game.get_active_players()) == 1:
-                                # Hand ends immediately
-                                st.rerun()
-                            else:
-                                # Check if we should move to next street or next player
-                                next_idx = game.get_next_player_index()
-                                if next_idx != -1:
-                                    game.current_player_index = next_idx
-                                elif game.is_betting_round_complete():
-                                    game.move_to_next_street()
-                            
-                            st.rerun()
-                    
-                    with col2:
-                        if game.current_bet == 0 or (current_player.position == "BB" and game.current_bet == game.big_blind):
-                            if st.button("✅ CHECK 過牌", use_container_width=True):
-                                # 處理過牌邏輯...
-                                is_correct, suggestion_text, detailed = st.session_state.gto_analyzer.analyze_decision(
-                                    hand_str, current_player.position, "check", 0, game.current_bet, game.big_blind, game.street, game
-                                )
-                                
-                                st.session_state.player_decisions.append({
-                                    'street': game.street.name,
-                                    'hand': hand_str,
-                                    'position': current_player.position,
-                                    'action': 'check',
-                                    'amount': 0,
-                                    'is_correct': is_correct,
-                                    'suggestion': suggestion_text,
-                                    'detailed': detailed
-                                })
-                                
-                                game.process_action(current_player_idx, Action.CHECK, 0)
-                                
-                                # Check if we should move to next street or next player
-                                next_idx = game.get_next_player_index()
-                                if next_idx != -1:
-                                    game.current_player_index = next_idx
-                                elif game.is_betting_round_complete():
-                                    game.move_to_next_street()
-                                
-                                st.rerun()
-                        else:
-                            call_amount = game.current_bet - current_player.current_bet
-                            if st.button(f"📞 CALL 跟注 ${call_amount}", use_container_width=True):
-                                # 處理跟注邏輯...
-                                is_correct, suggestion_text, detailed = st.session_state.gto_analyzer.analyze_decision(
-                                    hand_str, current_player.position, "call", game.current_bet, game.current_bet, game.big_blind, game.street, game
-                                )
-                                
-                                st.session_state.player_decisions.append({
-                                    'street': game.street.name,
-                                    'hand': hand_str,
-                                    'position': current_player.position,
-                                    'action': 'call',
-                                    'amount': game.current_bet,
-                                    'is_correct': is_correct,
-                                    'suggestion': suggestion_text,
-                                    'detailed': detailed
-                                })
-                                
-                                game.process_action(current_player_idx, Action.CALL, game.current_bet)
-                                
-                                # Check if we should move to next street or next player
-                                next_idx = game.get_next_player_index()
-                                if next_idx != -1:
-                                    game.current_player_index = next_idx
-                                elif game.is_betting_round_complete():
-                                    game.move_to_next_street()
-                                
-                                st.rerun()
-                    
-                    with col3:
-                        # 下注/加注選項
-                        if game.current_bet == 0:
-                            min_bet = int(game.big_blind)
-                            default_bet = int(game.big_blind * 2.5)
-                        else:
-                            min_bet = int(game.current_bet * 2)
-                            default_bet = int(game.current_bet * 2.5)
-                        
-                        # Handle all-in situations - if player doesn't have enough chips for min raise
-                        player_total_chips = int(current_player.stack + current_player.current_bet)
-                        if min_bet > player_total_chips:
-                            # Player can only go all-in
-                            min_bet = int(current_player.stack)
-                            default_bet = int(current_player.stack)
-                        
-                        bet_amount = st.number_input(
-                            "下注金額",
-                            min_value=min_bet,
-                            max_value=int(current_player.stack),
-                            value=min(default_bet, int(current_player.stack)),
-                            step=int(game.big_blind),
-                            label_visibility="collapsed"
-                        )
-                        
-                        # Update button text for all-in situations
-                        if bet_amount == int(current_player.stack):
-                            action_text = "💎 ALL-IN 全下"
-                        elif game.current_bet == 0:
-                            action_text = "💰 BET 下注"
-                        else:
-                            action_text = "🚀 RAISE 加注"
-                        
-                        if st.button(f"{action_text} ${bet_amount}", use_container_width=True):
-                            action_type = "bet" if game.current_bet == 0 else "raise"
-                            
-                            is_correct, suggestion_text, detailed = st.session_state.gto_analyzer.analyze_decision(
-                                hand_str, current_player.position, action_type, bet_amount, game.current_bet, game.big_blind, game.street, game
-                            )
-                            
-                            st.session_state.player_decisions.append({
-                                'street': game.street.name,
-                                'hand': hand_str,
-                                'position': current_player.position,
-                                'action': action_type,
-                                'amount': bet_amount,
-                                'is_correct': is_correct,
-                                'suggestion': suggestion_text,
-                                'detailed': detailed
-                            })
-                            
-                            if game.current_bet == 0:
-                                game.process_action(current_player_idx, Action.BET, bet_amount)
-                            else:
-                                game.process_action(current_player_idx, Action.RAISE, bet_amount)
-                            
-                            # Check if we should move to next street or next player
-                            next_idx = game.get_next_player_index()
-                            if next_idx != -1:
-                                game.current_player_index = next_idx
-                            elif game.is_betting_round_complete():
-                                game.move_to_next_street()
-                            
-                            st.rerun()
-                
-                else:
-                    # AI 玩家自動行動
-                    # 防止無窮迴圈：檢查是否應該強制行動
-                    if 'ai_action_count' not in st.session_state:
-                        st.session_state.ai_action_count = 0
-                    
-                    st.session_state.ai_action_count += 1
-                    
-                    # 如果AI行動次數過多，強制結束
-                    if st.session_state.ai_action_count > 50:
-                        st.error("遊戲出現異常，正在重置...")
-                        st.session_state.ai_action_count = 0
-                        # 強制進入下一街或結束遊戲
-                        if game.street == Street.RIVER:
-                            game.street = Street.SHOWDOWN
-                        else:
-                            game.move_to_next_street()
-                        st.rerun()
-                    
-                    with st.spinner(f"{current_player.name} 思考中..."):
-                        time.sleep(0.1)  # 減少延遲
-                        
-                        # AI 行動邏輯...
-                        comp_hand = game.get_hand_string(current_player.hole_cards)
-                        comp_action, comp_amount, _ = st.session_state.gto_analyzer.get_preflop_recommendation(
-                            comp_hand, current_player.position, game.current_bet, game.big_blind, game.street, game
-                        )
-                        
-                        # 執行行動並重置計數器
-                        st.session_state.ai_action_count = 0
-                        
-                        if comp_action == "fold":
-                            game.process_action(current_player_idx, Action.FOLD, 0)
-                        elif comp_action == "check":
-                            game.process_action(current_player_idx, Action.CHECK, 0)
-                        elif comp_action == "call":
-                            game.process_action(current_player_idx, Action.CALL, game.current_bet)
-                        elif comp_action == "raise":
-                            if game.current_bet == 0:
-                                game.process_action(current_player_idx, Action.BET, comp_amount)
-                            else:
-                                game.process_action(current_player_idx, Action.RAISE, comp_amount)
-                        else:
-                            # 如果沒有有效行動，默認check或fold
-                            if game.current_bet == 0:
-                                game.process_action(current_player_idx, Action.CHECK, 0)
-                            else:
-                                game.process_action(current_player_idx, Action.FOLD, 0)
-                        
-                        # Check if only one player remains
-                        if len(game.get_active_players()) == 1:
-                            # Hand ends immediately
-                            st.rerun()
-                        else:
-                            # Check if we should move to next street or next player
-                            next_idx = game.get_next_player_index()
-                            if next_idx != -1:
-                                game.current_player_index = next_idx
-                            elif game.is_betting_round_complete():
-                                game.move_to_next_street()
-                        
-                        st.rerun()
-    
+    if st.session_state.get('game'):
+        game_panel()
     else:
         # 歡迎畫面
         st.markdown("""
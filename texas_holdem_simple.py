@@ -4,7 +4,6 @@
 """
 
 import streamlit as st
-import random
 import json
 import time
 from enum import Enum
@@ -12,21 +11,32 @@ from typing import List, Optional, Dict, Tuple
 
 # 導入所有類
 from texas_holdem_complete import *
-from debug_logger import DebugLogger
+from debug_logger import DebugLogger, debug_logger
+from decision_log import DecisionLog, DecisionRecord
+from hand_history import get_history_writer
+from shared_resources import get_analyzer, warm_up
 from postflop_analyzer import PostflopAnalyzer
-
-# 創建全局debug logger
-debug_logger = DebugLogger()
+from preflop_equity import get_class_table, range_equity
+from range_index import CompiledRanges, FACING_RAISE, get_compiled_ranges
 
 class GTOAnalyzer:
     """統一的GTO分析器，確保建議和分析的一致性"""
     
-    def __init__(self, gto_ranges):
-        self.gto_ranges = gto_ranges
+    def __init__(self, gto_ranges=None, logger=None, postflop_equity=True):
+        # 可傳入原始範圍字典或已編譯的範圍，未提供時使用行程內共用的編譯結果
+        if gto_ranges is None:
+            gto_ranges = get_compiled_ranges()
+        elif not isinstance(gto_ranges, CompiledRanges):
+            gto_ranges = CompiledRanges(gto_ranges)
+        self.ranges = gto_ranges
+        self.gto_ranges = gto_ranges.raw
+        self.logger = logger or debug_logger
+        self.postflop_equity = postflop_equity  # 翻牌後建議是否附上勝率
+        self._equity_lines: Dict[Tuple[str, bool], str] = {}  # (手牌, 是否面對加注) -> 勝率說明
         
     def get_preflop_recommendation(self, hand, position, current_bet, big_blind, street=None, game=None):
         """獲取建議（統一邏輯）"""
-        debug_logger.log(f"GTO建議: {hand} 在 {position}, 當前下注: {current_bet}, BB: {big_blind}")
+        self.logger.log(f"GTO建議: {hand} 在 {position}, 當前下注: {current_bet}, BB: {big_blind}")
         
         # 如果是翻牌後且有遊戲狀態，使用翻牌後分析器
         if street and street != Street.PREFLOP and game and hasattr(game, 'community_cards'):
@@ -44,7 +54,9 @@ class GTOAnalyzer:
                     position,
                     current_bet,
                     game.pot,
-                    big_blind
+                    big_blind,
+                    num_opponents=len(game.get_active_players()) - 1,
+                    with_equity=self.postflop_equity
                 )
             
             # 否則使用原本的簡化策略
@@ -63,7 +75,7 @@ class GTOAnalyzer:
         
         # 標準化手牌格式
         normalized_hand = self._normalize_hand(hand)
-        debug_logger.log(f"標準化手牌: {normalized_hand} - 大牌: {normalized_hand in ['AA', 'KK', 'QQ', 'JJ', 'AKs', 'AKo']}, 中等牌: {self._is_medium_hand(normalized_hand)}")
+        self.logger.log(f"標準化手牌: {normalized_hand} - 大牌: {normalized_hand in ['AA', 'KK', 'QQ', 'JJ', 'AKs', 'AKo']}, 中等牌: {self._is_medium_hand(normalized_hand)}")
         
         # 特殊情況：BB面對limpers（只需付大盲）
         if position == "BB" and current_bet == big_blind:
@@ -74,46 +86,40 @@ class GTOAnalyzer:
         if current_bet > big_blind:
             # BB面對加注
             if position == "BB":
-                facing_raise_ranges = self.gto_ranges.get("preflop", {}).get("facing_raise", {}).get("BB_vs_raise", {})
-                
-                if normalized_hand in facing_raise_ranges.get("3bet", []):
+                if self.ranges.contains(FACING_RAISE, "BB_vs_raise", "3bet", normalized_hand):
                     # 3bet 到 2.5-3倍原加注
                     recommended_amount = current_bet * 2.5
                     return "raise", recommended_amount, f"{normalized_hand} 在 BB 面對加注應該3bet"
-                elif normalized_hand in facing_raise_ranges.get("call", []):
+                elif self.ranges.contains(FACING_RAISE, "BB_vs_raise", "call", normalized_hand):
                     return "call", current_bet, f"{normalized_hand} 在 BB 面對加注可以跟注"
                 else:
                     return "fold", 0, f"{normalized_hand} 在 BB 面對加注應該棄牌"
             else:
                 # 其他位置面對加注，使用vs_UTG_open作為保守策略
-                facing_raise_ranges = self.gto_ranges.get("preflop", {}).get("facing_raise", {}).get("vs_UTG_open", {})
-                
-                if normalized_hand in facing_raise_ranges.get("3bet", []):
+                if self.ranges.contains(FACING_RAISE, "vs_UTG_open", "3bet", normalized_hand):
                     recommended_amount = current_bet * 2.5
                     return "raise", recommended_amount, f"{normalized_hand} 面對加注應該3bet"
-                elif normalized_hand in facing_raise_ranges.get("call", []):
+                elif self.ranges.contains(FACING_RAISE, "vs_UTG_open", "call", normalized_hand):
                     return "call", current_bet, f"{normalized_hand} 面對加注可以跟注"
                 else:
                     return "fold", 0, f"{normalized_hand} 面對加注應該棄牌"
         
         # 正常RFI情況（沒有人加注）
-        position_ranges = self.gto_ranges.get("preflop", {}).get("positions", {}).get(position, {}).get("rfi", {})
-        
-        if not position_ranges:
+        if not self.ranges.has_position(position):
             return "fold", 0, f"未找到 {position} 位置的範圍"
         
         # Debug: 顯示範圍內容
-        raise_range = position_ranges.get("raise", [])
-        debug_logger.log(f"檢查 {normalized_hand} 是否在 {position} 的加注範圍中: {normalized_hand in raise_range}")
+        in_raise_range = self.ranges.contains(position, "rfi", "raise", normalized_hand)
+        self.logger.log(f"檢查 {normalized_hand} 是否在 {position} 的加注範圍中: {in_raise_range}")
         if normalized_hand in ["KQO", "KQS"]:
-            debug_logger.log(f"{position} 加注範圍前10張: {raise_range[:10]}...")
-            debug_logger.log(f"是否包含KQo: {'KQo' in raise_range}, 是否包含KQO: {'KQO' in raise_range}")
+            self.logger.log(f"{position} 加注範圍前10張: {self.ranges.hands(position, 'rfi', 'raise')[:10]}...")
+            self.logger.log(f"是否包含KQo: {self.ranges.contains(position, 'rfi', 'raise', 'KQo')}, 是否包含KQO: {self.ranges.contains(position, 'rfi', 'raise', 'KQO')}")
         
-        if normalized_hand in position_ranges.get("raise", []):
+        if in_raise_range:
             # 標準開局加注 2.5BB
             recommended_amount = big_blind * 2.5
             return "raise", recommended_amount, f"{normalized_hand} 在 {position} 是加注牌"
-        elif normalized_hand in position_ranges.get("call", []):
+        elif self.ranges.contains(position, "rfi", "call", normalized_hand):
             return "call", current_bet, f"{normalized_hand} 在 {position} 可以跟注"
         else:
             return "fold", 0, f"{normalized_hand} 在 {position} 應該棄牌"
@@ -161,38 +167,48 @@ class GTOAnalyzer:
         return hand in medium_hands
     
     def analyze_decision(self, hand, position, action, amount, current_bet, big_blind, street=None, game=None):
-        """分析玩家決策是否符合GTO"""
-        recommended_action, recommended_amount, explanation = self.get_preflop_recommendation(
-            hand, position, current_bet, big_blind, street, game
-        )
-        
-        # 行動匹配判斷
+        """分析玩家決策是否符合GTO，返回 (是否正確, 建議, 詳細分析)"""
+        record = self.judge_decision(hand, position, action, amount, current_bet, big_blind, street, game)
+        return record.is_correct, record.suggestion, self.detailed_analysis(record)
+    
+    def judge_decision(self, hand, position, action, amount, current_bet, big_blind, street=None, game=None):
+        """判斷決策並返回精簡紀錄（詳細分析在顯示時才以 detailed_analysis 產生）"""
+        best = self.get_preflop_recommendation(hand, position, current_bet, big_blind, street, game)
+        is_correct, suggestion = self._judge(action, amount, current_bet, big_blind, *best)
+        return DecisionRecord((street or Street.PREFLOP).name, hand, position, action, amount,
+                              current_bet, big_blind, is_correct, suggestion, best)
+    
+    def _judge(self, action, amount, current_bet, big_blind, recommended_action, recommended_amount, explanation):
+        """行動匹配判斷，返回 (是否正確, 建議)"""
         if action.lower() == recommended_action.lower():
             if action in ["raise", "bet"] and amount > 0:
                 # 檢查金額是否合理
                 amount_ratio = amount / max(recommended_amount, 1)
                 
                 if 0.7 <= amount_ratio <= 1.5:  # 金額在建議的70%-150%之間
-                    return True, f"[正確] {explanation}", self._get_detailed_analysis(hand, position, action, amount, True, explanation, current_bet, big_blind)
+                    return True, f"[正確] {explanation}"
                 elif amount_ratio > 2.5:  # 加注超過建議的2.5倍，可能是3bet/4bet
                     context = "強力3bet！" if current_bet > big_blind else "大幅加注！"
-                    return True, f"[正確] {context} {explanation}", self._get_detailed_analysis(hand, position, action, amount, True, explanation, current_bet, big_blind)
+                    return True, f"[正確] {context} {explanation}"
                 elif amount_ratio < 0.5:  # 金額太小
-                    return False, f"[需改進] 行動正確但加注太小（建議約${int(recommended_amount)}）。{explanation}", self._get_detailed_analysis(hand, position, action, amount, False, explanation, current_bet, big_blind)
+                    return False, f"[需改進] 行動正確但加注太小（建議約${int(recommended_amount)}）。{explanation}"
                 else:
                     # 金額偏差但還算合理
-                    return True, f"[可接受] 行動正確，金額${amount}略有偏差但仍合理。{explanation}", self._get_detailed_analysis(hand, position, action, amount, True, explanation, current_bet, big_blind)
+                    return True, f"[可接受] 行動正確，金額${amount}略有偏差但仍合理。{explanation}"
             else:
-                return True, f"[正確] {explanation}", self._get_detailed_analysis(hand, position, action, amount, True, explanation, current_bet, big_blind)
+                return True, f"[正確] {explanation}"
         else:
-            return False, f"[錯誤] 建議{recommended_action}而不是{action}。{explanation}", self._get_detailed_analysis(hand, position, action, amount, False, explanation, current_bet, big_blind)
+            return False, f"[錯誤] 建議{recommended_action}而不是{action}。{explanation}"
+    
+    def detailed_analysis(self, record):
+        """決策紀錄的詳細分析"""
+        return self._get_detailed_analysis(record.hand, record.position, record.action, record.amount,
+                                           record.is_correct, record.current_bet, record.big_blind, record.best)
     
-    def _get_detailed_analysis(self, hand, position, action, amount, is_correct, explanation, current_bet, big_blind):
-        """生成詳細分析，提供當下最佳建議和解釋"""
+    def _get_detailed_analysis(self, hand, position, action, amount, is_correct, current_bet, big_blind, best):
+        """生成詳細分析，提供當下最佳建議和解釋（best 為判斷決策時取得的建議）"""
         result_emoji = "[正確]" if is_correct else "[錯誤]"
-        
-        # 獲取最佳建議
-        best_action, best_amount, best_explanation = self.get_preflop_recommendation(hand, position, current_bet, big_blind)
+        best_action, best_amount, best_explanation = best
         
         # 分析當前情況
         situation_analysis = self._analyze_situation(hand, position, current_bet, big_blind)
@@ -231,22 +247,59 @@ class GTOAnalyzer:
         # 位置分析
         position_advantage = self._get_position_analysis(position)
         
+        # 翻牌前勝率（查表，勝率表尚未產生時略過）
+        equity_line = self._get_equity_line(hand, facing_raise)
+        
         if facing_raise:
             pot_odds = current_bet / (current_bet + big_blind + (current_bet - big_blind))
             return f"""
 - **手牌強度:** {hand_strength}
 - **位置狀況:** {position_advantage}  
 - **面對加注:** ${current_bet} (需要{pot_odds:.1%}的勝率才值得跟注)
-- **決策要點:** 在此情況下需要較強的手牌才能繼續
+{equity_line}- **決策要點:** 在此情況下需要較強的手牌才能繼續
             """
         else:
             return f"""
 - **手牌強度:** {hand_strength}
 - **位置狀況:** {position_advantage}
 - **行動成本:** 只需支付大盲${big_blind}
-- **決策要點:** 可以用較寬的範圍進行遊戲
+{equity_line}- **決策要點:** 可以用較寬的範圍進行遊戲
             """
     
+    def _get_equity_line(self, hand, facing_raise):
+        """
+        翻牌前全下勝率：面對加注時對照 UTG 開局範圍，否則對任意手牌（結果依手牌類別快取）
+        勝率表尚未產生時返回空字串且不快取，表產生後不需重新啟動即可顯示
+        """
+        normalized_hand = self._normalize_hand(hand)
+        key = (normalized_hand, facing_raise)
+        line = self._equity_lines.get(key)
+        if line is None:
+            line = self._compute_equity_line(normalized_hand, facing_raise)
+            if line is None:
+                return ""
+            self._equity_lines[key] = line
+        return line
+    
+    def _compute_equity_line(self, normalized_hand, facing_raise):
+        """返回勝率說明；勝率表尚未產生時返回 None"""
+        if get_class_table() is None:
+            return None
+        try:
+            if facing_raise:
+                # 與 get_preflop_recommendation 相同，以 UTG 開局範圍作為保守假設
+                opener_range = self.ranges.hands("UTG", "rfi", "raise")
+                equity = range_equity(normalized_hand, opener_range)
+                label = "對 UTG 開局範圍"
+            else:
+                equity = range_equity(normalized_hand)
+                label = "對任意手牌"
+        except (KeyError, IndexError):
+            return ""
+        if equity is None:
+            return ""
+        return f"- **全下勝率:** {label}約 {equity:.1%}\n"
+    
     def _get_hand_strength(self, hand):
         """評估手牌強度"""
         premium_hands = ["AA", "KK", "QQ", "JJ", "AKs", "AKo"]
@@ -310,12 +363,13 @@ def main():
     st.title("德州撲克 GTO 訓練器")
     
     debug_logger.log("簡化版本啟動")
+    warm_up()  # 共用資源（伺服器行程內第一次載入後，所有工作階段共用）
     
     # 初始化session state
     if "game" not in st.session_state:
         st.session_state.game = None
         st.session_state.hand_count = 0
-        st.session_state.player_decisions = []
+        st.session_state.decision_log = DecisionLog()
         st.session_state.gto_analyzer = None
     
     # 側邊欄設定
@@ -330,26 +384,25 @@ def main():
         if st.button("開始新局", type="primary", use_container_width=True):
             debug_logger.log("=== 開始新局 ===")
             
-            # 確保真正隨機化
+            # 每局使用自己的種子（記錄下來可重現），不影響其他工作階段
             seed = int(time.time() * 1000) % 2**32
-            random.seed(seed)
             debug_logger.log(f"Random seed: {seed}")
             
             game = TexasHoldemGame(starting_stack=starting_stack, 
                                  small_blind=small_blind, 
-                                 big_blind=big_blind)
-            human_position = random.randint(0, 5)
+                                 big_blind=big_blind,
+                                 seed=seed)
+            human_position = game.rng.randint(0, 5)
             game.initialize_players(human_seat=human_position)
             game.start_new_hand()
             
             # 創建GTO分析器
-            with open('gto_ranges_clean.json', 'r', encoding='utf-8') as f:
-                gto_ranges = json.load(f)
-            gto_analyzer = GTOAnalyzer(gto_ranges)
+            gto_analyzer = get_analyzer(GTOAnalyzer)
             
             st.session_state.game = game
             st.session_state.hand_count = 1
-            st.session_state.player_decisions = []
+            st.session_state.decision_log = DecisionLog()
+            st.session_state.decision_log.new_hand()
             st.session_state.gto_analyzer = gto_analyzer
             
             human_player = next(p for p in game.players if p.is_human)
@@ -428,44 +481,48 @@ def main():
                             else:
                                 game.process_action(current_player_idx, Action.RAISE, comp_amount)
             
-            # 處理結算
+            # 處理結算（含邊池與平分，重繪時不會重複分配）
+            payouts = game.determine_winner()
+            # 匯出手牌紀錄（重繪時不重複寫入）
+            if st.session_state.get('exported_game') is not game:
+                get_history_writer().write(game)
+                st.session_state.exported_game = game
             if len(game.get_active_players()) == 1:
                 winner = next(p for p in game.players if not p.is_folded)
                 st.success(f"{winner.name} 贏得底池 ${game.pot}")
             else:
                 # 實際攤牌
-                game.determine_winner()
-                # determine_winner 不返回值，所以我們需要查看誰贏了
-                st.success(f"底池 ${game.pot} 已分配給贏家")
+                for player, amount in zip(game.players, payouts):
+                    if amount > 0:
+                        st.success(f"{player.name} 獲得 ${amount}")
             
             # 顯示分析報告
-            if st.session_state.player_decisions:
+            decision_log = st.session_state.decision_log
+            if decision_log.hand_total:
                 st.markdown("### GTO 分析報告")
                 
-                total_decisions = len(st.session_state.player_decisions)
-                correct_decisions = sum(1 for d in st.session_state.player_decisions if d['is_correct'])
+                total_decisions = decision_log.hand_total
+                correct_decisions = decision_log.hand_correct
                 
-                for i, decision in enumerate(st.session_state.player_decisions):
-                    st.markdown(f"#### 決策 {i+1}: {decision['street'].upper()}")
+                for i, decision in enumerate(decision_log.hand_records()):
+                    st.markdown(f"#### 決策 {i+1}: {decision.street.upper()}")
                     
                     col1, col2 = st.columns([1, 3])
                     with col1:
-                        if decision['is_correct']:
+                        if decision.is_correct:
                             st.success("正確")
                         else:
                             st.error("錯誤")
                     
                     with col2:
-                        st.markdown(f"**手牌:** {decision['hand']}")
-                        st.markdown(f"**位置:** {decision['position']}")
-                        st.markdown(f"**你的行動:** {decision['action']} ${decision['amount']}")
-                        st.markdown(f"**建議:** {decision['suggestion']}")
+                        st.markdown(f"**手牌:** {decision.hand}")
+                        st.markdown(f"**位置:** {decision.position}")
+                        st.markdown(f"**你的行動:** {decision.action} ${decision.amount}")
+                        st.markdown(f"**建議:** {decision.suggestion}")
                         
-                        # 顯示詳細分析
-                        detailed = decision.get('detailed', '')
-                        if detailed:
-                            with st.expander("詳細分析", expanded=False):
-                                st.markdown(detailed)
+                        # 顯示詳細分析（顯示時才產生）
+                        with st.expander("詳細分析", expanded=False):
+                            st.markdown(st.session_state.gto_analyzer.detailed_analysis(decision))
                     
                     st.markdown("---")
                 
@@ -494,21 +551,21 @@ def main():
             if st.button("下一手牌", type="primary", use_container_width=True):
                 # 重新隨機化位置
                 seed = int(time.time() * 1000) % 2**32
-                random.seed(seed)
                 
                 new_game = TexasHoldemGame(starting_stack=game.starting_stack,
                                          small_blind=game.small_blind,
-                                         big_blind=game.big_blind)
-                human_position = random.randint(0, 5)
+                                         big_blind=game.big_blind,
+                                         seed=seed)
+                human_position = new_game.rng.randint(0, 5)
                 new_game.initialize_players(human_seat=human_position)
                 new_game.start_new_hand()
                 
                 # 創建新的分析器
-                new_gto_analyzer = GTOAnalyzer(new_game.gto_ranges)
+                new_gto_analyzer = get_analyzer(GTOAnalyzer)
                 
                 st.session_state.game = new_game
                 st.session_state.hand_count += 1
-                st.session_state.player_decisions = []
+                st.session_state.decision_log.new_hand()
                 st.session_state.gto_analyzer = new_gto_analyzer
                 
                 human_player = next(p for p in new_game.players if p.is_human)
@@ -580,20 +637,9 @@ def main():
                         amount_taken = 0
                         
                         # 記錄決策用於分析
-                        is_correct, suggestion, detailed = st.session_state.gto_analyzer.analyze_decision(
-                            hand_str, current_player.position, "fold", 0, game.current_bet, game.big_blind
-                        )
-                        
-                        st.session_state.player_decisions.append({
-                            'street': game.street.name,
-                            'hand': hand_str,
-                            'position': current_player.position,
-                            'action': 'fold',
-                            'amount': 0,
-                            'is_correct': is_correct,
-                            'suggestion': suggestion,
-                            'detailed': detailed
-                        })
+                        st.session_state.decision_log.add(st.session_state.gto_analyzer.judge_decision(
+                            hand_str, current_player.position, "fold", 0, game.current_bet, game.big_blind, game.street
+                        ))
                         
                         # 執行行動
                         game.process_action(game.current_player_index, Action.FOLD, 0)
@@ -620,20 +666,9 @@ def main():
                                 amount_taken = 0
                                 
                                 # 記錄決策
-                                is_correct, suggestion, detailed = st.session_state.gto_analyzer.analyze_decision(
-                                    hand_str, current_player.position, "check", 0, game.current_bet, game.big_blind
-                                )
-                                
-                                st.session_state.player_decisions.append({
-                                    'street': game.street.name,
-                                    'hand': hand_str,
-                                    'position': current_player.position,
-                                    'action': 'check',
-                                    'amount': 0,
-                                    'is_correct': is_correct,
-                                    'suggestion': suggestion,
-                                    'detailed': detailed
-                                })
+                                st.session_state.decision_log.add(st.session_state.gto_analyzer.judge_decision(
+                                    hand_str, current_player.position, "check", 0, game.current_bet, game.big_blind, game.street
+                                ))
                                 
                                 game.process_action(game.current_player_index, Action.CHECK, 0)
                                 
@@ -657,20 +692,9 @@ def main():
                                 amount_taken = game.current_bet
                                 
                                 # 記錄決策
-                                is_correct, suggestion, detailed = st.session_state.gto_analyzer.analyze_decision(
-                                    hand_str, current_player.position, "call", game.current_bet, game.current_bet, game.big_blind
-                                )
-                                
-                                st.session_state.player_decisions.append({
-                                    'street': game.street.name,
-                                    'hand': hand_str,
-                                    'position': current_player.position,
-                                    'action': 'call',
-                                    'amount': game.current_bet,
-                                    'is_correct': is_correct,
-                                    'suggestion': suggestion,
-                                    'detailed': detailed
-                                })
+                                st.session_state.decision_log.add(st.session_state.gto_analyzer.judge_decision(
+                                    hand_str, current_player.position, "call", game.current_bet, game.current_bet, game.big_blind, game.street
+                                ))
                                 
                                 game.process_action(game.current_player_index, Action.CALL, game.current_bet)
                                 
@@ -714,20 +738,9 @@ def main():
                         amount_taken = bet_amount
                         
                         # 記錄決策
-                        is_correct, suggestion, detailed = st.session_state.gto_analyzer.analyze_decision(
-                            hand_str, current_player.position, action_taken, bet_amount, game.current_bet, game.big_blind
-                        )
-                        
-                        st.session_state.player_decisions.append({
-                            'street': game.street.name,
-                            'hand': hand_str,
-                            'position': current_player.position,
-                            'action': action_taken,
-                            'amount': bet_amount,
-                            'is_correct': is_correct,
-                            'suggestion': suggestion,
-                            'detailed': detailed
-                        })
+                        st.session_state.decision_log.add(st.session_state.gto_analyzer.judge_decision(
+                            hand_str, current_player.position, action_taken, bet_amount, game.current_bet, game.big_blind, game.street
+                        ))
                         
                         if game.current_bet == 0:
                             game.process_action(game.current_player_index, Action.BET, bet_amount)